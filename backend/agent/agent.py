@@ -1,503 +1,564 @@
 import json
-import random
+import re
+import time
 from loguru import logger
-from agent.intentclassifier import IntentClassifier
-from agent.knowledgebase import KnowledgeBase
+from agent.intent_classifier import IntentClassifier
+from agent.knowledge_base import KnowledgeBase
+from agent.llm_client import HTTPX_AVAILABLE, get_llm_client
+from agent.response_cache import get_response_cache, prompt_version
+from agent.state_store import get_conversation_store
+from agent.streaming import SentenceBuffer, split_sentences
+from agent.templates import TemplateResponse, render
 from db.database import SessionLocal
 from db.models import Customer, Ticket
+from runtime.executor import get_pool
+from runtime.tracing import current_trace, span
 import config
 from datetime import datetime
 
-try:
-    import ollama
-    OLLAMAAVAILABLE = True
-except ImportError:
-    OLLAMAAVAILABLE = False
-    logger.warning("Ollama not available, using rule-based responses")
+# Sampling options sent with every LLM request
+LLM_OPTIONS = {
+    "temperature": 0.7,  # More creative/conversational
+    "top_p": 0.9,
+    "num_predict": 120  # Shorter for faster speech
+}
 
 class AIAgent:
     """Enhanced AI agent with smarter, more interactive conversation handling"""
     
-    def init(self):
-        self.intentclassifier = IntentClassifier()
-        self.knowledgebase = KnowledgeBase()
-        self.conversationstate = {}
-        
-        if OLLAMAAVAILABLE and config.LLMPROVIDER == "ollama":
-            self.usellm = True
-            logger.info(f"AI Agent initialized with LLM: {config.LLMMODEL}")
+    # Customer ID patterns, most general first
+    ID_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\b(\d{1,6})\b',  # Any 1-6 digit number
+        r'(?:id|number|account)[\s:]*(\d{1,6})',
+        r'(?:it\'?s?|is)\s*(\d{1,6})',
+        r'customer\s*(?:id|number)?\s*:?\s*(\d{1,6})',
+        r'my\s*(?:id|number)\s*(?:is)?\s*:?\s*(\d{1,6})',
+    ))
+    
+    def __init__(self):
+        self.intent_classifier = IntentClassifier()
+        self.knowledge_base = KnowledgeBase()
+        self.conversation_state = get_conversation_store()
+        self.response_cache = get_response_cache()
+        self.db_pool = get_pool("db")
+        
+        if HTTPX_AVAILABLE and config.LLM_PROVIDER == "ollama":
+            self.use_llm = True
+            self.llm = get_llm_client()
+            logger.info(f"AI Agent initialized with LLM: {config.LLM_MODEL}")
         else:
-            self.usellm = False
+            self.use_llm = False
             logger.info("AI Agent initialized with rule-based system")
     
-    def getgreeting(self):
+    def get_greeting(self):
         """Get varied, natural greeting message"""
-        greetings = [
-            f"Hello! Thanks for calling {config.COMPANYNAME}. I'm your AI assistant. How can I help you today?",
-            f"Hi there! Welcome to {config.COMPANYNAME}. What brings you here today?",
-            f"Good day! I'm here to assist you with {config.COMPANYNAME}. What can I do for you?",
-            f"Hello! I'm your virtual assistant at {config.COMPANYNAME}. How may I help you?",
-            f"Hi! Thanks for reaching out to {config.COMPANYNAME}. What can I assist you with?"
-        ]
-        return random.choice(greetings)
+        return render("greeting")
     
-    async def processinput(self, userinput, conversationhistory, callid=None):
+    async def process_input(self, user_input, conversation_history, call_id=None, stream=False):
         """
         ENHANCED: Process user input with smarter intelligence and natural responses
         
         Args:
-            userinput: User's spoken text
-            conversationhistory: List of conversation messages
-            callid: Current call ID
-            
+            user_input: User's spoken text
+            conversation_history: List of conversation messages
+            call_id: Current call ID
+            stream: Return an async iterator of sentences for LLM-generated replies
+        
         Returns:
-            str: AI response
+            str: AI response (or async sentence iterator when stream=True and the LLM answers)
         """
         try:
-            # Ensure we always have a callid for state tracking
-            if callid is None:
-                callid = "websession"
-
+            # Ensure we always have a call_id for state tracking
+            if call_id is None:
+                call_id = "web_session"
+            
             # Classify intent
-            intent = self.intentclassifier.classify(userinput)
-            logger.info(f"[Call {callid}] Intent: {intent} | Input: {userinput[:50]}...")
+            with span("intent"):
+                intent = self.intent_classifier.classify(user_input)
+            logger.info(f"[Call {call_id}] Intent: {intent} | Input: {user_input[:50]}...")
             
             # Initialize or update conversation state
-            if callid not in self.conversationstate:
-                self.conversationstate[callid] = {
-                    "intent": intent,
-                    "customerid": None,
-                    "verified": False,
-                    "datacollected": {},
-                    "retrycount": 0,
-                    "awaitingcustomerid": False,
-                    "lastquestion": None,
-                    "conversationturns": 0
-                }
-            else:
-                self.conversationstate[callid]["intent"] = intent
+            state, created = self.conversation_state.get_or_create(call_id, intent)
+            if not created:
+                if state.awaiting_customer_id and intent == "general":
+                    # A bare ID ("12345", keypad digits) continues the request that asked for it
+                    intent = state.intent
+                else:
+                    state.intent = intent
             
-            state = self.conversationstate[callid]
-            state["conversationturns"] += 1
+            state.conversation_turns += 1
             
-            # ENHANCED: Better customer ID extraction with multiple patterns
-            import re
-            idpatterns = 
-                r'\b(\d{1,6})\b',  # Any 1-6 digit number
-                r'(?:id|number|account)[\s:',
-                r'(?:it\'?s?|is)\s:',
-                r'customer\s:',
-                r'my\s:\s:?\s:',
-            ]
+            state.lookups.clear()
             
-            for pattern in idpatterns:
-                match = re.search(pattern, userinput, re.IGNORECASE)
+            # ENHANCED: Better customer ID extraction with multiple patterns
+            for pattern in self.ID_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
-                    potentialid = match.group(1)
-                    customer = self.getcustomer(potentialid)
+                    potential_id = match.group(1)
+                    customer = await self.find_customer(state, potential_id)
                     if customer:
-                        state["customerid"] = potentialid
-                        state["verified"] = True
-                        state["awaitingcustomerid"] = False
-                        logger.info(f"[Call {callid}] Customer {potentialid} ({customer.name}) verified")
+                        if state.customer is not customer:
+                            state.verify(potential_id, customer)
+                            logger.info(f"[Call {call_id}] Customer {potential_id} ({customer.name}) verified")
                         break
             
-            # Get customer info if verified
-            customer = None
-            if state.get("customerid"):
-                customer = self.getcustomer(state["customerid"])
+            # Customer loaded at verification, reused for the rest of the call
+            customer = state.customer
             
             # Route to enhanced handlers
             if intent == "billing":
-                return await self.handlebillingenhanced(userinput, callid, conversationhistory, customer)
+                return await self.handle_billing_enhanced(user_input, call_id, conversation_history, customer)
             
-            elif intent == "technicalsupport":
-                return await self.handletechnicalsupportenhanced(userinput, callid, conversationhistory, customer)
+            elif intent == "technical_support":
+                return await self.handle_technical_support_enhanced(user_input, call_id, conversation_history, customer)
             
-            elif intent == "accountinfo":
-                return await self.handleaccountinfoenhanced(userinput, callid, conversationhistory, customer)
+            elif intent == "account_info":
+                return await self.handle_account_info_enhanced(user_input, call_id, conversation_history, customer)
             
-            elif intent == "newservice":
-                return await self.handlenewserviceenhanced(userinput, callid, conversationhistory)
+            elif intent == "new_service":
+                return await self.handle_new_service_enhanced(user_input, call_id, conversation_history)
             
             elif intent == "greeting":
-                return await self.handlegreetingenhanced(userinput, callid, conversationhistory)
+                return await self.handle_greeting_enhanced(user_input, call_id, conversation_history)
             
             else:
                 # Use smart response for all other queries
-                return await self.getsmartresponse(userinput, conversationhistory, callid, customer, intent)
-                
+                if stream and self.use_llm:
+                    return self.stream_smart_response(user_input, conversation_history, call_id, customer, intent)
+                return await self.get_smart_response(user_input, conversation_history, call_id, customer, intent)
+        
         except Exception as e:
-            logger.error(f"[Call {callid}] Error processing input: {e}")
+            logger.error(f"[Call {call_id}] Error processing input: {e}")
             
             # Smart error handling
-            if callid and callid in self.conversationstate:
-                state = self.conversationstate[callid]
-                state["retrycount"] = state.get("retrycount", 0) + 1
+            state = self.conversation_state.get(call_id) if call_id else None
+            if state is not None:
+                state.retry_count += 1
                 
-                if state["retrycount"] < 3:
-                    errorresponses = [
-                        "I apologize, could you please repeat that?",
-                        "Sorry, I didn't quite catch that. Could you say it again?",
-                        "Pardon me, could you rephrase that?",
-                        "I'm having trouble understanding. Could you try again?"
-                    ]
-                    return random.choice(errorresponses)
+                if state.retry_count < 3:
+                    return render("error_retry")
                 else:
-                    return "I'm having difficulty understanding. Let me connect you with a specialist who can better assist you."
+                    return render("error_escalate")
             
-            return "I apologize, I'm having trouble processing your request. Could you please try again?"
+            return render("error_generic")
     
-    async def handlegreetingenhanced(self, userinput, callid, conversationhistory):
+    async def handle_greeting_enhanced(self, user_input, call_id, conversation_history):
         """Handle greetings with natural, varied responses"""
-        responses = [
-            "Hello! I'm here to help. What can I assist you with today?",
-            "Hi there! How can I help you?",
-            "Good day! What brings you here today?",
-            "Hello! What can I do for you?",
-            "Hi! How may I assist you today?"
-        ]
-        return random.choice(responses)
+        return render("greeting_reply")
     
-    async def handlebillingenhanced(self, userinput, callid, conversationhistory, customer=None):
+    async def handle_billing_enhanced(self, user_input, call_id, conversation_history, customer=None):
         """ENHANCED: Handle billing with smarter, more natural responses"""
-        state = self.conversationstate[callid]
+        state = self.conversation_state.get(call_id)
         
         # Check if customer is verified
-        if not state["verified"]:
-            if state.get("awaitingcustomerid"):
+        if not state.verified:
+            if state.awaiting_customer_id:
                 # Extract customer ID from input
-                customerid = self.extractcustomerid(userinput)
-                if customerid:
-                    customer = self.getcustomer(customerid)
+                customer_id = self.extract_customer_id(user_input)
+                if customer_id:
+                    customer = await self.find_customer(state, customer_id)
                     if customer:
-                        state["customerid"] = customerid
-                        state["verified"] = True
-                        state["awaitingcustomerid"] = False
+                        state.verify(customer_id, customer)
                         
                         # Provide billing info immediately with natural language
-                        responses = [
-                            f"Perfect! I found your account, {customer.name}. Your current balance is ${customer.balance:.2f} on the {customer.plan} plan. Would you like to make a payment?",
-                            f"Thanks, {customer.name}! Your balance is ${customer.balance:.2f} and you're on our {customer.plan} plan. Need help with anything else?",
-                            f"Got it! {customer.name}, you have a balance of ${customer.balance:.2f} on the {customer.plan} plan. What would you like to do?",
-                        ]
-                        return random.choice(responses)
+                        return render("billing_verified", name=customer.name, balance=customer.balance, plan=customer.plan)
                     else:
-                        return f"I couldn't find customer ID {customerid} in our system. Could you double-check that number?"
+                        return render("billing_id_not_found", customer_id=customer_id)
                 else:
-                    return "I didn't catch your customer ID. Could you say it again, please?"
+                    return render("billing_id_missing")
             else:
-                state["awaitingcustomerid"] = True
-                askidresponses = [
-                    "I'd be happy to help with your billing. Can you provide your customer ID?",
-                    "Sure! To check your bill, I'll need your customer ID. What is it?",
-                    "Let me pull up your billing. What's your customer ID?",
-                ]
-                return random.choice(askidresponses)
+                state.awaiting_customer_id = True
+                return render("billing_ask_id")
         else:
             # Customer already verified
             if not customer:
-                customer = self.getcustomer(state["customerid"])
+                customer = await self.find_customer(state, state.customer_id)
             
             if not customer:
-                state["verified"] = False
-                return "I'm having trouble accessing your account. Could you provide your customer ID again?"
+                state.verified = False
+                return render("billing_lookup_failed")
             
             # Provide billing info with varied responses
-            responses = [
-                f"{customer.name}, your balance is ${customer.balance:.2f} on the {customer.plan} plan. Need anything else?",
-                f"Your current balance is ${customer.balance:.2f}, {customer.name}. You're on our {customer.plan} plan. Would you like to make a payment?",
-                f"I see your balance is ${customer.balance:.2f} for the {customer.plan} plan. How can I help with that?",
-            ]
-            return random.choice(responses)
+            return render("billing_balance", name=customer.name, balance=customer.balance, plan=customer.plan)
     
-    async def handletechnicalsupportenhanced(self, userinput, callid, conversationhistory, customer=None):
+    async def handle_technical_support_enhanced(self, user_input, call_id, conversation_history, customer=None):
         """ENHANCED: Handle technical support with empathy and efficiency"""
-        state = self.conversationstate[callid]
+        state = self.conversation_state.get(call_id)
         
-        if not state["verified"]:
-            if state.get("awaitingcustomerid"):
-                customerid = self.extractcustomerid(userinput)
-                if customerid:
-                    customer = self.getcustomer(customerid)
+        if not state.verified:
+            if state.awaiting_customer_id:
+                customer_id = self.extract_customer_id(user_input)
+                if customer_id:
+                    customer = await self.find_customer(state, customer_id)
                     if customer:
-                        state["customerid"] = customerid
-                        state["verified"] = True
-                        state["awaitingcustomerid"] = False
+                        state.verify(customer_id, customer)
                         
-                        empathyresponses = [
-                            f"Thanks, {customer.name}. I'm sorry you're having trouble. Can you describe the issue?",
-                            f"Got it, {customer.name}. Tell me more about what's happening.",
-                            f"Okay {customer.name}, I'm here to help. What's the problem you're experiencing?",
-                        ]
-                        return random.choice(empathyresponses)
+                        return render("support_verified", name=customer.name)
                     else:
-                        return f"I couldn't find customer ID {customerid}. Could you verify that number?"
+                        return render("support_id_not_found", customer_id=customer_id)
                 else:
-                    return "I need your customer ID to help. What is it?"
+                    return render("support_id_missing")
             else:
-                state["awaitingcustomerid"] = True
-                supportaskresponses = [
-                    "I'm sorry you're having issues. Let me help. What's your customer ID?",
-                    "I'll get that fixed for you. First, can you give me your customer ID?",
-                    "Let me assist with that. What's your customer ID?",
-                ]
-                return random.choice(supportaskresponses)
+                state.awaiting_customer_id = True
+                return render("support_ask_id")
         else:
             # Create support ticket
-            if not state.get("ticketcreated"):
+            if not state.ticket_created:
                 if not customer:
-                    customer = self.getcustomer(state["customerid"])
+                    customer = await self.find_customer(state, state.customer_id)
                 
                 if not customer:
-                    state["verified"] = False
-                    return "I'm having trouble accessing your account. Customer ID again?"
+                    state.verified = False
+                    return render("support_lookup_failed")
                 
-                ticket = self.createticket(
-                    customerid=state["customerid"],
-                    issuetype="technicalsupport",
-                    description=userinput
+                ticket = await self.create_ticket(
+                    customer_id=state.customer_id,
+                    issue_type="technical_support",
+                    description=user_input
                 )
-                state["ticketcreated"] = True
+                state.ticket_created = True
                 
-                ticketresponses = [
-                    f"I've created support ticket #{ticket.id} for you, {customer.name}. Our tech team will contact you within 24 hours. Anything else I can help with?",
-                    f"Done! Ticket #{ticket.id} is created. You'll hear from our technicians within a day. Need anything else?",
-                    f"All set, {customer.name}! Ticket #{ticket.id} is in the system. Our team will reach out within 24 hours. What else can I do for you?",
-                ]
-                return random.choice(ticketresponses)
+                return render("support_ticket_created", name=customer.name, ticket_id=ticket.id)
             else:
-                return "Your support ticket is already created. Our team will contact you soon. Anything else?"
+                return render("support_ticket_exists")
     
-    async def handleaccountinfoenhanced(self, userinput, callid, conversationhistory, customer=None):
+    async def handle_account_info_enhanced(self, user_input, call_id, conversation_history, customer=None):
         """ENHANCED: Handle account info with clear, helpful responses"""
-        state = self.conversationstate[callid]
+        state = self.conversation_state.get(call_id)
         
-        if not state["verified"]:
-            if state.get("awaitingcustomerid"):
-                customerid = self.extractcustomerid(userinput)
-                if customerid:
-                    customer = self.getcustomer(customerid)
+        if not state.verified:
+            if state.awaiting_customer_id:
+                customer_id = self.extract_customer_id(user_input)
+                if customer_id:
+                    customer = await self.find_customer(state, customer_id)
                     if customer:
-                        state["customerid"] = customerid
-                        state["verified"] = True
-                        state["awaitingcustomerid"] = False
+                        state.verify(customer_id, customer)
                         
-                        inforesponses = [
-                            f"Here's your info, {customer.name}: Phone {customer.phone}, {customer.plan} plan, status is {customer.status}. What else?",
-                            f"Got it! {customer.name}, you're on the {customer.plan} plan, status {customer.status}. Phone on file is {customer.phone}. Need anything else?",
-                            f"{customer.name}, your account shows: {customer.plan} plan, {customer.status} status, phone {customer.phone}. What would you like to know?",
-                        ]
-                        return random.choice(inforesponses)
+                        return render(
+                            "account_verified",
+                            name=customer.name, phone=customer.phone, plan=customer.plan, status=customer.status
+                        )
                     else:
-                        return f"Customer ID {customerid} not found. Can you check that number?"
+                        return render("account_id_not_found", customer_id=customer_id)
                 else:
-                    return "I need your customer ID. What is it?"
+                    return render("account_id_missing")
             else:
-                state["awaitingcustomerid"] = True
-                return "I can help with your account info. What's your customer ID?"
+                state.awaiting_customer_id = True
+                return render("account_ask_id")
         else:
             if not customer:
-                customer = self.getcustomer(state["customerid"])
+                customer = await self.find_customer(state, state.customer_id)
             
             if not customer:
-                state["verified"] = False
-                return "Having trouble with your account. Customer ID again?"
+                state.verified = False
+                return render("account_lookup_failed")
             
-            accountresponses = [
-                f"{customer.name}, you're on the {customer.plan} plan with {customer.status} status. Anything else?",
-                f"Your account shows {customer.plan} plan, status is {customer.status}. What else can I help with?",
-                f"Account status: {customer.status}, plan: {customer.plan}. Need anything else, {customer.name}?",
-            ]
-            return random.choice(accountresponses)
+            return render("account_summary", name=customer.name, plan=customer.plan, status=customer.status)
     
-    async def handlenewserviceenhanced(self, userinput, callid, conversationhistory):
+    async def handle_new_service_enhanced(self, user_input, call_id, conversation_history):
         """ENHANCED: Handle new service requests"""
-        newserviceresponses = [
-            "I'd love to help you with a new service! Let me transfer you to our sales team who can discuss plans and pricing.",
-            "Great! Our sales team can help you with that. Let me connect you now.",
-            "Perfect timing! I'll transfer you to sales to explore our service options.",
+        return render("new_service")
+    
+    def build_llm_messages(self, user_input, conversation_history, call_id, customer=None, intent=None):
+        """Build the system prompt and chat history sent to the LLM"""
+        state = self.conversation_state.get(call_id)
+        
+        # Build comprehensive context
+        context_parts = [
+            f"You are a friendly, professional customer service agent for {config.COMPANY_NAME}.",
+            "You are speaking with a customer over the phone. Be conversational, natural, and helpful.",
+            "Keep responses concise (1-2 sentences) since this is a voice conversation.",
+            "Be empathetic and understanding. Use natural language, not robotic responses.",
+            "Speak faster and more efficiently - get to the point quickly.",
+        ]
+        
+        # Add customer context if available
+        if customer:
+            context_parts.append(
+                f"Customer Information: Name: {customer.name}, "
+                f"Plan: {customer.plan}, Balance: ${customer.balance:.2f}, Status: {customer.status}"
+            )
+        
+        # Add intent context
+        if intent:
+            context_parts.append(f"Customer's intent appears to be: {intent.replace('_', ' ')}")
+        
+        # Add state context
+        if state is not None and state.awaiting_customer_id:
+            context_parts.append("You are currently waiting for the customer to provide their customer ID.")
+        
+        # Add knowledge base context
+        kb_context = self.knowledge_base.get_context()
+        context_parts.append(kb_context)
+        
+        # Build system message
+        system_message = " ".join(context_parts)
+        
+        # Build messages with conversation history
+        messages = [
+            {
+                "role": "system",
+                "content": system_message
+            }
         ]
-        return random.choice(newserviceresponses)
+        
+        # Add conversation history (last 8 messages for context)
+        for msg in conversation_history[-8:]:
+            messages.append(msg)
+        
+        # Add current user input
+        messages.append({
+            "role": "user",
+            "content": user_input
+        })
+        
+        return messages
+    
+    def response_cache_version(self, user_input, customer, messages):
+        """
+        Prompt version to cache this turn's reply under
+        
+        Replies are reused across calls, so turns whose prompt carries customer
+        data (a verified customer, or digits in the input that may be an ID or
+        account number) are never cached. The history sent with the turn is
+        part of the version, so replies only match the same conversation so far.
+        
+        Returns:
+            str: prompt_version() of the system prompt and history, or None if the turn is not cacheable
+        """
+        if not config.LLM_CACHE_ENABLED:
+            return None
+        if customer is not None or any(ch.isdigit() for ch in user_input):
+            self.response_cache.skip()
+            return None
+        return prompt_version(messages[0]["content"], LLM_OPTIONS, messages[1:-1])
+    
+    async def stream_response(self, user_input, conversation_history, call_id=None):
+        """
+        Stream the reply to a user turn sentence by sentence
+        
+        Template responses are yielded whole (their static audio is already
+        pre-rendered) and other fixed replies are split into sentences; LLM
+        replies are yielded as each sentence finishes generating, so TTS can
+        start on the first sentence while the rest is still being produced.
+        
+        Yields:
+            str: Next sentence of the response
+        """
+        result = await self.process_input(user_input, conversation_history, call_id, stream=True)
+        
+        if isinstance(result, TemplateResponse):
+            yield result
+        elif isinstance(result, str):
+            for sentence in split_sentences(result):
+                yield sentence
+        else:
+            async for sentence in result:
+                yield sentence
+    
+    async def stream_smart_response(self, user_input, conversation_history, call_id, customer=None, intent=None):
+        """
+        Streaming variant of get_smart_response
+        
+        Yields:
+            str: Complete sentences as the LLM generates them
+        """
+        buffer = SentenceBuffer()
+        produced = False
+        trace = current_trace()
+        started = time.perf_counter()
+        
+        try:
+            messages = self.build_llm_messages(user_input, conversation_history, call_id, customer, intent)
+            version = self.response_cache_version(user_input, customer, messages)
+            if version:
+                cached = self.response_cache.get(user_input, intent, version)
+                if cached:
+                    logger.info(f"[Call {call_id}] LLM cache hit: {cached[:80]}...")
+                    for sentence in split_sentences(cached):
+                        produced = True
+                        yield sentence
+                    return
+            
+            logger.info(f"[Call {call_id}] Streaming LLM with {len(messages)} messages")
+            
+            # Cancelling the consumer (caller hung up) closes the request
+            tokens = []
+            async for token in self.llm.stream_chat(messages, LLM_OPTIONS):
+                tokens.append(token)
+                for sentence in buffer.feed(token):
+                    if not produced and trace is not None:
+                        trace.record("llm_first_sentence", started, time.perf_counter())
+                    produced = True
+                    yield sentence
+            
+            tail = buffer.flush()
+            if tail:
+                produced = True
+                yield tail
+            
+            if trace is not None:
+                trace.record("llm", started, time.perf_counter())
+            
+            reply = "".join(tokens).strip()
+            if version and reply:
+                self.response_cache.put(user_input, intent, version, reply, (time.perf_counter() - started) * 1000)
+        
+        except Exception as e:
+            logger.error(f"[Call {call_id}] LLM streaming error: {e}")
+            if not produced:
+                response = self.knowledge_base.get_response(user_input)
+                yield response or render("llm_error")
     
-    async def getsmartresponse(self, userinput, conversationhistory, callid, customer=None, intent=None):
-       """
+    async def get_smart_response(self, user_input, conversation_history, call_id, customer=None, intent=None):
+        """
         ENHANCED: Get intelligent, context-aware response
         """
-        if not self.usellm:
+        if not self.use_llm:
             # Fallback to knowledge base
-            response = self.knowledgebase.getresponse(userinput)
-            return response or "I'm here to help! Could you tell me more about what you need?"
+            response = self.knowledge_base.get_response(user_input)
+            return response or render("llm_fallback")
         
         try:
-            state = self.conversationstate.get(callid, {})
-            
-            # Build comprehensive context
-            contextparts = [
-                f"You are a friendly, professional customer service agent for {config.COMPANYNAME}.",
-                "You are speaking with a customer over the phone. Be conversational, natural, and helpful.",
-                "Keep responses concise (1-2 sentences) since this is a voice conversation.",
-                "Be empathetic and understanding. Use natural language, not robotic responses.",
-                "Speak faster and more efficiently - get to the point quickly.",
-            ]
-            
-            # Add customer context if available
-            if customer:
-                contextparts.append(
-                    f"Customer Information: Name: {customer.name}, "
-                    f"Plan: {customer.plan}, Balance: ${customer.balance:.2f}, Status: {customer.status}"
-                )
-            
-            # Add intent context
-            if intent:
-                contextparts.append(f"Customer's intent appears to be: {intent.replace('', ' ')}")
-            
-            # Add state context
-            if state.get("awaitingcustomerid"):
-                contextparts.append("You are currently waiting for the customer to provide their customer ID.")
-            
-            # Add knowledge base context
-            kbcontext = self.knowledgebase.getcontext()
-            contextparts.append(kbcontext)
+            messages = self.build_llm_messages(user_input, conversation_history, call_id, customer, intent)
             
-            # Build system message
-            systemmessage = " ".join(contextparts)
+            # Generic questions (hours, payment methods, ...) skip generation entirely
+            version = self.response_cache_version(user_input, customer, messages)
+            if version:
+                cached = self.response_cache.get(user_input, intent, version)
+                if cached:
+                    logger.info(f"[Call {call_id}] LLM cache hit: {cached[:80]}...")
+                    return cached
             
-            # Build messages with conversation history
-            messages = [
-                {
-                    "role": "system",
-                    "content": systemmessage
-                }
-            ]
+            logger.info(f"[Call {call_id}] Calling LLM with {len(messages)} messages")
             
-            # Add conversation history (last 8 messages for context)
-            for msg in conversationhistory[-8:]:
-                messages.append(msg)
+            started = time.perf_counter()
+            with span("llm"):
+                ai_response = await self.llm.chat(messages, LLM_OPTIONS)
             
-            # Add current user input
-            messages.append({
-                "role": "user",
-                "content": userinput
-            })
-            
-            logger.info(f"[Call {callid}] Calling LLM with {len(messages)} messages")
-            
-            # Get response from Ollama
-            response = ollama.chat(
-                model=config.LLMMODEL,
-                messages=messages,
-                options={
-                    "temperature": 0.7,  # More creative/conversational
-                    "topp": 0.9,
-                    "numpredict": 120  # Shorter for faster speech
-                }
-            )
-            
-            airesponse = response['message']['content'].strip()
-            logger.info(f"[Call {callid}] LLM response: {airesponse[:80]}...")
-            
-            return airesponse
+            if version and ai_response:
+                self.response_cache.put(user_input, intent, version, ai_response, (time.perf_counter() - started) * 1000)
+            logger.info(f"[Call {call_id}] LLM response: {ai_response[:80]}...")
             
+            return ai_response
+        
         except Exception as e:
-            logger.error(f"[Call {callid}] LLM error: {e}")
+            logger.error(f"[Call {call_id}] LLM error: {e}")
             # Fallback to knowledge base
-            response = self.knowledgebase.getresponse(userinput)
-            return response or "I apologize, I'm having trouble right now. Could you please repeat that?"
+            response = self.knowledge_base.get_response(user_input)
+            return response or render("llm_error")
     
-    def classifyintent(self, text):
+    def is_awaiting_customer_id(self, call_id):
+        """Check whether the agent's last reply asked this call for a customer ID"""
+        state = self.conversation_state.get(call_id)
+        return bool(state and state.awaiting_customer_id)
+    
+    def end_call(self, call_id):
+        """Release a finished call's conversation state"""
+        if self.conversation_state.release(call_id):
+            logger.debug(f"[Call {call_id}] Conversation state released")
+    
+    def classify_intent(self, text):
         """Classify user intent"""
-        return self.intentclassifier.classify(text)
+        return self.intent_classifier.classify(text)
     
-    def shouldendconversation(self, conversationhistory):
+    def should_end_conversation(self, conversation_history):
         """Determine if conversation should end"""
-        if len(conversationhistory) < 2:
+        if len(conversation_history) < 2:
             return False
         
-        lastusermsg = None
-        for msg in reversed(conversationhistory):
+        last_user_msg = None
+        for msg in reversed(conversation_history):
             if msg["role"] == "user":
-                lastusermsg = msg["content"].lower()
+                last_user_msg = msg["content"].lower()
                 break
         
-        if lastusermsg:
-            endphrases = ["goodbye", "bye", "thank you", "thanks", "that's all", "nothing else", "no thanks"]
-            return any(phrase in lastusermsg for phrase in endphrases)
+        if last_user_msg:
+            end_phrases = ["goodbye", "bye", "thank you", "thanks", "that's all", "nothing else", "no thanks"]
+            return any(phrase in last_user_msg for phrase in end_phrases)
         
         return False
     
-    def extractcustomerid(self, text):
+    def extract_customer_id(self, text):
         """Extract customer ID from text with enhanced patterns"""
-        import re
-        
-        # Enhanced patterns for better extraction
-        patterns = 
-            r'\b(\d{1,6})\b',  # Any 1-6 digit number
-            r'(?:id|number|account)[\s:',
-            r'(?:it\'?s?|is)\s:',
-            r'customer\s:',
-            r'my\s:\s:?\s:',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in self.ID_PATTERNS:
+            match = pattern.search(text)
             if match:
-                customerid = match.group(1)
-                # Verify it's a valid customer ID (1-6 digits)
-                if 1 <= len(customerid) <= 6:
-                    return customerid
+                return match.group(1)
         
         return None
     
-    def getcustomer(self, customerid):
-        """Get customer from database"""
+    async def find_customer(self, state, customer_id):
+        """
+        Customer for a candidate ID, hitting the database at most once per turn
+        
+        Args:
+            state: CallState of the current call
+            customer_id: Candidate ID as spoken or keyed
+        
+        Returns:
+            Customer: Or None if no customer has that ID
+        """
+        if state.customer is not None and state.customer_id == customer_id:
+            return state.customer
+        if customer_id not in state.lookups:
+            state.lookups[customer_id] = await self.get_customer(customer_id)
+        return state.lookups[customer_id]
+    
+    async def get_customer(self, customer_id):
+        """Get customer from database, on the DB pool so other calls keep running"""
         try:
-            db = SessionLocal()
-            customer = db.query(Customer).filter(Customer.id == int(customerid)).first()
-            db.close()
-            return customer
+            with span("customer_lookup"):
+                return await self.db_pool.run(self._load_customer, customer_id)
         except Exception as e:
             logger.error(f"Error getting customer: {e}")
             return None
     
-    def createticket(self, customerid, issuetype, description):
-        """Create support ticket"""
+    def _load_customer(self, customer_id):
+        """Blocking SELECT of one customer by id"""
+        db = SessionLocal()
         try:
-            db = SessionLocal()
-            ticket = Ticket(
-                customerid=customerid,
-                type=issuetype,
-                description=description,
-                status="open",
-                priority="normal",
-                createdat=datetime.now()
-            )
-            db.add(ticket)
-            db.commit()
-            db.refresh(ticket)
-            ticketid = ticket.id
+            return db.query(Customer).filter(Customer.id == int(customer_id)).first()
+        finally:
             db.close()
+    
+    async def create_ticket(self, customer_id, issue_type, description):
+        """Create support ticket, on the DB pool"""
+        try:
+            ticket_id = await self.db_pool.run(self._insert_ticket, customer_id, issue_type, description)
             
-            logger.info(f"Created ticket #{ticketid} for customer {customerid}")
+            logger.info(f"Created ticket #{ticket_id} for customer {customer_id}")
             
             # Return a simple object with the ticket ID
             class TicketResult:
-                def init(self, ticketid):
-                    self.id = ticketid
-            
-            return TicketResult(ticketid)
+                def __init__(self, ticket_id):
+                    self.id = ticket_id
             
+            return TicketResult(ticket_id)
+        
         except Exception as e:
             logger.error(f"Error creating ticket: {e}")
             return None
     
-    def getfarewell(self):
+    def _insert_ticket(self, customer_id, issue_type, description):
+        """Blocking INSERT of an open ticket; returns its id"""
+        db = SessionLocal()
+        try:
+            ticket = Ticket(
+                customer_id=customer_id,
+                type=issue_type,
+                description=description,
+                status="open",
+                priority="normal",
+                created_at=datetime.now()
+            )
+            db.add(ticket)
+            db.commit()
+            db.refresh(ticket)
+            return ticket.id
+        finally:
+            db.close()
+    
+    def get_farewell(self):
         """Get varied farewell message"""
-        farewells = [
-            f"Thank you for calling {config.COMPANYNAME}. Have a wonderful day!",
-            f"It was my pleasure helping you. Take care!",
-            f"Thanks for reaching out to {config.COMPANY_NAME}. Feel free to call anytime. Goodbye!",
-            f"Great talking with you! Have an excellent day!",
-            f"Thank you! Don't hesitate to call back if you need anything. Bye!"
-        ]
-        return random.choice(farewells)
\ No newline at end of file
+        return render("farewell")
\ No newline at end of file
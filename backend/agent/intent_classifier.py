@@ -1,19 +1,127 @@
 from loguru import logger
 import re
+import config
+from agent.intent_model import get_intent_model
 
-class IntentClassifier:
-    """Classify user intent from text"""
-    
-    def __init__(self):
-        self.intent_keywords = {
-            "greeting": ["hello", "hi", "hey", "good morning", "good afternoon"],
-            "billing": ["bill", "payment", "charge", "invoice", "balance", "pay", "cost", "price"],
-            "technical_support": ["not working", "broken", "slow", "issue", "problem", "error", "down", "internet", "connection", "wifi"],
-            "account_info": ["account", "information", "details", "profile", "plan", "subscription"],
-            "new_service": ["new", "activate", "sign up", "register", "order", "sim card", "service"],
-            "cancellation": ["cancel", "terminate", "close account", "stop service"],
-            "complaint": ["complain", "unhappy", "disappointed", "frustrated", "angry"],
+INTENT_KEYWORDS = {
+    "greeting": ["hello", "hi", "hey", "good morning", "good afternoon"],
+    "billing": ["bill", "payment", "charge", "invoice", "balance", "pay", "cost", "price"],
+    "technical_support": ["not working", "broken", "slow", "issue", "problem", "error", "down", "internet", "connection", "wifi"],
+    "account_info": ["account", "information", "details", "profile", "plan", "subscription"],
+    "new_service": ["new", "activate", "sign up", "register", "registration", "order", "sim card", "service"],
+    "cancellation": ["cancel", "cancellation", "cancelled", "terminate", "close account", "stop service"],
+    "complaint": ["complain", "complaint", "unhappy", "disappointed", "frustrated", "angry"],
+}
+
+# Plural/tense endings accepted after keywords of at least this length
+# ("bills", "charged", "billing", "cancelled"); shorter ones must match
+# exactly so "hi" doesn't fire on "his" or "new" on "news"
+INFLECTED_MIN_LENGTH = 4
+INFLECTIONS = r"(?:s|es|d|ed|ing|led|ling)?"
+
+
+def compile_keywords(intent_keywords):
+    """
+    Compile a keyword table into one word-bounded alternation
+    
+    Each keyword gets its own capture group, so a match's lastindex names
+    the keyword. Longer keywords come first, so "close account" wins over
+    "account" at the same position.
+    
+    Only one keyword matches per position, so a longer keyword also
+    credits the keywords of its intent it is built on: "cancelled" and
+    "cancellation" count "cancel" as well.
+    
+    Returns:
+        tuple: (compiled pattern, (intent, keywords credited) of each capture group)
+    """
+    entries = sorted(
+        ((keyword, intent) for intent, keywords in intent_keywords.items() for keyword in keywords),
+        key=lambda entry: -len(entry[0]),
+    )
+    alternatives = []
+    for keyword, _ in entries:
+        body = r"\s+".join(re.escape(word) for word in keyword.split())
+        if len(keyword) >= INFLECTED_MIN_LENGTH:
+            body += INFLECTIONS
+        alternatives.append(f"({body})")
+    
+    pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+    
+    # Group n (1-based) -> entries[n - 1]
+    credits = [None]
+    for keyword, intent in entries:
+        stems = {
+            other for other in intent_keywords[intent]
+            if other == keyword or (len(other) >= INFLECTED_MIN_LENGTH and keyword.startswith(other))
         }
+        credits.append((intent, frozenset(stems)))
+    return pattern, credits
+
+
+class IntentClassifier:
+    """
+    Classify user intent from text
+    
+    The keyword table decides whenever it matches. A trained intent model
+    (if INTENT_MODEL_PATH exists) fills the gaps: it decides inputs with no
+    keyword once its calibrated confidence reaches INTENT_MODEL_THRESHOLD,
+    and overrides the keywords only when it disagrees with confidence of at
+    least INTENT_MODEL_OVERRIDE_THRESHOLD. Only inputs neither recognizes
+    come out as "general" and are answered by the LLM.
+    """
+    
+    # Compiled once per process, shared by every classifier instance
+    PATTERN, GROUP_CREDITS = compile_keywords(INTENT_KEYWORDS)
+    
+    def __init__(self, model=None):
+        self.intent_keywords = INTENT_KEYWORDS
+        self.model = model if model is not None else get_intent_model()
+        self.threshold = config.INTENT_MODEL_THRESHOLD
+        self.override_threshold = config.INTENT_MODEL_OVERRIDE_THRESHOLD
+    
+    def scores(self, text):
+        """
+        Number of distinct keywords of each intent found in the text
+        
+        Returns:
+            dict: intent -> score, in keyword-table order, matched intents only
+        """
+        matched = set()
+        for match in self.PATTERN.finditer(text):
+            intent, keywords = self.GROUP_CREDITS[match.lastindex]
+            matched.update((intent, keyword) for keyword in keywords)
+        counts = {}
+        for intent, _ in matched:
+            counts[intent] = counts.get(intent, 0) + 1
+        return {intent: counts[intent] for intent in self.intent_keywords if intent in counts}
+    
+    def decide(self, scores, prediction):
+        """
+        Combine keyword scores and a model prediction into one intent
+        
+        Args:
+            scores: Keyword scores of the text (see scores())
+            prediction: (intent, confidence) from the model, (None, 0.0) without one
+        
+        Returns:
+            str: Detected intent
+        """
+        intent, confidence = prediction
+        if not scores:
+            if intent is not None and confidence >= self.threshold:
+                logger.debug(f"Intent model: {intent} ({confidence:.2f})")
+                return intent
+            # Default to general if no match
+            return "general"
+        
+        best_intent = max(scores, key=scores.get)
+        if intent is not None and intent != best_intent and confidence >= self.override_threshold:
+            logger.debug(f"Intent model overrides keywords {scores}: {intent} ({confidence:.2f})")
+            return intent
+        
+        logger.debug(f"Intent scores: {scores}, selected: {best_intent}")
+        return best_intent
     
     def classify(self, text):
         """
@@ -21,37 +129,35 @@ class IntentClassifier:
         
         Args:
             text: User input text
-            
+        
         Returns:
             str: Detected intent
         """
-        text_lower = text.lower()
-        
-        # Score each intent
-        scores = {}
-        for intent, keywords in self.intent_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                scores[intent] = score
+        prediction = self.model.predict(text, self.threshold) if self.model is not None else (None, 0.0)
+        return self.decide(self.scores(text), prediction)
+    
+    def classify_batch(self, texts):
+        """
+        Classify many texts, e.g. to backfill Call.intent from stored transcripts
         
-        # Return highest scoring intent
-        if scores:
-            best_intent = max(scores, key=scores.get)
-            logger.debug(f"Intent scores: {scores}, selected: {best_intent}")
-            return best_intent
+        Args:
+            texts: Iterable of texts
         
-        # Default to general if no match
-        return "general"
+        Returns:
+            list: Detected intent of each text, in order
+        """
+        texts = [text or "" for text in texts]
+        predictions = self.model.predict_batch(texts, self.threshold) if self.model is not None else [(None, 0.0)] * len(texts)
+        return [self.decide(self.scores(text), prediction) for text, prediction in zip(texts, predictions)]
     
     def get_confidence(self, text, intent):
         """Get confidence score for an intent"""
-        text_lower = text.lower()
         keywords = self.intent_keywords.get(intent, [])
         
         if not keywords:
             return 0.0
         
-        matches = sum(1 for keyword in keywords if keyword in text_lower)
+        matches = self.scores(text).get(intent, 0)
         confidence = matches / len(keywords)
         
         return min(confidence, 1.0)
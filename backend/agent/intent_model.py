@@ -0,0 +1,369 @@
+"""TF-IDF + linear intent model trained from call history, stored as NumPy arrays"""
+import math
+import threading
+from collections import Counter
+from loguru import logger
+import numpy as np
+import config
+from agent.response_cache import normalize
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def transcript_user_text(transcript):
+    """The caller's lines of a stored transcript ("USER: ..." lines), joined"""
+    return " ".join(
+        line[len("USER:"):].strip()
+        for line in (transcript or "").splitlines()
+        if line.startswith("USER:")
+    )
+
+
+def features(text):
+    """
+    Word unigrams and bigrams of a text
+    
+    Digits are dropped so customer IDs and phone numbers never become
+    features; stopwords are kept because "not working" and "close account"
+    depend on them.
+    """
+    words = [word for word in normalize(text).split() if not word.isdigit()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class SparseRows:
+    """
+    Rows of L2-normalized TF-IDF values in CSR layout (indptr, indices, values)
+    
+    Just enough sparse algebra for training and inference without scipy:
+    rows @ W gathers the weight rows of each nonzero and sums them per row,
+    and the transpose product scatters back with one bincount per class.
+    """
+    
+    def __init__(self, indptr, indices, values, n_features):
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+        self.n_features = n_features
+        self.rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    
+    def __len__(self):
+        return len(self.indptr) - 1
+    
+    def dot(self, weights):
+        """rows @ weights -> (n_rows, n_classes)"""
+        out = np.zeros((len(self), weights.shape[1]), dtype=weights.dtype)
+        nonempty = np.flatnonzero(np.diff(self.indptr))
+        if len(nonempty):
+            products = weights[self.indices] * self.values[:, None]
+            out[nonempty] = np.add.reduceat(products, self.indptr[nonempty], axis=0)
+        return out
+    
+    def tdot(self, grad):
+        """rows.T @ grad -> (n_features, n_classes)"""
+        scattered = grad[self.rows] * self.values[:, None]
+        return np.stack([
+            np.bincount(self.indices, weights=scattered[:, k], minlength=self.n_features)
+            for k in range(grad.shape[1])
+        ], axis=1)
+    
+    def take(self, row_ids):
+        """Subset of rows"""
+        starts = self.indptr[row_ids]
+        lengths = self.indptr[row_ids + 1] - starts
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        picked = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[picked], self.values[picked], self.n_features)
+
+
+class IntentModel:
+    """
+    Multinomial logistic regression over TF-IDF features
+    
+    Inference for a text gathers the weight rows of its few known n-grams,
+    so it costs microseconds regardless of vocabulary size. Probabilities
+    are temperature-scaled on held-out calls at training time, so the
+    confidence can be compared against a fixed threshold.
+    """
+    
+    def __init__(self, vocabulary, idf, weights, bias, classes, temperature=1.0):
+        self.vocabulary = vocabulary
+        self.index = {term: i for i, term in enumerate(vocabulary)}
+        self.idf = idf.astype(np.float32)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.classes = list(classes)
+        self.temperature = float(temperature)
+        self.counters = {"predictions": 0, "confident": 0, "low_confidence": 0, "no_features": 0}
+    
+    def vectorize(self, texts):
+        """
+        TF-IDF rows of texts (sublinear term frequency, L2-normalized)
+        
+        Returns:
+            SparseRows
+        """
+        indptr, indices, values = [0], [], []
+        for text in texts:
+            counts = Counter(i for i in map(self.index.get, features(text or "")) if i is not None)
+            if counts:
+                ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                row = tf * self.idf[ids]
+                indices.append(ids)
+                values.append(row / np.linalg.norm(row))
+            indptr.append(indptr[-1] + len(counts))
+        return SparseRows(
+            np.asarray(indptr, dtype=np.int64),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+            np.concatenate(values).astype(np.float32) if values else np.zeros(0, dtype=np.float32),
+            len(self.vocabulary),
+        )
+    
+    def predict_proba(self, rows):
+        """Calibrated class probabilities of vectorized rows"""
+        return softmax((rows.dot(self.weights) + self.bias) / self.temperature)
+    
+    def predict_batch(self, texts, threshold=None):
+        """
+        Classify many texts in one vectorized pass
+        
+        Args:
+            texts: Texts to classify
+            threshold: Confidence below which a prediction counts as low-confidence
+                (default INTENT_MODEL_THRESHOLD; only affects the counters)
+        
+        Returns:
+            list: (intent, confidence) per text; (None, 0.0) when the text has
+                no known n-gram
+        """
+        threshold = config.INTENT_MODEL_THRESHOLD if threshold is None else threshold
+        rows = self.vectorize(texts)
+        probs = self.predict_proba(rows)
+        empty = np.diff(rows.indptr) == 0
+        best = probs.argmax(axis=1)
+        
+        results = []
+        for i, k in enumerate(best):
+            self.counters["predictions"] += 1
+            if empty[i]:
+                self.counters["no_features"] += 1
+                results.append((None, 0.0))
+                continue
+            confidence = float(probs[i, k])
+            self.counters["confident" if confidence >= threshold else "low_confidence"] += 1
+            results.append((self.classes[k], confidence))
+        return results
+    
+    def predict(self, text, threshold=None):
+        """
+        Classify one text
+        
+        Returns:
+            tuple: (intent, confidence), (None, 0.0) without known n-grams
+        """
+        return self.predict_batch([text], threshold)[0]
+    
+    def save(self, path):
+        """Write the model as a compressed .npz (no pickled objects)"""
+        np.savez_compressed(
+            path,
+            vocabulary=np.asarray(self.vocabulary, dtype=str),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+            classes=np.asarray(self.classes, dtype=str),
+            temperature=np.float32(self.temperature),
+        )
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["vocabulary"].tolist(),
+                data["idf"],
+                data["weights"],
+                data["bias"],
+                data["classes"].tolist(),
+                float(data["temperature"]),
+            )
+    
+    def stats(self):
+        """Model size and how often its predictions were confident enough to use"""
+        decided = self.counters["confident"] + self.counters["low_confidence"]
+        return {
+            "classes": self.classes,
+            "vocabulary": len(self.vocabulary),
+            "temperature": round(self.temperature, 3),
+            "threshold": config.INTENT_MODEL_THRESHOLD,
+            **self.counters,
+            "confident_rate": round(self.counters["confident"] / decided, 4) if decided else 0.0,
+        }
+
+
+def fit_vocabulary(texts, min_df=2, max_features=20000):
+    """
+    Pick n-grams seen in at least min_df texts, most frequent first
+    
+    Returns:
+        tuple: (vocabulary list, idf array)
+    """
+    df = Counter()
+    for text in texts:
+        df.update(set(features(text)))
+    terms = [term for term, count in df.most_common() if count >= min_df][:max_features]
+    n = len(texts)
+    idf = np.array([math.log((1 + n) / (1 + df[term])) + 1.0 for term in terms], dtype=np.float32)
+    return terms, idf
+
+
+def fit_temperature(logits, targets):
+    """Temperature minimizing the negative log-likelihood of held-out predictions"""
+    best_t, best_nll = 1.0, float("inf")
+    for t in np.exp(np.linspace(math.log(0.05), math.log(20.0), 121)):
+        probs = softmax(logits / t)
+        nll = -np.mean(np.log(probs[np.arange(len(targets)), targets] + 1e-12))
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def expected_calibration_error(probs, targets, bins=10):
+    """Gap between confidence and accuracy, averaged over confidence bins"""
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == targets
+    ece = 0.0
+    for low in np.linspace(0, 1, bins, endpoint=False):
+        in_bin = (confidence > low) & (confidence <= low + 1 / bins)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    return float(ece)
+
+
+def train(texts, labels, min_df=2, max_features=20000, l2=1e-4, epochs=300, learning_rate=0.5,
+          validation_split=0.2, threshold=None, seed=0):
+    """
+    Train and calibrate an intent model
+    
+    Full-batch softmax regression with Adam and L2 regularization. A
+    held-out split fits the softmax temperature and measures accuracy,
+    calibration error and how much traffic clears the confidence threshold.
+    
+    Args:
+        texts: Training texts (caller side of each call)
+        labels: Intent of each text
+        min_df: Drop n-grams seen in fewer texts
+        max_features: Vocabulary size cap
+        l2: Weight decay
+        epochs: Gradient steps
+        learning_rate: Adam step size
+        validation_split: Fraction held out for calibration and metrics
+        threshold: Confidence threshold to report coverage for (default INTENT_MODEL_THRESHOLD)
+        seed: Shuffle seed
+    
+    Returns:
+        tuple: (IntentModel, metrics dict)
+    """
+    threshold = config.INTENT_MODEL_THRESHOLD if threshold is None else threshold
+    classes = sorted(set(labels))
+    if len(classes) < 2:
+        raise ValueError(f"Need at least two intents to train, got {classes}")
+    
+    vocabulary, idf = fit_vocabulary(texts, min_df, max_features)
+    if not vocabulary:
+        raise ValueError("No n-gram occurs often enough to train on; lower min_df or add data")
+    
+    model = IntentModel(vocabulary, idf, np.zeros((len(vocabulary), len(classes))), np.zeros(len(classes)), classes)
+    rows = model.vectorize(texts)
+    targets = np.array([classes.index(label) for label in labels])
+    
+    # Texts with no vocabulary n-gram carry no signal
+    usable = np.flatnonzero(np.diff(rows.indptr) > 0)
+    order = np.random.default_rng(seed).permutation(usable)
+    n_val = int(len(order) * validation_split) if len(order) >= 20 else 0
+    val_ids, train_ids = order[:n_val], order[n_val:]
+    train_rows, train_targets = rows.take(train_ids), targets[train_ids]
+    
+    onehot = np.eye(len(classes), dtype=np.float32)[train_targets]
+    weights = np.zeros((len(vocabulary), len(classes)), dtype=np.float32)
+    bias = np.zeros(len(classes), dtype=np.float32)
+    params = [weights, bias]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    beta1, beta2 = 0.9, 0.999
+    
+    for step in range(1, epochs + 1):
+        probs = softmax(train_rows.dot(weights) + bias)
+        error = (probs - onehot) / len(train_targets)
+        grads = [train_rows.tdot(error).astype(np.float32) + l2 * weights, error.sum(axis=0)]
+        for param, grad, (m, v) in zip(params, grads, moments):
+            m *= beta1
+            m += (1 - beta1) * grad
+            v *= beta2
+            v += (1 - beta2) * grad * grad
+            param -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + 1e-8)
+    
+    model.weights, model.bias = weights, bias
+    train_loss = float(-np.mean(np.log(softmax(train_rows.dot(weights) + bias)[np.arange(len(train_targets)), train_targets] + 1e-12)))
+    metrics = {
+        "examples": len(texts),
+        "usable": len(usable),
+        "train": len(train_ids),
+        "validation": len(val_ids),
+        "classes": {name: int((targets[usable] == k).sum()) for k, name in enumerate(classes)},
+        "vocabulary": len(vocabulary),
+        "train_loss": round(train_loss, 4),
+    }
+    
+    if len(val_ids):
+        val_rows, val_targets = rows.take(val_ids), targets[val_ids]
+        logits = val_rows.dot(weights) + bias
+        raw = softmax(logits)
+        model.temperature = fit_temperature(logits, val_targets)
+        calibrated = model.predict_proba(val_rows)
+        confident = calibrated.max(axis=1) >= threshold
+        correct = calibrated.argmax(axis=1) == val_targets
+        metrics.update({
+            "temperature": round(model.temperature, 3),
+            "val_accuracy": round(float(correct.mean()), 4),
+            "ece_before": round(expected_calibration_error(raw, val_targets), 4),
+            "ece_after": round(expected_calibration_error(calibrated, val_targets), 4),
+            "threshold": threshold,
+            "coverage": round(float(confident.mean()), 4),
+            "accuracy_above_threshold": round(float(correct[confident].mean()), 4) if confident.any() else 0.0,
+        })
+    
+    return model, metrics
+
+
+def get_intent_model():
+    """
+    Get the process-wide trained intent model
+    
+    Returns:
+        IntentModel: Or None if INTENT_MODEL_PATH doesn't exist or can't be read
+    """
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            path = config.INTENT_MODEL_PATH
+            if path.exists():
+                try:
+                    _model = IntentModel.load(path)
+                    logger.info(f"Intent model loaded: {len(_model.classes)} intents, {len(_model.vocabulary)} n-grams")
+                except Exception as e:
+                    logger.error(f"Could not load intent model {path}: {e}")
+        return _model
+
+
+def intent_model_stats():
+    """Get statistics of this process's intent model, if one is loaded"""
+    return _model.stats() if _model is not None else {}
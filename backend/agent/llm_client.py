@@ -0,0 +1,173 @@
+"""Async streaming client for the LLM server (Ollama chat API)"""
+import asyncio
+import json
+import threading
+import time
+from loguru import logger
+import config
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logger.warning("httpx not available, LLM responses disabled")
+
+
+class LLMError(RuntimeError):
+    """Raised when the LLM server fails, returns an error or times out"""
+
+
+class LLMClient:
+    """
+    Streams chat completions from LLM_API_URL over a persistent connection pool
+    
+    Tokens are yielded as the server produces them instead of after the whole
+    reply, and nothing blocks the event loop. Each event loop gets its own
+    pooled httpx client (connections belong to the loop that opened them),
+    so the model registry's warm-up loop and the AGI server's loop never
+    share sockets.
+    
+    Cancelling the consuming task (e.g. when the caller hangs up) closes the
+    response, which drops the connection and makes the server stop
+    generating.
+    """
+    
+    def __init__(self, base_url=None, model=None):
+        self.base_url = (base_url or config.LLM_API_URL).rstrip("/")
+        self.model = model or config.LLM_MODEL
+        self._clients = {}  # event loop -> httpx.AsyncClient
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "completed": 0, "cancelled": 0, "timeouts": 0, "errors": 0}
+        self._first_token_ms = []
+    
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                # Forget clients of loops that have since closed
+                self._clients = {l: c for l, c in self._clients.items() if not l.is_closed()}
+                client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(
+                        config.LLM_READ_TIMEOUT,  # max gap between streamed chunks
+                        connect=config.LLM_CONNECT_TIMEOUT,
+                        pool=config.LLM_CONNECT_TIMEOUT,
+                    ),
+                    limits=httpx.Limits(
+                        max_connections=config.LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+                        keepalive_expiry=config.LLM_KEEPALIVE_SECONDS,
+                    ),
+                )
+                self._clients[loop] = client
+            return client
+    
+    async def stream_chat(self, messages, options=None, timeout=None):
+        """
+        Stream a chat completion token by token
+        
+        Args:
+            messages: Chat messages ({"role", "content"} dicts)
+            options: Sampling options passed to the server (temperature, num_predict, ...)
+            timeout: Overall deadline in seconds (default LLM_REQUEST_TIMEOUT)
+        
+        Yields:
+            str: Generated text as it arrives
+        
+        Raises:
+            LLMError: Connection failure, server error or timeout
+        """
+        payload = {"model": self.model, "messages": messages, "stream": True, "options": options or {}}
+        self.counters["requests"] += 1
+        started = time.perf_counter()
+        first = True
+        
+        # Checked between chunks: the read timeout bounds each gap, and a
+        # context-manager timeout can't span yields without cancelling the consumer
+        deadline = started + (timeout or config.LLM_REQUEST_TIMEOUT)
+        
+        try:
+            async with self._client().stream("POST", "/api/chat", json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode(errors="replace")
+                    raise LLMError(f"LLM server returned {response.status_code}: {body[:200]}")
+                
+                async for line in response.aiter_lines():
+                    if time.perf_counter() > deadline:
+                        raise TimeoutError
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise LLMError(chunk["error"])
+                    
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        if first:
+                            self._first_token_ms.append((time.perf_counter() - started) * 1000)
+                            self._first_token_ms = self._first_token_ms[-200:]
+                            first = False
+                        yield content
+                    # No break on "done": reading to the end of the body lets
+                    # the connection go back to the pool instead of being dropped
+            
+            self.counters["completed"] += 1
+        
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            raise
+        except (TimeoutError, httpx.TimeoutException) as e:
+            self.counters["timeouts"] += 1
+            raise LLMError(f"LLM request timed out after {time.perf_counter() - started:.1f}s") from e
+        except LLMError:
+            self.counters["errors"] += 1
+            raise
+        except (httpx.HTTPError, ValueError) as e:
+            self.counters["errors"] += 1
+            raise LLMError(f"LLM request failed: {e}") from e
+    
+    async def chat(self, messages, options=None, timeout=None):
+        """
+        Full (non-incremental) chat completion
+        
+        Returns:
+            str: The generated reply
+        """
+        parts = []
+        async for token in self.stream_chat(messages, options, timeout):
+            parts.append(token)
+        return "".join(parts).strip()
+    
+    async def aclose(self):
+        """Close the connection pool of the current event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+    
+    def stats(self):
+        """Request counters and time to first token"""
+        first_token = sorted(self._first_token_ms)
+        return {
+            "url": self.base_url,
+            "model": self.model,
+            **self.counters,
+            "first_token_ms_avg": round(sum(first_token) / len(first_token), 1) if first_token else 0.0,
+            "first_token_ms_p95": round(first_token[min(len(first_token) - 1, int(len(first_token) * 0.95))], 1) if first_token else 0.0,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Get the process-wide LLM client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
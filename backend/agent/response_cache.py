@@ -0,0 +1,193 @@
+"""Cache of LLM replies to generic, customer-independent questions"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+import config
+
+# Dropped before comparing token sets, so phrasing differences don't matter
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "do", "does", "can", "could", "would",
+    "will", "i", "me", "my", "you", "your", "we", "our", "it", "to", "of", "for",
+    "on", "in", "at", "please", "um", "uh", "hi", "hello", "hey", "so", "just",
+    "like", "tell", "know", "want", "wanted", "need", "and", "or",
+}
+
+NON_WORD = re.compile(r"[^a-z0-9' ]+")
+
+
+def normalize(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return " ".join(NON_WORD.sub(" ", text.lower()).split())
+
+
+def token_set(normalized):
+    """Content words of a normalized input"""
+    return frozenset(word for word in normalized.split() if word not in STOPWORDS)
+
+
+def prompt_version(system_prompt, options=None, history=()):
+    """
+    Short hash of everything besides the user's words that shapes a reply
+    
+    The system prompt (company, knowledge base, intent and state context),
+    model and sampling options, and the conversation history sent along with
+    the turn, so a context-dependent "yes" or "repeat that" is only reused
+    after the same exchange; editing any of them invalidates old replies.
+    """
+    turns = [[message["role"], message["content"]] for message in history]
+    material = json.dumps([system_prompt, config.LLM_MODEL, options or {}, turns], sort_keys=True)
+    return hashlib.md5(material.encode()).hexdigest()[:12]
+
+
+class ResponseCache:
+    """
+    TTL- and size-bounded LRU of LLM replies
+    
+    Entries are keyed on (normalized input, intent, prompt version). When a
+    similarity threshold is set, a miss falls back to the closest entry with
+    the same intent and prompt version whose content-word set overlaps the
+    input by at least that Jaccard score.
+    """
+    
+    def __init__(self, max_entries=None, ttl=None, similarity=None):
+        self.max_entries = max_entries or config.LLM_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else config.LLM_CACHE_TTL
+        self.similarity = similarity if similarity is not None else config.LLM_CACHE_SIMILARITY
+        
+        self.entries = OrderedDict()  # key -> {"response", "tokens", "llm_ms", "created", "hits"}
+        self.buckets = {}  # (intent, version) -> set of keys, for near-duplicate search
+        self.counters = {"hits": 0, "near_hits": 0, "misses": 0, "skipped": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self.saved_ms = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self, text, intent, version):
+        """
+        Look up a reply
+        
+        Args:
+            text: User input
+            intent: Classified intent
+            version: prompt_version() of the prompt the reply would be generated from
+        
+        Returns:
+            str: Cached reply, or None on a miss
+        """
+        normalized = normalize(text)
+        key = (normalized, intent, version)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self.counters["hits"] += 1
+            elif self.similarity > 0:
+                entry = self._nearest(token_set(normalized), intent, version, now)
+                if entry is not None:
+                    self.counters["near_hits"] += 1
+            
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            
+            entry["hits"] += 1
+            self.saved_ms += entry["llm_ms"]
+            return entry["response"]
+    
+    def put(self, text, intent, version, response, llm_ms):
+        """
+        Store a generated reply
+        
+        Args:
+            llm_ms: Generation time the reply cost, credited as saved on each hit
+        """
+        normalized = normalize(text)
+        key = (normalized, intent, version)
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = {
+                "response": response,
+                "tokens": token_set(normalized),
+                "llm_ms": llm_ms,
+                "created": time.monotonic(),
+                "hits": 0,
+            }
+            self.buckets.setdefault((intent, version), set()).add(key)
+            self.counters["stores"] += 1
+            
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.counters["evictions"] += 1
+    
+    def skip(self):
+        """Count a turn that could not use the cache (customer data in the prompt)"""
+        with self._lock:
+            self.counters["skipped"] += 1
+    
+    def _live(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if now - entry["created"] > self.ttl:
+            self._drop(key)
+            self.counters["expired"] += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+    
+    def _nearest(self, tokens, intent, version, now):
+        if not tokens:
+            return None
+        
+        best_key, best_score = None, self.similarity
+        for key in list(self.buckets.get((intent, version), ())):
+            other = self.entries[key]["tokens"]
+            score = len(tokens & other) / len(tokens | other) if other else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        
+        return self._live(best_key, now) if best_key is not None else None
+    
+    def _drop(self, key):
+        self.entries.pop(key)
+        bucket = self.buckets.get(key[1:])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[key[1:]]
+    
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.buckets.clear()
+    
+    def stats(self):
+        """Hit rate, LLM time saved and eviction counters"""
+        with self._lock:
+            served = self.counters["hits"] + self.counters["near_hits"]
+            lookups = served + self.counters["misses"]
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "similarity": self.similarity,
+                **self.counters,
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+                "saved_llm_ms": round(self.saved_ms, 1),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Get the process-wide response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
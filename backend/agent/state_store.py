@@ -0,0 +1,168 @@
+"""Bounded store of per-call conversation state"""
+import threading
+import time
+from collections import OrderedDict
+from loguru import logger
+import config
+
+
+class CallState:
+    """
+    What the agent remembers about one call between turns
+    
+    Slotted so a live session costs a few hundred bytes instead of a dict
+    per call plus one per nested field.
+    """
+    
+    __slots__ = (
+        "intent",
+        "customer_id",
+        "customer",
+        "lookups",
+        "verified",
+        "awaiting_customer_id",
+        "ticket_created",
+        "retry_count",
+        "conversation_turns",
+        "last_seen",
+    )
+    
+    def __init__(self, intent):
+        self.intent = intent
+        self.customer_id = None
+        self.customer = None  # Customer row loaded at verification, reused for the rest of the call
+        self.lookups = {}  # candidate ID -> Customer or None, cleared every turn
+        self.verified = False
+        self.awaiting_customer_id = False
+        self.ticket_created = False
+        self.retry_count = 0
+        self.conversation_turns = 0
+        self.last_seen = time.monotonic()
+    
+    def verify(self, customer_id, customer):
+        """Mark the caller as the given customer"""
+        self.customer_id = customer_id
+        self.customer = customer
+        self.verified = True
+        self.awaiting_customer_id = False
+
+
+class ConversationStateStore:
+    """
+    call_id -> CallState, released at hangup and bounded otherwise
+    
+    Entries are kept in last-access order, so calls idle for longer than
+    the TTL sit at the front and are swept from there on each new session
+    (cost proportional to what expires). Past the cap the least recently
+    active session is evicted. Calls whose hangup is never reported (a
+    crashed handler, a closed browser tab) can therefore not accumulate.
+    """
+    
+    def __init__(self, ttl=None, max_sessions=None):
+        self.ttl = ttl if ttl is not None else config.CONVERSATION_STATE_TTL
+        self.max_sessions = max_sessions or config.CONVERSATION_STATE_MAX
+        
+        self.sessions = OrderedDict()
+        self.peak = 0
+        self.counters = {"created": 0, "released": 0, "expired": 0, "evicted": 0}
+        self._lock = threading.Lock()
+    
+    def get_or_create(self, call_id, intent):
+        """
+        State of a call, starting a new session on its first turn
+        
+        Args:
+            call_id: Call identifier
+            intent: Intent of the first turn, stored on a new session
+        
+        Returns:
+            tuple: (CallState, created)
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._touch(call_id, now)
+            if state is not None:
+                return state, False
+            
+            self._sweep(now)
+            state = CallState(intent)
+            self.sessions[call_id] = state
+            self.counters["created"] += 1
+            
+            while len(self.sessions) > self.max_sessions:
+                evicted, _ = self.sessions.popitem(last=False)
+                self.counters["evicted"] += 1
+                logger.warning(f"[Call {evicted}] Conversation state evicted, {self.max_sessions} sessions live")
+            
+            self.peak = max(self.peak, len(self.sessions))
+            return state, True
+    
+    def get(self, call_id):
+        """
+        State of a live call
+        
+        Returns:
+            CallState: Or None if the call has no (unexpired) session
+        """
+        with self._lock:
+            return self._touch(call_id, time.monotonic())
+    
+    def release(self, call_id):
+        """
+        Drop a call's state when it ends
+        
+        Returns:
+            bool: Whether the call had a session
+        """
+        with self._lock:
+            if self.sessions.pop(call_id, None) is None:
+                return False
+            self.counters["released"] += 1
+            return True
+    
+    def _touch(self, call_id, now):
+        state = self.sessions.get(call_id)
+        if state is None:
+            return None
+        if now - state.last_seen > self.ttl:
+            del self.sessions[call_id]
+            self.counters["expired"] += 1
+            return None
+        state.last_seen = now
+        self.sessions.move_to_end(call_id)
+        return state
+    
+    def _sweep(self, now):
+        while self.sessions:
+            call_id, state = next(iter(self.sessions.items()))
+            if now - state.last_seen <= self.ttl:
+                break
+            del self.sessions[call_id]
+            self.counters["expired"] += 1
+    
+    def __len__(self):
+        return len(self.sessions)
+    
+    def stats(self):
+        """Live sessions gauge and how sessions ended"""
+        with self._lock:
+            return {
+                "live": len(self.sessions),
+                "peak": self.peak,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl,
+                **self.counters,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store():
+    """Get the process-wide conversation state store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStateStore()
+        return _store
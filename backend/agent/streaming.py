@@ -0,0 +1,70 @@
+"""Sentence segmentation for streaming LLM output into TTS"""
+import re
+
+# Sentence end: terminal punctuation (optionally closed by a quote/bracket) then whitespace
+SENTENCE_END = re.compile(r'([.!?]+["\')\]]*)\s+')
+
+# Tokens ending in a period that don't end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "no", "approx", "jr", "sr"}
+
+
+def split_sentences(text):
+    """
+    Split finished text into sentences
+    
+    Args:
+        text: Full response text
+        
+    Returns:
+        list: Non-empty sentences in order
+    """
+    buffer = SentenceBuffer()
+    sentences = buffer.feed(text)
+    tail = buffer.flush()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+class SentenceBuffer:
+    """Accumulates streamed tokens and releases whole sentences as soon as they end"""
+    
+    def __init__(self, min_chars=2):
+        self.min_chars = min_chars
+        self.buffer = ""
+    
+    def feed(self, chunk):
+        """
+        Add streamed text
+        
+        Args:
+            chunk: Next piece of generated text
+            
+        Returns:
+            list: Sentences completed by this chunk
+        """
+        self.buffer += chunk
+        sentences = []
+        start = 0
+        
+        for match in SENTENCE_END.finditer(self.buffer):
+            end = match.end(1)
+            candidate = self.buffer[start:end].strip()
+            last_word = candidate.rsplit(None, 1)[-1].rstrip('.!?"\')]').lower() if candidate else ""
+            
+            if match.group(1).startswith('.') and last_word in ABBREVIATIONS:
+                continue
+            if len(candidate) < self.min_chars:
+                continue
+            
+            sentences.append(candidate)
+            start = match.end()
+        
+        self.buffer = self.buffer[start:]
+        return sentences
+    
+    def flush(self):
+        """Return whatever is left once generation has finished"""
+        tail = self.buffer.strip()
+        self.buffer = ""
+        return tail
@@ -0,0 +1,184 @@
+"""Fixed response templates, enumerable so their audio can be pre-rendered"""
+import random
+import re
+import config
+
+# A slot is {name} or {name:format}; a leading "$" or "#" is spoken with the value
+SLOT = re.compile(r"[$#]?\{(\w+)(?::[^}]*)?\}")
+
+COMPANY = config.COMPANY_NAME
+
+TEMPLATES = {
+    # Call flow
+    "greeting": [
+        f"Hello! Thanks for calling {COMPANY}. I'm your AI assistant. How can I help you today?",
+        f"Hi there! Welcome to {COMPANY}. What brings you here today?",
+        f"Good day! I'm here to assist you with {COMPANY}. What can I do for you?",
+        f"Hello! I'm your virtual assistant at {COMPANY}. How may I help you?",
+        f"Hi! Thanks for reaching out to {COMPANY}. What can I assist you with?",
+    ],
+    "greeting_reply": [
+        "Hello! I'm here to help. What can I assist you with today?",
+        "Hi there! How can I help you?",
+        "Good day! What brings you here today?",
+        "Hello! What can I do for you?",
+        "Hi! How may I assist you today?",
+    ],
+    "farewell": [
+        f"Thank you for calling {COMPANY}. Have a wonderful day!",
+        "It was my pleasure helping you. Take care!",
+        f"Thanks for reaching out to {COMPANY}. Feel free to call anytime. Goodbye!",
+        "Great talking with you! Have an excellent day!",
+        "Thank you! Don't hesitate to call back if you need anything. Bye!",
+    ],
+    "call_end": ["Thank you for calling. Goodbye!"],
+    "call_transfer": ["I'm sorry, I'm having trouble understanding. Let me transfer you to an agent."],
+    
+    # Errors
+    "error_retry": [
+        "I apologize, could you please repeat that?",
+        "Sorry, I didn't quite catch that. Could you say it again?",
+        "Pardon me, could you rephrase that?",
+        "I'm having trouble understanding. Could you try again?",
+    ],
+    "error_escalate": ["I'm having difficulty understanding. Let me connect you with a specialist who can better assist you."],
+    "error_generic": ["I apologize, I'm having trouble processing your request. Could you please try again?"],
+    "llm_fallback": ["I'm here to help! Could you tell me more about what you need?"],
+    "llm_error": ["I apologize, I'm having trouble right now. Could you please repeat that?"],
+    
+    # Billing
+    "billing_ask_id": [
+        "I'd be happy to help with your billing. Can you provide your customer ID?",
+        "Sure! To check your bill, I'll need your customer ID. What is it?",
+        "Let me pull up your billing. What's your customer ID?",
+    ],
+    "billing_verified": [
+        "Perfect! I found your account, {name}. Your current balance is ${balance:.2f} on the {plan} plan. Would you like to make a payment?",
+        "Thanks, {name}! Your balance is ${balance:.2f} and you're on our {plan} plan. Need help with anything else?",
+        "Got it! {name}, you have a balance of ${balance:.2f} on the {plan} plan. What would you like to do?",
+    ],
+    "billing_balance": [
+        "{name}, your balance is ${balance:.2f} on the {plan} plan. Need anything else?",
+        "Your current balance is ${balance:.2f}, {name}. You're on our {plan} plan. Would you like to make a payment?",
+        "I see your balance is ${balance:.2f} for the {plan} plan. How can I help with that?",
+    ],
+    "billing_id_not_found": ["I couldn't find customer ID {customer_id} in our system. Could you double-check that number?"],
+    "billing_id_missing": ["I didn't catch your customer ID. Could you say it again, please?"],
+    "billing_lookup_failed": ["I'm having trouble accessing your account. Could you provide your customer ID again?"],
+    
+    # Technical support
+    "support_ask_id": [
+        "I'm sorry you're having issues. Let me help. What's your customer ID?",
+        "I'll get that fixed for you. First, can you give me your customer ID?",
+        "Let me assist with that. What's your customer ID?",
+    ],
+    "support_verified": [
+        "Thanks, {name}. I'm sorry you're having trouble. Can you describe the issue?",
+        "Got it, {name}. Tell me more about what's happening.",
+        "Okay {name}, I'm here to help. What's the problem you're experiencing?",
+    ],
+    "support_ticket_created": [
+        "I've created support ticket #{ticket_id} for you, {name}. Our tech team will contact you within 24 hours. Anything else I can help with?",
+        "Done! Ticket #{ticket_id} is created. You'll hear from our technicians within a day. Need anything else?",
+        "All set, {name}! Ticket #{ticket_id} is in the system. Our team will reach out within 24 hours. What else can I do for you?",
+    ],
+    "support_ticket_exists": ["Your support ticket is already created. Our team will contact you soon. Anything else?"],
+    "support_id_not_found": ["I couldn't find customer ID {customer_id}. Could you verify that number?"],
+    "support_id_missing": ["I need your customer ID to help. What is it?"],
+    "support_lookup_failed": ["I'm having trouble accessing your account. Customer ID again?"],
+    
+    # Account info
+    "account_ask_id": ["I can help with your account info. What's your customer ID?"],
+    "account_verified": [
+        "Here's your info, {name}: Phone {phone}, {plan} plan, status is {status}. What else?",
+        "Got it! {name}, you're on the {plan} plan, status {status}. Phone on file is {phone}. Need anything else?",
+        "{name}, your account shows: {plan} plan, {status} status, phone {phone}. What would you like to know?",
+    ],
+    "account_summary": [
+        "{name}, you're on the {plan} plan with {status} status. Anything else?",
+        "Your account shows {plan} plan, status is {status}. What else can I help with?",
+        "Account status: {status}, plan: {plan}. Need anything else, {name}?",
+    ],
+    "account_id_not_found": ["Customer ID {customer_id} not found. Can you check that number?"],
+    "account_id_missing": ["I need your customer ID. What is it?"],
+    "account_lookup_failed": ["Having trouble with your account. Customer ID again?"],
+    
+    # New service
+    "new_service": [
+        "I'd love to help you with a new service! Let me transfer you to our sales team who can discuss plans and pricing.",
+        "Great! Our sales team can help you with that. Let me connect you now.",
+        "Perfect timing! I'll transfer you to sales to explore our service options.",
+    ],
+}
+
+
+class TemplateResponse(str):
+    """
+    A rendered template that still knows its template and slot values
+    
+    Behaves like the plain response string everywhere; the AGI player uses
+    segments() to play pre-rendered static audio around the dynamic values.
+    """
+    
+    def __new__(cls, template, values=None):
+        values = values or {}
+        response = super().__new__(cls, template.format(**values))
+        response.template = template
+        response.values = values
+        return response
+    
+    def segments(self):
+        """Speakable pieces in order, see split_template()"""
+        return split_template(self.template, self.values)
+
+
+def split_template(template, values=None):
+    """
+    Split a template into static text and slot fragments
+    
+    Static pieces are trimmed and pure punctuation is dropped, since each
+    piece is synthesized (and played) on its own.
+    
+    Args:
+        template: Template string with {slot} placeholders
+        values: Slot values; if None only the static pieces are returned
+    
+    Returns:
+        list: (text, is_static) tuples in speaking order
+    """
+    pieces = []
+    
+    def add_static(text):
+        text = text.lstrip(" ,;:.!?").rstrip(" ,;:")
+        if any(ch.isalnum() for ch in text):
+            pieces.append((text, True))
+    
+    position = 0
+    for match in SLOT.finditer(template):
+        add_static(template[position:match.start()])
+        if values is not None:
+            pieces.append((match.group(0).format(**values), False))
+        position = match.end()
+    add_static(template[position:])
+    
+    return pieces
+
+
+def render(key, **values):
+    """Pick a random variant of a template and fill its slots"""
+    return TemplateResponse(random.choice(TEMPLATES[key]), values)
+
+
+def static_texts():
+    """
+    Every static piece of audio the templates can produce
+    
+    Returns:
+        list: Unique texts, in template order
+    """
+    texts = {}
+    for variants in TEMPLATES.values():
+        for template in variants:
+            for text, _ in split_template(template):
+                texts[text] = True
+    return list(texts)
@@ -1,11 +1,18 @@
 import asyncio
+import os
+import re
 import socket
 from loguru import logger
-from asr.whisper_engine import WhisperASR
-from tts.tts_engine import PiperTTS
-from agent.agent import AIAgent
+from asr.endpointing import CallerAudioStream, upsample_to_16k
+from asr.service import create_asr_service
+from agent.templates import TemplateResponse, render
+from tts.prerender import prerender, prerender_texts
 from db.database import SessionLocal
 from db.models import Call
+from runtime.executor import get_pool
+from runtime.tracing import start_trace, save_trace, set_turn, span
+from runtime.admission import get_admission_controller, ADMIT, QUEUE
+from runtime.registry import get_model_registry
 import config
 import numpy as np
 from datetime import datetime
@@ -13,73 +20,273 @@ from datetime import datetime
 class AGIServer:
     """AGI Server to handle Asterisk calls"""
     
+    # Fixed system prompts, synthesized once at startup
+    PROMPTS = {
+        "hold": config.HOLD_PROMPT,
+        "callback": config.CALLBACK_PROMPT,
+        "dtmf": config.DTMF_PROMPT,
+    }
+    
     def __init__(self, host="0.0.0.0", port=4573):
         self.host = host
         self.port = port
-        self.asr = WhisperASR()
-        self.tts = PiperTTS()
-        self.agent = AIAgent()
-        
-    async def start(self):
-        """Start the AGI server"""
-        server = await asyncio.start_server(
-            self.handle_call,
-            self.host,
-            self.port
-        )
+        self.models = get_model_registry()
+        self.asr = None
+        self.tts = None
+        self.agent = None
+        self.asr_pool = get_pool("asr")
+        self.db_pool = get_pool("db")
+        self.asr_service = None
+        self.admission = get_admission_controller()
+        self.prompt_files = {}
+        self.prerender_task = None
+    
+    async def load_models(self):
+        """Wait for the shared registry to load and warm ASR, TTS and the agent"""
+        if not await self.models.wait_ready():
+            raise RuntimeError(f"Models failed to load: {self.models.status()['models']}")
+        
+        self.asr = self.models.get("asr")
+        self.tts = self.models.get("tts")
+        self.agent = self.models.get("agent")
+        if self.asr_service is None:
+            self.asr_service = create_asr_service(self.asr, self.asr_pool)
+    
+    async def start(self, sock=None, relay_sock=None):
+        """
+        Start the AGI server
+        
+        Args:
+            sock: Optional already-bound listening socket (pre-fork workers)
+            relay_sock: Optional already-bound EAGI relay socket (pre-fork workers)
+        """
+        # Only start accepting calls once the models are hot
+        await self.load_models()
+        await self.prepare_prompts()
+        
+        # Fill the TTS cache with the agent's fixed responses in the background
+        if config.TTS_PRERENDER:
+            self.prerender_task = asyncio.create_task(self.prerender_responses())
+        
+        if sock is not None:
+            server = await asyncio.start_server(self.handle_call, sock=sock)
+        else:
+            server = await asyncio.start_server(
+                self.handle_call,
+                self.host,
+                self.port
+            )
         
         addr = server.sockets[0].getsockname()
         logger.info(f"AGI Server listening on {addr}")
         
-        async with server:
-            await server.serve_forever()
+        servers = [server]
+        if relay_sock is not None:
+            servers.append(await asyncio.start_server(self.handle_relay, sock=relay_sock))
+        elif config.EAGI_RELAY_PORT:
+            servers.append(await asyncio.start_server(self.handle_relay, self.host, config.EAGI_RELAY_PORT))
+        if len(servers) > 1:
+            logger.info(f"EAGI relay listening on {servers[1].sockets[0].getsockname()}")
+        
+        await asyncio.gather(*(s.serve_forever() for s in servers))
+    
+    async def handle_relay(self, reader, writer):
+        """
+        Handle an EAGI call relayed by eagi.py from the Asterisk host
+        
+        The relay multiplexes the AGI channel and the fd 3 caller audio onto
+        one connection as frames of kind (1 byte: A = AGI, U = audio), length
+        (4 bytes, big-endian) and payload. AGI responses go back unframed.
+        The call then runs exactly like a FastAGI call with streaming ASR,
+        on this process's already-loaded models.
+        """
+        agi_reader = asyncio.StreamReader()
+        audio_reader = asyncio.StreamReader()
+        
+        async def demux():
+            try:
+                while True:
+                    header = await reader.readexactly(5)
+                    payload = await reader.readexactly(int.from_bytes(header[1:], "big"))
+                    (agi_reader if header[:1] == b"A" else audio_reader).feed_data(payload)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                # Relay gone = caller hung up
+                agi_reader.feed_eof()
+                audio_reader.feed_eof()
+        
+        demux_task = asyncio.create_task(demux())
+        audio = CallerAudioStream(audio_reader, sample_rate=config.EAGI_SAMPLE_RATE)
+        try:
+            await self.handle_call(agi_reader, writer, audio=audio)
+        finally:
+            demux_task.cancel()
+            await asyncio.gather(demux_task, return_exceptions=True)
     
-    async def handle_call(self, reader, writer):
-        """Handle incoming AGI call"""
+    async def handle_call(self, reader, writer, audio=None):
+        """
+        Handle incoming AGI call
+        
+        Args:
+            reader, writer: AGI command channel
+            audio: Optional CallerAudioStream (EAGI mode) for streaming ASR
+        """
         call_start = datetime.now()
         call_id = None
+        trace = None
+        admitted = False
+        status = 'completed'
         
         try:
+            if audio is not None:
+                audio.start()
+            
             # Read AGI environment variables
             agi_env = await self.read_agi_env(reader)
             logger.info(f"New call from {agi_env.get('agi_callerid', 'Unknown')}")
             
             # Create call record
-            db = SessionLocal()
-            call = Call(
-                caller_number=agi_env.get('agi_callerid', 'Unknown'),
-                start_time=call_start,
-                status='in_progress'
+            call_id = await self.db_pool.run(
+                self.create_call_record,
+                agi_env.get('agi_callerid', 'Unknown'),
+                call_start
             )
-            db.add(call)
-            db.commit()
-            call_id = call.id
-            db.close()
+            trace = start_trace(call_id)
+            
+            # Decide whether we can serve this caller now
+            decision = self.admission.try_admit()
             
             # Answer the call
             await self.agi_command(writer, reader, "ANSWER")
+            
+            if decision == ADMIT:
+                admitted = True
+            elif decision == QUEUE:
+                admitted = await self.hold_in_queue(writer, reader)
+            
+            if not admitted:
+                # Over capacity: fast cached "please call back" instead of a slow conversation
+                status = 'rejected'
+                await self.play_prompt(writer, reader, "callback")
+                return
+            
             await asyncio.sleep(1)
             
             # Start conversation
-            await self.run_conversation(writer, reader, agi_env, call_id)
-            
+            await self.run_conversation(writer, reader, agi_env, call_id, audio=audio)
+        
         except Exception as e:
             logger.error(f"Error handling call: {e}")
         finally:
+            if admitted:
+                self.admission.release()
+            
+            # Drop the agent's per-call state whichever way the call ended
+            if call_id and self.agent is not None:
+                self.agent.end_call(call_id)
+            
             # Update call record
             if call_id:
-                db = SessionLocal()
-                call = db.query(Call).filter(Call.id == call_id).first()
-                if call:
-                    call.end_time = datetime.now()
-                    call.duration = int((call.end_time - call.start_time).total_seconds())
-                    call.status = 'completed'
-                    db.commit()
-                db.close()
+                try:
+                    await self.db_pool.run(self.complete_call_record, call_id, status)
+                except Exception as e:
+                    logger.error(f"Error completing call record: {e}")
+            
+            if trace is not None:
+                try:
+                    await self.db_pool.run(save_trace, trace)
+                except Exception as e:
+                    logger.error(f"Error saving call trace: {e}")
+            
+            if audio is not None:
+                await audio.close()
             
             writer.close()
             await writer.wait_closed()
     
+    def create_call_record(self, caller_number, start_time):
+        """Create the call row (blocking, runs on the DB pool)"""
+        db = SessionLocal()
+        try:
+            call = Call(
+                caller_number=caller_number,
+                start_time=start_time,
+                status='in_progress'
+            )
+            db.add(call)
+            db.commit()
+            return call.id
+        finally:
+            db.close()
+    
+    def complete_call_record(self, call_id, status='completed'):
+        """Mark the call row finished (blocking, runs on the DB pool)"""
+        db = SessionLocal()
+        try:
+            call = db.query(Call).filter(Call.id == call_id).first()
+            if call:
+                call.end_time = datetime.now()
+                call.duration = int((call.end_time - call.start_time).total_seconds())
+                call.status = status
+                db.commit()
+        finally:
+            db.close()
+    
+    async def hold_in_queue(self, writer, reader):
+        """
+        Play hold audio until the admission queue lets the call through
+        
+        Returns:
+            bool: True if admitted, False on queue timeout or caller hangup
+        """
+        with span("queue"):
+            waiter = asyncio.ensure_future(self.admission.wait())
+            try:
+                while not waiter.done():
+                    response = await self.play_prompt(writer, reader, "hold")
+                    if not response:
+                        # Caller hung up while on hold
+                        waiter.cancel()
+                        if waiter.done() and not waiter.cancelled() and waiter.result():
+                            self.admission.release()
+                        return False
+                
+                return waiter.result()
+            finally:
+                if not waiter.done():
+                    waiter.cancel()
+    
+    async def get_prompt_file(self, name):
+        """Get the audio file of a fixed system prompt, synthesizing it once"""
+        audio_file = self.prompt_files.get(name)
+        # Re-synthesize if the bounded TTS cache evicted it
+        if audio_file is None or not os.path.exists(audio_file):
+            audio_file = await self.tts.synthesize_to_file(self.PROMPTS[name])
+            self.prompt_files[name] = audio_file
+        return audio_file
+    
+    async def play_prompt(self, writer, reader, name):
+        """Play a fixed system prompt from its cached audio"""
+        audio_file = await self.get_prompt_file(name)
+        return await self.play_file(writer, reader, audio_file)
+    
+    async def prepare_prompts(self):
+        """Pre-synthesize the system prompts so overload handling and DTMF never wait on TTS"""
+        for name in self.PROMPTS:
+            try:
+                await self.get_prompt_file(name)
+            except Exception as e:
+                logger.error(f"Error preparing {name} prompt: {e}")
+    
+    async def prerender_responses(self):
+        """Synthesize template segments and knowledge-base answers ahead of the first caller"""
+        try:
+            texts = prerender_texts(self.agent.knowledge_base)
+            return await prerender(self.tts, texts)
+        except Exception as e:
+            logger.error(f"Error pre-rendering responses: {e}")
+    
     async def read_agi_env(self, reader):
         """Read AGI environment variables"""
         env = {}
@@ -107,7 +314,7 @@ class AGIServer:
         logger.debug(f"AGI Command: {command} -> Response: {response}")
         return response
     
-    async def run_conversation(self, writer, reader, agi_env, call_id):
+    async def run_conversation(self, writer, reader, agi_env, call_id, audio=None):
         """Run the AI conversation loop"""
         conversation_history = []
         
@@ -119,80 +326,263 @@ class AGIServer:
         # Conversation loop
         max_turns = 20
         for turn in range(max_turns):
+            set_turn(turn + 1)
             try:
+                user_text = ""
+                
+                # Keypad fast path when the agent is waiting for a customer ID
+                if config.DTMF_CUSTOMER_ID and self.agent.is_awaiting_customer_id(call_id):
+                    user_text = await self.collect_digits(writer, reader)
+                
                 # Listen to user
-                user_text = await self.listen(writer, reader)
+                if not user_text:
+                    user_text = await self.listen(writer, reader, audio=audio)
                 
                 if not user_text or user_text.lower() in ['goodbye', 'bye', 'thank you']:
-                    farewell = "Thank you for calling. Goodbye!"
+                    farewell = render("call_end")
                     await self.speak(writer, reader, farewell)
                     break
                 
                 logger.info(f"User said: {user_text}")
                 conversation_history.append({"role": "user", "content": user_text})
                 
-                # Get AI response
-                response = await self.agent.process_input(
-                    user_text,
-                    conversation_history,
-                    call_id
-                )
-                
-                logger.info(f"AI responds: {response}")
-                conversation_history.append({"role": "assistant", "content": response})
-                
-                # Speak response
-                await self.speak(writer, reader, response)
+                if config.PIPELINED_RESPONSES:
+                    # Synthesize and play each sentence while the rest is generated
+                    response = await self.speak_stream(
+                        writer,
+                        reader,
+                        self.agent.stream_response(user_text, conversation_history, call_id)
+                    )
+                    logger.info(f"AI responded: {response}")
+                    conversation_history.append({"role": "assistant", "content": response})
+                else:
+                    # Get AI response
+                    with span("agent"):
+                        response = await self.agent.process_input(
+                            user_text,
+                            conversation_history,
+                            call_id
+                        )
+                    
+                    logger.info(f"AI responds: {response}")
+                    conversation_history.append({"role": "assistant", "content": response})
+                    
+                    # Speak response
+                    await self.speak(writer, reader, response)
                 
                 # Check if conversation should end
                 if self.agent.should_end_conversation(conversation_history):
                     break
-                    
+            
             except Exception as e:
                 logger.error(f"Error in conversation turn {turn}: {e}")
-                error_msg = "I'm sorry, I'm having trouble understanding. Let me transfer you to an agent."
+                error_msg = render("call_transfer")
                 await self.speak(writer, reader, error_msg)
                 break
         
         # Save transcript
         await self.save_transcript(call_id, conversation_history)
     
-    async def listen(self, writer, reader, timeout=10):
+    async def collect_digits(self, writer, reader):
+        """
+        Offer keypad entry via GET DATA and return the keyed digits
+        
+        Returns:
+            str: Digits entered (no ASR involved), "" if nothing was keyed
+        """
+        try:
+            prompt_file = await self.get_prompt_file("dtmf")
+            cmd = f"GET DATA {os.path.splitext(prompt_file)[0]} {config.DTMF_TIMEOUT_MS} {config.DTMF_MAX_DIGITS}"
+            
+            with span("dtmf"):
+                response = await self.agi_command(writer, reader, cmd)
+            
+            match = re.search(r'result=(\d+)', response)
+            if match:
+                logger.info(f"Customer ID entered on keypad: {match.group(1)}")
+                return match.group(1)
+            
+            return ""
+        
+        except Exception as e:
+            logger.error(f"Error collecting digits: {e}")
+            return ""
+    
+    async def listen(self, writer, reader, timeout=10, audio=None):
         """Record audio and transcribe"""
+        if audio is not None:
+            return await self.listen_stream(writer, reader, audio, timeout)
+        
         try:
             # Record audio file
-            temp_file = f"/tmp/recording_{datetime.now().timestamp()}.wav"
+            temp_base = f"/tmp/recording_{datetime.now().timestamp()}"
+            temp_file = f"{temp_base}.wav"
             
-            # AGI RECORD FILE command
-            cmd = f"RECORD FILE {temp_file} wav # {timeout * 1000} BEEP"
-            response = await self.agi_command(writer, reader, cmd)
+            # AGI RECORD FILE command (Asterisk appends the format extension)
+            cmd = f"RECORD FILE {temp_base} wav # {timeout * 1000} BEEP"
+            with span("record"):
+                response = await self.agi_command(writer, reader, cmd)
             
-            # Transcribe with Whisper
-            text = self.asr.transcribe_file(temp_file)
+            # Transcribe with Whisper on the ASR pool
+            with span("asr"):
+                text = await self.asr_service.transcribe_file(temp_file)
             
             return text
-            
+        
         except Exception as e:
             logger.error(f"Error in listen: {e}")
             return ""
     
+    async def listen_stream(self, writer, reader, audio, timeout=10):
+        """Capture the caller's utterance from the EAGI stream and transcribe it as soon as they stop"""
+        try:
+            await self.agi_command(writer, reader, 'STREAM FILE beep ""')
+            
+            with span("record"):
+                samples = await audio.capture_utterance(timeout)
+            if samples.size == 0:
+                return ""
+            
+            logger.debug(f"Endpointed utterance: {samples.size / audio.sample_rate:.2f}s")
+            
+            # Decode the in-memory utterance with Whisper on the ASR pool
+            with span("asr"):
+                text = await self.asr_service.transcribe(
+                    upsample_to_16k(samples, audio.sample_rate)
+                )
+            
+            return text
+        
+        except Exception as e:
+            logger.error(f"Error in streaming listen: {e}")
+            return ""
+    
+    async def synthesize(self, text):
+        """
+        Get the audio files for a response, in playback order
+        
+        Template responses map to their pre-rendered static segments plus
+        the slot values, which are the only pieces synthesized now.
+        
+        Returns:
+            list: Audio file paths
+        """
+        if isinstance(text, TemplateResponse) and config.TTS_TEMPLATE_SEGMENTS:
+            pieces = [piece for piece, _ in text.segments()]
+        else:
+            pieces = [text]
+        
+        return await asyncio.gather(*(self.tts.synthesize_to_file(piece) for piece in pieces))
+    
     async def speak(self, writer, reader, text):
         """Convert text to speech and play"""
         try:
-            # Generate audio with TTS
-            audio_file = self.tts.synthesize_to_file(text)
+            # Generate audio with TTS on the TTS pool
+            audio_files = await self.synthesize(text)
             
             # Play audio via AGI
-            cmd = f"STREAM FILE {audio_file.replace('.wav', '')} #"
-            await self.agi_command(writer, reader, cmd)
-            
+            for audio_file in audio_files:
+                await self.play_file(writer, reader, audio_file)
+        
         except Exception as e:
             logger.error(f"Error in speak: {e}")
     
+    async def speak_stream(self, writer, reader, sentences):
+        """
+        Play a streamed response sentence by sentence
+        
+        Each sentence is sent to the TTS pool as soon as it arrives, so the
+        next one is being generated and synthesized while the current one
+        plays.
+        
+        Args:
+            sentences: Async iterator of sentences
+        
+        Returns:
+            str: The full text that was spoken
+        """
+        queue = asyncio.Queue(maxsize=config.TTS_PIPELINE_DEPTH)
+        
+        async def produce():
+            try:
+                async for sentence in sentences:
+                    synthesis = asyncio.ensure_future(self.synthesize(sentence))
+                    await queue.put((sentence, synthesis))
+            finally:
+                await queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        spoken = []
+        hung_up = False
+        
+        try:
+            while not hung_up:
+                # Wait for the next sentence, but notice a hangup while the LLM is still thinking
+                getter = asyncio.ensure_future(queue.get())
+                while not getter.done() and not reader.at_eof():
+                    await asyncio.wait({getter}, timeout=config.HANGUP_POLL_INTERVAL)
+                if not getter.done():
+                    getter.cancel()
+                    hung_up = True
+                    break
+                
+                item = getter.result()
+                if item is None:
+                    break
+                
+                sentence, synthesis = item
+                try:
+                    for audio_file in await synthesis:
+                        response = await self.play_file(writer, reader, audio_file)
+                        if self.caller_hung_up(reader, response):
+                            hung_up = True
+                            break
+                    spoken.append(sentence)
+                except Exception as e:
+                    logger.error(f"Error speaking sentence: {e}")
+            
+            if hung_up:
+                # Cancelling the producer closes the LLM stream, so generation stops too
+                logger.info("Caller hung up, cancelling response generation")
+            else:
+                # Surface generation errors only if nothing could be said
+                try:
+                    await producer
+                except Exception as e:
+                    if not spoken:
+                        raise
+                    logger.error(f"Response generation stopped early: {e}")
+        
+        finally:
+            if not producer.done():
+                producer.cancel()
+        
+        return " ".join(spoken)
+    
+    @staticmethod
+    def caller_hung_up(reader, response=None):
+        """True once Asterisk reported a hangup or closed the AGI connection"""
+        if response is not None and (not response or response.startswith("HANGUP")):
+            return True
+        return reader.at_eof()
+    
+    async def play_file(self, writer, reader, audio_file):
+        """Play a synthesized audio file on the channel"""
+        cmd = f"STREAM FILE {os.path.splitext(audio_file)[0]} #"
+        with span("playback"):
+            return await self.agi_command(writer, reader, cmd)
+    
     async def save_transcript(self, call_id, conversation_history):
         """Save conversation transcript to database"""
         try:
-            db = SessionLocal()
+            await self.db_pool.run(self.write_transcript, call_id, conversation_history)
+        except Exception as e:
+            logger.error(f"Error saving transcript: {e}")
+    
+    def write_transcript(self, call_id, conversation_history):
+        """Write transcript and intent to the call row (blocking, runs on the DB pool)"""
+        db = SessionLocal()
+        try:
             call = db.query(Call).filter(Call.id == call_id).first()
             
             if call:
@@ -208,8 +598,5 @@ class AGIServer:
                     call.intent = self.agent.classify_intent(" ".join(user_messages))
                 
                 db.commit()
-            
+        finally:
             db.close()
-            
-        except Exception as e:
-            logger.error(f"Error saving transcript: {e}")
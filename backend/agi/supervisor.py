@@ -0,0 +1,186 @@
+"""Pre-fork supervisor that runs several AGI worker processes on one listening socket"""
+import gc
+import os
+import signal
+import socket
+import time
+import asyncio
+from loguru import logger
+import config
+from runtime import worker_stats
+from runtime.admission import get_admission_controller
+from runtime.registry import get_model_registry
+
+
+class AGISupervisor:
+    """
+    Load models once, then fork AGI workers that share them copy-on-write
+    
+    The parent binds the AGI port and builds the AGIServer (Whisper, TTS,
+    agent) before forking, so every worker inherits both the listening
+    socket and the already-loaded model weights. Crashed workers are
+    restarted; the parent itself never runs calls.
+    
+    Pools, admission, ASR/LLM/TTS counters and sessions live in each
+    worker, so workers publish snapshots (runtime.worker_stats) that the
+    API process serves from its /system endpoints.
+    """
+    
+    def __init__(self, server_factory, host="0.0.0.0", port=4573, workers=2, api_target=None):
+        self.server_factory = server_factory
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.api_target = api_target
+        self.sock = None
+        self.relay_sock = None
+        self.server = None
+        self.children = {}  # pid -> slot name
+        self.started_at = {}  # slot name -> last spawn time
+        self.stopping = False
+        self.slot = None  # set in each child to the slot it runs
+    
+    def bind(self, port=None):
+        """Create a shared listening socket (the AGI port by default)"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, port or self.port))
+        sock.listen(config.AGI_BACKLOG)
+        sock.setblocking(False)
+        sock.set_inheritable(True)
+        return sock
+    
+    def run(self):
+        """Start all workers and supervise them until shutdown"""
+        self.sock = self.bind()
+        if config.EAGI_RELAY_PORT:
+            self.relay_sock = self.bind(config.EAGI_RELAY_PORT)
+        logger.info(f"AGI supervisor listening on {self.host}:{self.port}, loading models...")
+        
+        # Load models in the parent so workers share the pages copy-on-write;
+        # each worker runs its own warm-up so inference threads start post-fork
+        self.server = self.server_factory()
+        registry = get_model_registry()
+        registry.load(warm=False)
+        registry.track_workers(self.workers)
+        get_admission_controller().track_workers(self.workers)
+        worker_stats.reset()
+        
+        # Move everything allocated so far out of the GC's reach so collections
+        # in the workers don't touch (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+        
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        
+        for index in range(self.workers):
+            self._spawn(f"agi-{index}", self._run_agi_worker)
+        
+        if self.api_target:
+            self._spawn("api", self.api_target)
+        
+        try:
+            self._supervise()
+        finally:
+            self._shutdown()
+    
+    def _spawn(self, slot, target):
+        """Fork a child process running target()"""
+        # Back off if this slot is crash-looping
+        last = self.started_at.get(slot)
+        if last and time.monotonic() - last < config.WORKER_RESTART_BACKOFF:
+            time.sleep(config.WORKER_RESTART_BACKOFF)
+        
+        if slot.startswith("agi-"):
+            index = int(slot.split("-")[1])
+            get_model_registry().reset_worker(index)
+            get_admission_controller().reset_worker(index)
+        
+        pid = os.fork()
+        if pid == 0:
+            self.slot = slot
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            exit_code = 0
+            try:
+                target()
+            except Exception as e:
+                logger.error(f"Worker {slot} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        
+        self.children[pid] = slot
+        self.started_at[slot] = time.monotonic()
+        logger.info(f"Started worker {slot} (pid {pid})")
+        return pid
+    
+    def _run_agi_worker(self):
+        """Worker body: warm the inherited models, then serve calls on the shared socket"""
+        index = int(self.slot.split("-")[1])
+        get_model_registry().worker_index = index
+        get_admission_controller().worker_index = index
+        asyncio.run(self._serve())
+    
+    async def _serve(self):
+        """Serve calls and publish this worker's stats for the API process"""
+        publisher = asyncio.create_task(worker_stats.publish_forever(self.slot))
+        try:
+            await self.server.start(sock=self.sock, relay_sock=self.relay_sock)
+        finally:
+            publisher.cancel()
+    
+    def _supervise(self):
+        """Reap exited workers and restart them"""
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            
+            if pid == 0:
+                time.sleep(0.5)
+                continue
+            
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            target = self.api_target if slot == "api" else self._run_agi_worker
+            self._spawn(slot, target)
+    
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+    
+    def _shutdown(self):
+        """Terminate and reap all workers"""
+        logger.info("Stopping workers...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        
+        deadline = time.monotonic() + 10
+        while self.children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+            self.children.pop(pid, None)
+        
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        
+        for sock in (self.sock, self.relay_sock):
+            if sock:
+                sock.close()
+        logger.info("AGI supervisor stopped")
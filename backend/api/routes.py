@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from db.database import get_db
-from db.models import Customer, Call, Ticket, Analytics
+from db.models import Customer, Call, CallMetric, CallSpan, Ticket, Analytics
 from datetime import datetime, timedelta
 from loguru import logger
+from runtime.worker_stats import system_stats
 
 router = APIRouter()
 
@@ -122,6 +123,43 @@ async def get_call_transcript(call_id: int, db: Session = Depends(get_db)):
         "messages": messages
     }
 
+@router.get("/calls/{call_id}/trace")
+async def get_call_trace(call_id: int, db: Session = Depends(get_db)):
+    """Get the per-turn latency waterfall for a call"""
+    call = db.query(Call).filter(Call.id == call_id).first()
+    
+    if not call:
+        raise HTTPException(status_code=404, detail="Call not found")
+    
+    spans = db.query(CallSpan).filter(
+        CallSpan.call_id == call_id
+    ).order_by(CallSpan.turn, CallSpan.offset_ms).all()
+    
+    turns = {}
+    for s in spans:
+        turn = turns.setdefault(s.turn, {"turn": s.turn, "total_ms": 0.0, "spans": []})
+        turn["spans"].append({
+            "stage": s.stage,
+            "offset_ms": s.offset_ms,
+            "duration_ms": s.duration_ms
+        })
+    
+    for turn in turns.values():
+        start = min(sp["offset_ms"] for sp in turn["spans"])
+        end = max(sp["offset_ms"] + sp["duration_ms"] for sp in turn["spans"])
+        turn["start_ms"] = start
+        turn["total_ms"] = round(end - start, 2)
+    
+    metrics = db.query(CallMetric).filter(CallMetric.call_id == call_id).all()
+    
+    return {
+        "call_id": call.id,
+        "caller": call.caller_number,
+        "duration": call.duration,
+        "metrics": {m.name: m.value for m in metrics},
+        "turns": [turns[t] for t in sorted(turns)]
+    }
+
 @router.get("/calls/{call_id}")
 async def get_call(call_id: int, db: Session = Depends(get_db)):
     """Get call by ID"""
@@ -283,6 +321,78 @@ async def get_daily_analytics(days: int = 7, db: Session = Depends(get_db)):
         logger.error(f"Error getting daily analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/analytics/latency")
+async def get_latency_analytics(hours: int = 24, stage: str = None, db: Session = Depends(get_db)):
+    """Get stage-level latency percentiles over the last N hours"""
+    try:
+        from runtime.tracing import percentile
+        
+        since = datetime.now() - timedelta(hours=hours)
+        query = db.query(CallSpan.stage, CallSpan.duration_ms).filter(CallSpan.started_at >= since)
+        if stage:
+            query = query.filter(CallSpan.stage == stage)
+        
+        durations = {}
+        for span_stage, duration_ms in query.all():
+            durations.setdefault(span_stage, []).append(duration_ms)
+        
+        result = []
+        for span_stage, values in sorted(durations.items()):
+            result.append({
+                "stage": span_stage,
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(max(values), 2)
+            })
+        
+        return {"window_hours": hours, "stages": result}
+    except Exception as e:
+        logger.error(f"Error getting latency analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/latency/timeseries")
+async def get_latency_timeseries(hours: int = 24, bucket_minutes: int = 60, stage: str = None, db: Session = Depends(get_db)):
+    """Get stage-level latency percentiles per time bucket"""
+    try:
+        from runtime.tracing import percentile
+        
+        if bucket_minutes <= 0:
+            raise HTTPException(status_code=400, detail="bucket_minutes must be positive")
+        
+        since = datetime.now() - timedelta(hours=hours)
+        query = db.query(
+            CallSpan.stage, CallSpan.started_at, CallSpan.duration_ms
+        ).filter(CallSpan.started_at >= since)
+        if stage:
+            query = query.filter(CallSpan.stage == stage)
+        
+        bucket_seconds = bucket_minutes * 60
+        buckets = {}
+        for span_stage, started_at, duration_ms in query.all():
+            index = int((started_at - since).total_seconds() // bucket_seconds)
+            buckets.setdefault((index, span_stage), []).append(duration_ms)
+        
+        result = []
+        for (index, span_stage), values in sorted(buckets.items()):
+            result.append({
+                "bucket_start": (since + timedelta(seconds=index * bucket_seconds)).isoformat(),
+                "stage": span_stage,
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2)
+            })
+        
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting latency timeseries: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/analytics/intents")
 async def get_intent_analytics(db: Session = Depends(get_db)):
     """Get intent distribution"""
@@ -309,3 +419,42 @@ async def get_intent_analytics(db: Session = Depends(get_db)):
     except Exception as e:
         logger.error(f"Error getting intent analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# ============================================
+# SYSTEM ENDPOINTS
+# ============================================
+
+@router.get("/system/pools")
+async def get_pool_stats():
+    """Get queue depth, utilization and wait times of the ASR/TTS/DB worker pools"""
+    return system_stats("pools")
+
+@router.get("/system/admission")
+async def get_admission_stats():
+    """Get admission control decisions and live call capacity"""
+    return system_stats("admission")
+
+@router.get("/system/asr")
+async def get_asr_stats():
+    """Get ASR front-end statistics (batch sizes and batching wait when micro-batching)"""
+    return system_stats("asr")
+
+@router.get("/system/llm")
+async def get_llm_stats():
+    """Get LLM client counters, time to first token and response cache hit rate"""
+    return system_stats("llm")
+
+@router.get("/system/intent")
+async def get_intent_stats():
+    """Get the trained intent model's size and how often it was confident enough to decide"""
+    return system_stats("intent")
+
+@router.get("/system/sessions")
+async def get_session_stats():
+    """Get the live conversation-state gauge and how sessions ended (released, expired, evicted)"""
+    return system_stats("sessions")
+
+@router.get("/system/tts")
+async def get_tts_stats():
+    """Get TTS engine chain (breakers, fallbacks) and cache counters"""
+    return system_stats("tts")
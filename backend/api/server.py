@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from loguru import logger
 import config
 from api.routes import router
+from runtime.registry import get_model_registry
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,11 +36,16 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "version": "1.0.0"
-    }
+    """Health check endpoint (503 until the models are loaded and warm)"""
+    models = get_model_registry().status()
+    return JSONResponse(
+        {
+            "status": "healthy" if models["ready"] else "starting",
+            "version": "1.0.0",
+            **models
+        },
+        status_code=200 if models["ready"] else 503
+    )
 
 @app.on_event("startup")
 async def startup_event():
@@ -0,0 +1,222 @@
+"""Native decoding of Asterisk recordings (WAV / signed linear) without ffmpeg"""
+import struct
+from functools import lru_cache
+from math import gcd
+from pathlib import Path
+import numpy as np
+import config
+
+# Raw signed-linear extensions Asterisk writes, by sample rate
+SLIN_RATES = {
+    ".sln": 8000,
+    ".slin": 8000,
+    ".raw": 8000,
+    ".sln12": 12000,
+    ".sln16": 16000,
+    ".sln24": 24000,
+    ".sln32": 32000,
+    ".sln44": 44100,
+    ".sln48": 48000,
+}
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Output samples resampled per vectorized step
+RESAMPLE_BLOCK = 16384
+
+
+class UnsupportedAudioError(ValueError):
+    """Raised when a file is not 16-bit PCM and needs the ffmpeg path"""
+
+
+def read_wav_pcm(path):
+    """
+    Memory-map the samples of a 16-bit PCM WAV file
+
+    Only the RIFF chunk headers are parsed; the sample data is never copied.
+
+    Args:
+        path: Path to the WAV file
+
+    Returns:
+        tuple: (int16 memmap of shape (frames, channels), sample_rate)
+    """
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise UnsupportedAudioError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise UnsupportedAudioError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+
+    if fmt is None:
+        raise UnsupportedAudioError(f"{path} has no fmt chunk")
+
+    format_tag, channels, sample_rate, _, _, bits = fmt
+    if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE) or bits != 16:
+        raise UnsupportedAudioError(f"{path} is not 16-bit PCM (format {format_tag}, {bits} bits)")
+
+    # Asterisk leaves the data size at 0 / 0xFFFFFFFF if a recording is cut short
+    available = Path(path).stat().st_size - offset
+    if size == 0 or size > available:
+        size = available
+    frames = size // (2 * channels)
+    if frames == 0:
+        return np.zeros((0, channels), dtype=np.int16), sample_rate
+
+    samples = np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(frames, channels))
+    return samples, sample_rate
+
+
+def read_slin(path, sample_rate=None):
+    """
+    Memory-map a headerless signed-linear file (.sln, .sln16, ...)
+
+    Args:
+        path: Path to the raw file
+        sample_rate: Override for the rate implied by the extension
+
+    Returns:
+        tuple: (int16 memmap of shape (frames, 1), sample_rate)
+    """
+    sample_rate = sample_rate or SLIN_RATES.get(Path(path).suffix.lower(), 8000)
+    frames = Path(path).stat().st_size // 2
+    if frames == 0:
+        return np.zeros((0, 1), dtype=np.int16), sample_rate
+    samples = np.memmap(path, dtype="<i2", mode="r", shape=(frames, 1))
+    return samples, sample_rate
+
+
+@lru_cache(maxsize=8)
+def polyphase_filter(up, down, taps_per_phase=None):
+    """
+    Design the anti-aliasing low-pass for an up/down resampler
+
+    A Kaiser-windowed sinc cut off at the narrower of the two Nyquist bands,
+    split into `up` phases. Cached, since calls only ever use a few ratios.
+
+    Returns:
+        float32 array of shape (up, taps_per_phase)
+    """
+    taps_per_phase = taps_per_phase or config.RESAMPLE_TAPS_PER_PHASE
+    n_taps = up * taps_per_phase
+    cutoff = 1.0 / max(up, down)
+
+    # odd-length symmetric filter so the group delay is a whole sample,
+    # zero-padded to fill the last phase
+    length = n_taps - 1 if n_taps % 2 == 0 else n_taps
+    t = np.arange(length) - (length - 1) // 2
+    h = np.zeros(n_taps)
+    h[:length] = cutoff * np.sinc(cutoff * t) * np.kaiser(length, 5.0)
+    h *= up / h.sum()
+
+    # phase p holds taps p, p + up, p + 2*up, ...
+    return h.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+def resample_poly(audio, up, down):
+    """
+    Rational resampling with a vectorized polyphase FIR
+
+    Each output sample only touches the input samples that its filter phase
+    needs, so the zero-stuffed signal is never built. All phases are computed
+    at once from a strided window view of the input.
+
+    Args:
+        audio: 1-D float32 samples
+        up: Upsampling factor
+        down: Downsampling factor
+
+    Returns:
+        float32 numpy array of length ceil(len(audio) * up / down)
+    """
+    g = gcd(up, down)
+    up, down = up // g, down // g
+    if up == down or audio.size == 0:
+        return audio.astype(np.float32, copy=False)
+
+    phases = polyphase_filter(up, down)
+    taps = phases.shape[1]
+    n_taps = up * taps
+    delay = ((n_taps - 1 if n_taps % 2 == 0 else n_taps) - 1) // 2
+
+    n_out = -(-audio.size * up // down)
+    # position of each output sample on the upsampled grid, filter delay removed
+    m = np.arange(n_out, dtype=np.int64) * down + delay
+    phase = m % up
+    base = m // up
+
+    # pad so every base index has a full window of `taps` input samples behind it
+    padded = np.concatenate([np.zeros(taps - 1, dtype=np.float32), audio.astype(np.float32, copy=False), np.zeros(taps, dtype=np.float32)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps)
+    base = np.minimum(base, windows.shape[0] - 1)
+    flipped = phases[:, ::-1]
+
+    # windows[base] ends at input sample base, so taps apply newest-first;
+    # blocks keep the gathered windows small for long recordings
+    out = np.empty(n_out, dtype=np.float32)
+    for start in range(0, n_out, RESAMPLE_BLOCK):
+        block = slice(start, start + RESAMPLE_BLOCK)
+        out[block] = np.einsum("ij,ij->i", windows[base[block]], flipped[phase[block]])
+    return out
+
+
+def to_whisper_audio(samples, sample_rate):
+    """
+    Convert int16 PCM frames to mono float32 at Whisper's sample rate
+
+    Args:
+        samples: int16 array of shape (frames,) or (frames, channels)
+        sample_rate: Rate of the input samples
+
+    Returns:
+        float32 numpy array at SAMPLE_RATE
+    """
+    if samples.ndim == 2:
+        if samples.shape[1] == 1:
+            samples = samples[:, 0]
+        else:
+            samples = samples.mean(axis=1)
+    audio = samples.astype(np.float32) / 32768.0
+    return resample_poly(audio, config.SAMPLE_RATE, sample_rate)
+
+
+def load_native(path):
+    """
+    Decode an Asterisk WAV or signed-linear recording in-process
+
+    Args:
+        path: Path to a .wav / .sln* / .raw file
+
+    Returns:
+        float32 numpy array at SAMPLE_RATE
+
+    Raises:
+        UnsupportedAudioError: If the file needs a general-purpose decoder
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".wav":
+        samples, sample_rate = read_wav_pcm(path)
+    elif suffix in SLIN_RATES:
+        samples, sample_rate = read_slin(path)
+    else:
+        raise UnsupportedAudioError(f"No native decoder for {suffix or path}")
+
+    audio = to_whisper_audio(samples, sample_rate)
+    # drop the mapping now; the recording is usually deleted right after
+    del samples
+    return audio
@@ -0,0 +1,202 @@
+"""Interchangeable Whisper inference backends behind WhisperASR"""
+import numpy as np
+from loguru import logger
+import config
+
+try:
+    import torch
+    import whisper
+    OPENAI_WHISPER_AVAILABLE = True
+except ImportError:
+    OPENAI_WHISPER_AVAILABLE = False
+
+try:
+    import ctranslate2
+    from faster_whisper import WhisperModel, decode_audio
+    from faster_whisper.tokenizer import Tokenizer
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+# Whisper works on 30 s windows: 480000 samples / 3000 mel frames at 16 kHz
+WINDOW_SAMPLES = 30 * 16000
+WINDOW_FRAMES = 3000
+MAX_DECODE_TOKENS = 448
+
+
+class OpenAIWhisperBackend:
+    """Reference PyTorch implementation (openai-whisper)"""
+    
+    name = "openai"
+    
+    def __init__(self, model_name, device):
+        if not OPENAI_WHISPER_AVAILABLE:
+            raise ImportError("openai-whisper is not installed")
+        self.device = device
+        self.model = whisper.load_model(model_name, device=device)
+    
+    def transcribe(self, audio, language):
+        """
+        Transcribe a 16 kHz float32 array or an audio file path
+        
+        Returns:
+            str: Transcribed text
+        """
+        result = self.model.transcribe(
+            audio,
+            language=language,
+            fp16=False if self.device == "cpu" else True
+        )
+        return result["text"].strip()
+    
+    def transcribe_batch(self, audios, language):
+        """
+        Transcribe several short utterances in one batched encoder/decoder pass
+        
+        Args:
+            audios: List of 16 kHz float32 arrays, each at most 30 s
+            
+        Returns:
+            list: Transcribed text per utterance
+        """
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)))
+            for audio in audios
+        ]).to(self.model.device)
+        
+        options = whisper.DecodingOptions(
+            language=language,
+            without_timestamps=True,
+            fp16=False if self.device == "cpu" else True
+        )
+        results = whisper.decode(self.model, mel, options)
+        return [result.text.strip() for result in results]
+    
+    def load_audio(self, path):
+        """Decode an audio file to 16 kHz mono float32"""
+        return whisper.load_audio(path)
+    
+    def detect_language(self, audio):
+        """Detect the spoken language, returns (language, probability)"""
+        audio = whisper.pad_or_trim(audio)
+        mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
+        _, probs = self.model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, probs[language]
+
+
+class CTranslate2Backend:
+    """Quantized CTranslate2 engine (faster-whisper), int8 on CPU by default"""
+    
+    name = "ctranslate2"
+    
+    def __init__(self, model_name, device):
+        if not FASTER_WHISPER_AVAILABLE:
+            raise ImportError("faster-whisper is not installed")
+        self.model = WhisperModel(
+            model_name,
+            device=device,
+            compute_type=config.WHISPER_COMPUTE_TYPE,
+            cpu_threads=config.WHISPER_CPU_THREADS,
+            num_workers=config.ASR_WORKERS
+        )
+    
+    def transcribe(self, audio, language):
+        """
+        Transcribe a 16 kHz float32 array or an audio file path
+        
+        Returns:
+            str: Transcribed text
+        """
+        segments, _ = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=config.WHISPER_BEAM_SIZE,
+            condition_on_previous_text=True
+        )
+        # Segments are generated lazily; joining them runs the decoder
+        return "".join(segment.text for segment in segments).strip()
+    
+    def transcribe_batch(self, audios, language):
+        """
+        Transcribe several short utterances in one batched encoder/decoder pass
+        
+        Args:
+            audios: List of 16 kHz float32 arrays, each at most 30 s
+            
+        Returns:
+            list: Transcribed text per utterance
+        """
+        features = []
+        for audio in audios:
+            mel = self.model.feature_extractor(audio)[:, :WINDOW_FRAMES]
+            if mel.shape[1] < WINDOW_FRAMES:
+                mel = np.pad(mel, ((0, 0), (0, WINDOW_FRAMES - mel.shape[1])))
+            features.append(mel)
+        
+        batch = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features), dtype=np.float32))
+        encoder_output = self.model.model.encode(batch, to_cpu=False)
+        
+        tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language=language
+        )
+        prompt = self.model.get_prompt(tokenizer, [], without_timestamps=True)
+        
+        results = self.model.model.generate(
+            encoder_output,
+            [prompt] * len(audios),
+            beam_size=config.WHISPER_BEAM_SIZE,
+            max_length=MAX_DECODE_TOKENS,
+            suppress_blank=True,
+            suppress_tokens=[-1]
+        )
+        return [tokenizer.decode(result.sequences_ids[0]).strip() for result in results]
+    
+    def load_audio(self, path):
+        """Decode an audio file to 16 kHz mono float32"""
+        return decode_audio(path, sampling_rate=16000)
+    
+    def detect_language(self, audio):
+        """Detect the spoken language, returns (language, probability)"""
+        _, info = self.model.transcribe(audio, language=None, beam_size=1)
+        return info.language, info.language_probability
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+
+def load_backend(name=None, model_name=None, device=None):
+    """
+    Load the configured Whisper backend, falling back to openai-whisper
+    
+    Args:
+        name: Backend name ('openai' or 'ctranslate2'), defaults to WHISPER_BACKEND
+        model_name: Model size, defaults to WHISPER_MODEL
+        device: Inference device, defaults to WHISPER_DEVICE
+        
+    Returns:
+        Backend instance
+    """
+    name = name or config.WHISPER_BACKEND
+    model_name = model_name or config.WHISPER_MODEL
+    device = device or config.WHISPER_DEVICE
+    
+    if name not in BACKENDS:
+        logger.warning(f"Unknown WHISPER_BACKEND '{name}', using openai")
+        name = OpenAIWhisperBackend.name
+    
+    try:
+        backend = BACKENDS[name](model_name, device)
+        logger.info(f"Whisper backend: {name} ({model_name} on {device})")
+        return backend
+    except Exception as e:
+        if name == OpenAIWhisperBackend.name:
+            raise
+        logger.warning(f"Whisper backend '{name}' unavailable ({e}), falling back to openai")
+        return OpenAIWhisperBackend(model_name, device)
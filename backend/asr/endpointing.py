@@ -0,0 +1,188 @@
+"""Streaming voice-activity endpointing for live caller audio (EAGI fd 3)"""
+import asyncio
+import time
+import numpy as np
+from loguru import logger
+import config
+from asr.audio_io import to_whisper_audio
+
+
+class Endpointer:
+    """
+    Frame-level energy VAD that decides when the caller has finished speaking
+    
+    Feed fixed-size int16 frames; the endpointer tracks an adaptive noise
+    floor and reports the end of an utterance once speech has been followed
+    by enough trailing silence.
+    """
+    
+    def __init__(self, sample_rate=8000, frame_ms=None, end_silence_ms=None,
+                 min_speech_ms=None, max_utterance_ms=None, threshold_db=None):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms or config.VAD_FRAME_MS
+        self.frame_samples = int(sample_rate * self.frame_ms / 1000)
+        self.end_silence_frames = (end_silence_ms or config.VAD_END_SILENCE_MS) // self.frame_ms
+        self.min_speech_frames = (min_speech_ms or config.VAD_MIN_SPEECH_MS) // self.frame_ms
+        self.max_frames = (max_utterance_ms or config.VAD_MAX_UTTERANCE_MS) // self.frame_ms
+        self.threshold_db = threshold_db if threshold_db is not None else config.VAD_THRESHOLD_DB
+        self.reset()
+    
+    def reset(self):
+        """Clear state before a new utterance"""
+        self.noise_floor_db = self.threshold_db - 10.0
+        self.frames = []
+        self.speech_frames = 0
+        self.silence_run = 0
+        self.pre_roll = []
+        self.in_speech = False
+    
+    @staticmethod
+    def frame_energy_db(frame):
+        """RMS level of an int16 frame in dBFS"""
+        samples = frame.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(samples * samples)) if samples.size else 0.0
+        return 20.0 * np.log10(max(rms, 1e-6))
+    
+    def feed(self, frame):
+        """
+        Process one frame of audio
+        
+        Args:
+            frame: int16 numpy array of frame_samples samples
+            
+        Returns:
+            bool: True once the utterance has ended
+        """
+        level = self.frame_energy_db(frame)
+        threshold = max(self.threshold_db, self.noise_floor_db + 10.0)
+        is_speech = level >= threshold
+        
+        if not self.in_speech:
+            # Track background noise while waiting for speech
+            if not is_speech:
+                self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * level
+            
+            # Keep a short pre-roll so word onsets are not clipped
+            self.pre_roll.append(frame)
+            if len(self.pre_roll) > 10:
+                self.pre_roll.pop(0)
+            
+            if is_speech:
+                self.in_speech = True
+                self.frames.extend(self.pre_roll)
+                self.pre_roll = []
+                self.speech_frames = 1
+                self.silence_run = 0
+            return False
+        
+        self.frames.append(frame)
+        if is_speech:
+            self.speech_frames += 1
+            self.silence_run = 0
+        else:
+            self.silence_run += 1
+        
+        if len(self.frames) >= self.max_frames:
+            return True
+        
+        if self.silence_run >= self.end_silence_frames:
+            if self.speech_frames >= self.min_speech_frames:
+                return True
+            # Too short to be speech (click, cough) - go back to waiting
+            self.reset()
+        
+        return False
+    
+    def utterance(self):
+        """Get the captured utterance without its trailing silence"""
+        if not self.frames:
+            return np.zeros(0, dtype=np.int16)
+        keep = len(self.frames) - max(0, self.silence_run - 2)
+        return np.concatenate(self.frames[:keep])
+
+
+def upsample_to_16k(audio, sample_rate=8000):
+    """Convert int16 telephony audio to float32 at Whisper's 16 kHz"""
+    return to_whisper_audio(audio, sample_rate)
+
+
+class CallerAudioStream:
+    """
+    Continuous reader for EAGI audio (8 kHz signed linear on fd 3)
+    
+    Audio is read for the whole call so the pipe never backs up; frames are
+    only kept while an utterance is being captured.
+    """
+    
+    def __init__(self, reader, sample_rate=8000):
+        self.reader = reader
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * config.VAD_FRAME_MS / 1000) * 2
+        self._queue = None
+        self._task = None
+        self.closed = False
+    
+    def start(self):
+        """Start pumping audio from the stream"""
+        self._task = asyncio.create_task(self._pump())
+    
+    async def _pump(self):
+        try:
+            while True:
+                data = await self.reader.readexactly(self.frame_bytes)
+                if self._queue is not None:
+                    self._queue.put_nowait(np.frombuffer(data, dtype='<i2'))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"EAGI audio stream error: {e}")
+        finally:
+            self.closed = True
+            if self._queue is not None:
+                self._queue.put_nowait(None)
+    
+    async def capture_utterance(self, timeout):
+        """
+        Capture one utterance, returning as soon as the caller stops talking
+        
+        Args:
+            timeout: Seconds to wait for the caller to start speaking
+            
+        Returns:
+            numpy int16 array, empty if nothing was said
+        """
+        endpointer = Endpointer(sample_rate=self.sample_rate)
+        self._queue = asyncio.Queue()
+        deadline = time.monotonic() + timeout
+        
+        try:
+            while not self.closed:
+                remaining = deadline - time.monotonic()
+                if not endpointer.in_speech and remaining <= 0:
+                    break
+                
+                try:
+                    frame = await asyncio.wait_for(
+                        self._queue.get(),
+                        timeout=max(remaining, 0.1) if not endpointer.in_speech else None
+                    )
+                except asyncio.TimeoutError:
+                    break
+                
+                if frame is None:
+                    break
+                if endpointer.feed(frame):
+                    return endpointer.utterance()
+            
+            return endpointer.utterance() if endpointer.in_speech else np.zeros(0, dtype=np.int16)
+        finally:
+            self._queue = None
+    
+    async def close(self):
+        """Stop reading audio"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,164 @@
+"""Async ASR front-ends used by the AGI server: direct per-call decoding or cross-call micro-batching"""
+import asyncio
+import time
+from collections import Counter
+from loguru import logger
+import config
+
+
+class DirectASRService:
+    """Decode each utterance on its own on the ASR pool"""
+    
+    def __init__(self, asr, pool):
+        self.asr = asr
+        self.pool = pool
+    
+    async def transcribe(self, audio):
+        """Transcribe a 16 kHz float32 array"""
+        return await self.pool.run(self.asr.transcribe, audio)
+    
+    async def transcribe_file(self, audio_file):
+        """Transcribe an audio file"""
+        return await self.pool.run(self.asr.transcribe_file, audio_file)
+    
+    def stats(self):
+        return {"mode": "direct"}
+
+
+class BatchingASRService:
+    """
+    Collect utterances from concurrent calls for a few milliseconds and
+    decode them in one batched encoder/decoder pass
+    
+    A batch is flushed when it reaches max_batch utterances or when the
+    oldest utterance has waited max_wait_ms, whichever comes first.
+    """
+    
+    def __init__(self, asr, pool, max_batch=None, max_wait_ms=None):
+        self.asr = asr
+        self.pool = pool
+        self.max_batch = max_batch or config.ASR_BATCH_MAX_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.ASR_BATCH_MAX_WAIT_MS) / 1000
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # running batches, referenced so they aren't garbage-collected
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = Counter()
+        self._wait_ms_total = 0.0
+    
+    async def transcribe(self, audio):
+        """
+        Queue a 16 kHz float32 array for the next batch and await its text
+        """
+        # Trim before queueing so silence never occupies a batch slot; on the
+        # pool, since VAD and normalization are numpy work on the whole utterance
+        audio = await self.pool.run(self.asr.prepare, audio)
+        return await self._enqueue(audio)
+    
+    async def transcribe_file(self, audio_file):
+        """Decode an audio file, then batch it with other calls' utterances"""
+        audio = await self.pool.run(self._load_prepared, audio_file)
+        return await self._enqueue(audio)
+    
+    def _load_prepared(self, audio_file):
+        return self.asr.prepare(self.asr.load_audio(audio_file))
+    
+    async def _enqueue(self, audio):
+        """Add a prepared utterance to the next batch and await its text"""
+        if audio is None:
+            return ""
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((audio, future, time.perf_counter()))
+        
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        if not self._pending:
+            return
+        
+        batch = self._pending[:self.max_batch]
+        self._pending = self._pending[self.max_batch:]
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(lambda task: self._batch_done(task, batch))
+        
+        # Keep draining if more than one batch arrived at once
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(0, self._flush)
+    
+    async def _run_batch(self, batch):
+        started = time.perf_counter()
+        self._batches += 1
+        self._items += len(batch)
+        self._batch_sizes[len(batch)] += 1
+        self._wait_ms_total += sum((started - queued_at) * 1000 for _, _, queued_at in batch)
+        
+        try:
+            texts = await self.pool.run(
+                self.asr.transcribe_batch,
+                [audio for audio, _, _ in batch],
+                True
+            )
+            for (_, future, _), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+        except Exception as e:
+            logger.error(f"ASR batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    def _batch_done(self, task, batch):
+        """Forget a finished batch task and fail any call it left waiting (cancelled, short result)"""
+        self._tasks.discard(task)
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("ASR batch ended without a result"))
+    
+    def stats(self):
+        """Get batching statistics"""
+        return {
+            "mode": "batching",
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "running_batches": len(self._tasks),
+            "batches": self._batches,
+            "utterances": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "avg_batch_wait_ms": round(self._wait_ms_total / self._items, 2) if self._items else 0.0,
+        }
+
+
+_service = None
+
+
+def create_asr_service(asr, pool):
+    """Build the ASR front-end selected by ASR_BATCHING"""
+    global _service
+    if config.ASR_BATCHING:
+        logger.info(
+            f"ASR micro-batching enabled (max batch {config.ASR_BATCH_MAX_SIZE}, "
+            f"max wait {config.ASR_BATCH_MAX_WAIT_MS} ms)"
+        )
+        _service = BatchingASRService(asr, pool)
+    else:
+        _service = DirectASRService(asr, pool)
+    return _service
+
+
+def asr_service_stats():
+    """Get statistics of this process's ASR front-end, if one was created"""
+    return _service.stats() if _service is not None else {}
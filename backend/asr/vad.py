@@ -0,0 +1,102 @@
+"""Vectorized voice-activity trimming applied before Whisper"""
+import threading
+import numpy as np
+import config
+from runtime.tracing import add_metric
+
+_lock = threading.Lock()
+_stats = {
+    "utterances": 0,
+    "skipped_silent": 0,
+    "audio_seconds": 0.0,
+    "seconds_saved": 0.0,
+}
+
+
+def speech_bounds(audio, sample_rate=None):
+    """
+    Find the speech span of an utterance
+    
+    The audio is framed with a single reshape and per-frame RMS levels are
+    computed in one pass. A recording counts as speech when enough frames
+    exceed VAD_THRESHOLD_DB; the span's edges are where frames exceed both
+    VAD_THRESHOLD_DB and the noise floor of the sub-threshold frames + 10 dB.
+    
+    Args:
+        audio: float32 samples in [-1, 1]
+        sample_rate: Sample rate of the audio (defaults to SAMPLE_RATE)
+        
+    Returns:
+        tuple: (start, end) sample indices of the speech span, or None if silent
+    """
+    sample_rate = sample_rate or config.SAMPLE_RATE
+    frame = int(sample_rate * config.VAD_FRAME_MS / 1000)
+    n_frames = audio.size // frame
+    if n_frames == 0:
+        return None
+    
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    level_db = 20.0 * np.log10(np.maximum(rms, 1e-6))
+    
+    # Whether there is speech at all only depends on the absolute threshold:
+    # endpointed or tightly recorded utterances may contain no silence
+    loud = level_db >= config.VAD_THRESHOLD_DB
+    if np.count_nonzero(loud) < max(1, config.VAD_MIN_SPEECH_MS // config.VAD_FRAME_MS):
+        return None
+    
+    # Raise the bar above a noisy line's hiss, estimating the floor only from
+    # frames below the absolute threshold so it stays within 10 dB of it
+    # and quiet words at the edges aren't cut
+    quiet = level_db[~loud]
+    threshold = config.VAD_THRESHOLD_DB
+    if quiet.size:
+        threshold = max(threshold, float(np.percentile(quiet, 10)) + 10.0)
+    speech = np.flatnonzero(level_db >= threshold)
+    if speech.size == 0:
+        speech = np.flatnonzero(loud)
+    
+    pad = config.VAD_TRIM_PADDING_MS // config.VAD_FRAME_MS
+    start = max(0, int(speech[0]) - pad) * frame
+    end = min(n_frames, int(speech[-1]) + 1 + pad) * frame
+    return start, end
+
+
+def trim_silence(audio, sample_rate=None):
+    """
+    Strip leading/trailing silence and drop near-silent recordings
+    
+    Args:
+        audio: float32 samples in [-1, 1]
+        sample_rate: Sample rate of the audio (defaults to SAMPLE_RATE)
+        
+    Returns:
+        numpy array of the speech span, or None if there is no speech
+    """
+    sample_rate = sample_rate or config.SAMPLE_RATE
+    total_seconds = audio.size / sample_rate
+    
+    bounds = speech_bounds(audio, sample_rate)
+    speech = audio[bounds[0]:bounds[1]] if bounds else None
+    saved = total_seconds - (speech.size / sample_rate if speech is not None else 0.0)
+    
+    with _lock:
+        _stats["utterances"] += 1
+        _stats["audio_seconds"] += total_seconds
+        _stats["seconds_saved"] += saved
+        if speech is None:
+            _stats["skipped_silent"] += 1
+    
+    add_metric("asr_audio_seconds", total_seconds)
+    add_metric("asr_seconds_saved", saved)
+    return speech
+
+
+def vad_stats():
+    """Get process-wide trimming statistics"""
+    with _lock:
+        stats = dict(_stats)
+    stats["audio_seconds"] = round(stats["audio_seconds"], 2)
+    stats["seconds_saved"] = round(stats["seconds_saved"], 2)
+    stats["saved_ratio"] = round(stats["seconds_saved"] / stats["audio_seconds"], 3) if stats["audio_seconds"] else 0.0
+    return stats
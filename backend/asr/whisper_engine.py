@@ -1,20 +1,47 @@
-import whisper
 import numpy as np
 from loguru import logger
 import config
-import torch
+from asr.audio_io import load_native, UnsupportedAudioError
+from asr.backends import load_backend
+from asr.vad import trim_silence
 
 class WhisperASR:
     """Whisper-based speech recognition engine"""
     
     def __init__(self):
         logger.info(f"Loading Whisper model: {config.WHISPER_MODEL}")
-        self.model = whisper.load_model(
-            config.WHISPER_MODEL,
-            device=config.WHISPER_DEVICE
-        )
+        self.backend = load_backend(config.WHISPER_BACKEND)
         logger.info("Whisper model loaded successfully")
     
+    def prepare(self, audio_data):
+        """
+        Convert, trim and normalize audio before it reaches the model
+        
+        Args:
+            audio_data: numpy array of audio samples (float, or int16 PCM)
+            
+        Returns:
+            float32 numpy array of the speech span, or None if there is no speech
+        """
+        # Ensure audio is float32 in [-1, 1]
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        elif audio_data.dtype != np.float32:
+            audio_data = audio_data.astype(np.float32)
+        
+        # Strip leading/trailing silence, skip recordings with no speech
+        if config.VAD_TRIM:
+            audio_data = trim_silence(audio_data)
+            if audio_data is None:
+                return None
+        
+        # Normalize audio
+        peak = np.max(np.abs(audio_data)) if audio_data.size else 0.0
+        if peak == 0:
+            return None
+        
+        return audio_data / peak
+    
     def transcribe(self, audio_data):
         """
         Transcribe audio data (numpy array)
@@ -26,21 +53,13 @@ class WhisperASR:
             str: Transcribed text
         """
         try:
-            # Ensure audio is float32
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            
-            # Normalize audio
-            audio_data = audio_data / np.max(np.abs(audio_data))
+            audio_data = self.prepare(audio_data)
+            if audio_data is None:
+                logger.debug("No speech detected, skipping transcription")
+                return ""
             
             # Transcribe
-            result = self.model.transcribe(
-                audio_data,
-                language=config.WHISPER_LANGUAGE,
-                fp16=False if config.WHISPER_DEVICE == "cpu" else True
-            )
-            
-            text = result["text"].strip()
+            text = self.backend.transcribe(audio_data, config.WHISPER_LANGUAGE)
             logger.debug(f"Transcribed: {text}")
             
             return text
@@ -60,13 +79,7 @@ class WhisperASR:
             str: Transcribed text
         """
         try:
-            result = self.model.transcribe(
-                audio_file,
-                language=config.WHISPER_LANGUAGE,
-                fp16=False if config.WHISPER_DEVICE == "cpu" else True
-            )
-            
-            text = result["text"].strip()
+            text = self.transcribe(self.load_audio(audio_file))
             logger.info(f"Transcribed from file: {text}")
             
             return text
@@ -75,20 +88,67 @@ class WhisperASR:
             logger.error(f"File transcription error: {e}")
             return ""
     
+    def transcribe_batch(self, audio_list, prepared=False):
+        """
+        Transcribe several utterances together (cross-call micro-batching)
+        
+        Args:
+            audio_list: List of 16 kHz numpy arrays
+            prepared: True if the arrays already went through prepare()
+            
+        Returns:
+            list: Transcribed text per utterance, "" for silence or failures
+        """
+        if not prepared:
+            audio_list = [self.prepare(audio_data) for audio_data in audio_list]
+        
+        # Utterances longer than one Whisper window can't share a batch
+        window = 30 * config.SAMPLE_RATE
+        texts = [""] * len(audio_list)
+        short = [i for i, audio in enumerate(audio_list) if audio is not None and audio.size <= window]
+        long = [i for i, audio in enumerate(audio_list) if audio is not None and audio.size > window]
+        
+        try:
+            if short:
+                batch_texts = self.backend.transcribe_batch(
+                    [audio_list[i] for i in short],
+                    config.WHISPER_LANGUAGE
+                )
+                for i, text in zip(short, batch_texts):
+                    texts[i] = text
+        except Exception as e:
+            logger.error(f"Batch transcription error: {e}")
+            long = short + long
+        
+        for i in long:
+            try:
+                texts[i] = self.backend.transcribe(audio_list[i], config.WHISPER_LANGUAGE)
+            except Exception as e:
+                logger.error(f"Transcription error: {e}")
+        
+        logger.debug(f"Batch transcribed {len(audio_list)} utterances")
+        return texts
+    
+    def load_audio(self, audio_file):
+        """
+        Decode an audio file to a 16 kHz float32 array
+        
+        Asterisk's WAV/slin recordings are memory-mapped and resampled
+        in-process; anything else goes through the backend's ffmpeg decoder.
+        """
+        if config.NATIVE_AUDIO_DECODE:
+            try:
+                return load_native(audio_file)
+            except UnsupportedAudioError as e:
+                logger.debug(f"Native decode unavailable, using ffmpeg: {e}")
+        return self.backend.load_audio(audio_file)
+    
     def detect_language(self, audio_data):
         """Detect language from audio"""
         try:
-            # Load audio
-            audio = whisper.pad_or_trim(audio_data)
-            
-            # Make log-Mel spectrogram
-            mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
-            
-            # Detect language
-            _, probs = self.model.detect_language(mel)
-            detected_lang = max(probs, key=probs.get)
+            detected_lang, confidence = self.backend.detect_language(audio_data)
             
-            logger.info(f"Detected language: {detected_lang} (confidence: {probs[detected_lang]:.2f})")
+            logger.info(f"Detected language: {detected_lang} (confidence: {confidence:.2f})")
             
             return detected_lang
             
@@ -27,21 +27,107 @@ API_PORT = int(os.getenv("API_PORT", 8000))
 ASTERISK_HOST = os.getenv("ASTERISK_HOST", "asterisk")
 ASTERISK_AGI_PORT = int(os.getenv("ASTERISK_AGI_PORT", 4573))
 
+# AGI Worker Processes (1 = single process, >1 = pre-fork supervisor)
+AGI_WORKERS = int(os.getenv("AGI_WORKERS", 1))
+AGI_BACKLOG = int(os.getenv("AGI_BACKLOG", 128))
+WORKER_RESTART_BACKOFF = float(os.getenv("WORKER_RESTART_BACKOFF", 1.0))  # seconds
+WORKER_STATS_INTERVAL = float(os.getenv("WORKER_STATS_INTERVAL", 2.0))  # seconds between each worker's stats snapshot
+WORKER_STATS_DIR = DATA_DIR / "worker_stats"  # where AGI workers publish them for the API's /system endpoints
+
 # AI Model Configuration
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2:3b")
 LLM_API_URL = os.getenv("LLM_API_URL", "http://localhost:11434")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 2.0))  # seconds to connect / get a pooled connection
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 10.0))  # max seconds between streamed chunks (incl. first token)
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", 30.0))  # overall deadline per reply
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 16))  # pooled keep-alive connections to the LLM server
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", 60))
+
+# LLM Response Cache (generic questions only, never turns with customer data)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 3600))  # seconds a reply stays reusable
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 2000))
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", 0))  # token-set Jaccard for near-duplicates, 0 = exact only
+
+# Per-call conversation state (released at hangup; TTL catches calls that never report one)
+CONVERSATION_STATE_TTL = float(os.getenv("CONVERSATION_STATE_TTL", 1800))  # seconds idle before a session is dropped
+CONVERSATION_STATE_MAX = int(os.getenv("CONVERSATION_STATE_MAX", 10000))  # live sessions kept, least recently used evicted beyond
+
+# Trained intent model (scripts/train_intent_model.py); keyword table only if the file is missing
+INTENT_MODEL_PATH = Path(os.getenv("INTENT_MODEL_PATH", DATA_DIR / "intent_model.npz"))
+INTENT_MODEL_THRESHOLD = float(os.getenv("INTENT_MODEL_THRESHOLD", 0.6))  # calibrated confidence needed to trust the model when no keyword matches
+INTENT_MODEL_OVERRIDE_THRESHOLD = float(os.getenv("INTENT_MODEL_OVERRIDE_THRESHOLD", 0.95))  # confidence needed to overrule matching keywords
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
 # ASR Configuration
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
 WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai")  # openai | ctranslate2
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # ctranslate2 only
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", 0))  # ctranslate2 only, 0 = auto
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", 1))  # ctranslate2 only, 1 = greedy like openai
+
+# Cross-call ASR micro-batching
+ASR_BATCHING = os.getenv("ASR_BATCHING", "false").lower() == "true"
+ASR_BATCH_MAX_SIZE = int(os.getenv("ASR_BATCH_MAX_SIZE", 8))
+ASR_BATCH_MAX_WAIT_MS = int(os.getenv("ASR_BATCH_MAX_WAIT_MS", 30))
+
+# Native audio decoding (Asterisk WAV/slin without ffmpeg)
+NATIVE_AUDIO_DECODE = os.getenv("NATIVE_AUDIO_DECODE", "true").lower() == "true"
+RESAMPLE_TAPS_PER_PHASE = int(os.getenv("RESAMPLE_TAPS_PER_PHASE", 16))
+
+# Streaming ASR / Endpointing (EAGI mode)
+EAGI_SAMPLE_RATE = int(os.getenv("EAGI_SAMPLE_RATE", 8000))  # Asterisk sends 8 kHz slin on fd 3
+EAGI_RELAY_PORT = int(os.getenv("EAGI_RELAY_PORT", 4574))  # eagi.py relays each call's AGI channel + fd 3 audio here, 0 = off
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", 20))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", -45.0))  # minimum speech level in dBFS
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", 200))
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", 700))  # trailing silence that ends a turn
+VAD_MAX_UTTERANCE_MS = int(os.getenv("VAD_MAX_UTTERANCE_MS", 15000))
+VAD_TRIM = os.getenv("VAD_TRIM", "true").lower() == "true"  # trim silence before Whisper
+VAD_TRIM_PADDING_MS = int(os.getenv("VAD_TRIM_PADDING_MS", 200))
 
 # TTS Configuration
 TTS_ENGINE = os.getenv("TTS_ENGINE", "piper")
 TTS_MODEL = os.getenv("TTS_MODEL", "en_US-lessac-medium")
 TTS_SPEED = float(os.getenv("TTS_SPEED", 1.0))
+TTS_VOICE_DIR = Path(os.getenv("TTS_VOICE_DIR", DATA_DIR / "voices"))  # <voice>.onnx + <voice>.onnx.json
+TTS_VOICES = [v.strip() for v in os.getenv("TTS_VOICES", TTS_MODEL).split(",") if v.strip()]  # preloaded for set_voice
+TTS_SESSIONS = int(os.getenv("TTS_SESSIONS", 1))  # resident ONNX sessions per voice (parallel synthesis)
+TTS_ONNX_THREADS = int(os.getenv("TTS_ONNX_THREADS", 0))  # 0 = onnxruntime default
+TTS_USE_CUDA = os.getenv("TTS_USE_CUDA", "false").lower() == "true"
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "sln")  # wav (voice rate) | sln (8 kHz) | sln16 | ulaw (8 kHz)
+
+# TTS Engine Chain (primary first; local Piper is always the last resort)
+TTS_ENGINES = [e.strip() for e in os.getenv("TTS_ENGINES", TTS_ENGINE).split(",") if e.strip()]  # e.g. edge,piper
+TTS_PIPER_CONCURRENCY = int(os.getenv("TTS_PIPER_CONCURRENCY", os.getenv("TTS_WORKERS", 4)))
+TTS_EDGE_CONCURRENCY = int(os.getenv("TTS_EDGE_CONCURRENCY", 8))
+TTS_ENGINE_TIMEOUT = float(os.getenv("TTS_ENGINE_TIMEOUT", 5.0))  # seconds per synthesis before falling back
+TTS_BREAKER_WINDOW = int(os.getenv("TTS_BREAKER_WINDOW", 20))  # recent requests the breaker looks at
+TTS_BREAKER_MIN_SAMPLES = int(os.getenv("TTS_BREAKER_MIN_SAMPLES", 5))
+TTS_BREAKER_ERROR_RATE = float(os.getenv("TTS_BREAKER_ERROR_RATE", 0.5))  # open above this failure fraction
+TTS_BREAKER_LATENCY_MS = float(os.getenv("TTS_BREAKER_LATENCY_MS", 1500))  # or above this average latency
+TTS_BREAKER_COOLDOWN = float(os.getenv("TTS_BREAKER_COOLDOWN", 30))  # seconds before a trial request
+EDGE_TTS_WSS_URL = os.getenv("EDGE_TTS_WSS_URL", "")  # override the Edge endpoint (e.g. scripts/mock_edge_tts.py)
+EDGE_TTS_RATE = os.getenv("EDGE_TTS_RATE", "+15%")
+
+# TTS Cache (sharded, indexed, bounded)
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", 512))
+TTS_CACHE_MAX_ENTRIES = int(os.getenv("TTS_CACHE_MAX_ENTRIES", 20000))
+TTS_CACHE_POLICY = os.getenv("TTS_CACHE_POLICY", "lru")  # lru | lfu
+TTS_CACHE_INDEX_FLUSH_SECONDS = float(os.getenv("TTS_CACHE_INDEX_FLUSH_SECONDS", 30))
+
+# Pre-rendered responses (fixed agent replies cached before callers need them)
+TTS_PRERENDER = os.getenv("TTS_PRERENDER", "true").lower() == "true"
+TTS_PRERENDER_CONCURRENCY = int(os.getenv("TTS_PRERENDER_CONCURRENCY", 1))  # keep live calls ahead on the TTS pool
+TTS_TEMPLATE_SEGMENTS = os.getenv("TTS_TEMPLATE_SEGMENTS", "true").lower() == "true"  # play static parts + slot values
+
+# Response Pipelining (stream LLM sentences straight into TTS/playback)
+PIPELINED_RESPONSES = os.getenv("PIPELINED_RESPONSES", "true").lower() == "true"
+TTS_PIPELINE_DEPTH = int(os.getenv("TTS_PIPELINE_DEPTH", 2))  # sentences synthesized ahead of playback
+HANGUP_POLL_INTERVAL = 0.25  # seconds between hangup checks while waiting on the LLM
 
 # Company Information
 COMPANY_NAME = os.getenv("COMPANY_NAME", "AI Call Center")
@@ -52,6 +138,27 @@ MAX_CALL_DURATION = int(os.getenv("MAX_CALL_DURATION", 600))  # 10 minutes
 SILENCE_TIMEOUT = int(os.getenv("SILENCE_TIMEOUT", 10))  # seconds
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
 
+# Worker Pools (blocking ASR/TTS/DB work runs off the event loop)
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", 2))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 4))
+DB_WORKERS = int(os.getenv("DB_WORKERS", 4))
+POOL_MAX_QUEUE = int(os.getenv("POOL_MAX_QUEUE", 64))  # 0 = unbounded
+
+# Admission Control (overload protection for incoming calls)
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", 20))  # for the whole backend, shared by all AGI workers
+CALL_QUEUE_SIZE = int(os.getenv("CALL_QUEUE_SIZE", 10))  # callers held with hold audio
+CALL_QUEUE_TIMEOUT = int(os.getenv("CALL_QUEUE_TIMEOUT", 60))  # seconds before giving up
+ADMISSION_MAX_POOL_LOAD = float(os.getenv("ADMISSION_MAX_POOL_LOAD", 2.0))  # (active + queued) / workers
+ADMISSION_POLL_INTERVAL = 0.5
+HOLD_PROMPT = os.getenv("HOLD_PROMPT", "All of our agents are currently busy. Please stay on the line and we will be with you shortly.")
+CALLBACK_PROMPT = os.getenv("CALLBACK_PROMPT", "We are experiencing a very high volume of calls. Please call back in a few minutes. Goodbye.")
+
+# DTMF customer ID entry (keypad instead of speech when an ID is requested)
+DTMF_CUSTOMER_ID = os.getenv("DTMF_CUSTOMER_ID", "true").lower() == "true"
+DTMF_TIMEOUT_MS = int(os.getenv("DTMF_TIMEOUT_MS", 4000))
+DTMF_MAX_DIGITS = int(os.getenv("DTMF_MAX_DIGITS", 6))
+DTMF_PROMPT = os.getenv("DTMF_PROMPT", "You can enter it on your keypad followed by the pound key, or just say it.")
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = LOGS_DIR / "callcenter.log"
@@ -71,3 +178,4 @@ KB_FILE = KNOWLEDGE_DIR / "company_kb.json"
 ENABLE_RECORDING = os.getenv("ENABLE_RECORDING", "true").lower() == "true"
 ENABLE_ANALYTICS = os.getenv("ENABLE_ANALYTICS", "true").lower() == "true"
 ENABLE_SENTIMENT = os.getenv("ENABLE_SENTIMENT", "false").lower() == "true"
+ENABLE_TRACING = os.getenv("ENABLE_TRACING", "true").lower() == "true"
@@ -42,10 +42,45 @@ class Call(Base):
     
     # Relationships
     customer = relationship("Customer", back_populates="calls")
+    spans = relationship("CallSpan", back_populates="call")
+    metrics = relationship("CallMetric", back_populates="call")
     
     def __repr__(self):
         return f"<Call {self.id}: {self.caller_number}>"
 
+class CallSpan(Base):
+    """Per-turn latency span (record, ASR, LLM, TTS, playback...) for a call"""
+    __tablename__ = "call_spans"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Integer, ForeignKey("calls.id"), nullable=False, index=True)
+    turn = Column(Integer, default=0)  # 0 = greeting
+    stage = Column(String(50), index=True)
+    started_at = Column(DateTime, default=datetime.now, index=True)
+    offset_ms = Column(Float)  # from call start
+    duration_ms = Column(Float)
+    
+    # Relationships
+    call = relationship("Call", back_populates="spans")
+    
+    def __repr__(self):
+        return f"<CallSpan {self.call_id}/{self.turn}: {self.stage} {self.duration_ms}ms>"
+
+class CallMetric(Base):
+    """Per-call counter, e.g. ASR audio seconds saved by silence trimming"""
+    __tablename__ = "call_metrics"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Integer, ForeignKey("calls.id"), nullable=False, index=True)
+    name = Column(String(50), index=True)
+    value = Column(Float)
+    
+    # Relationships
+    call = relationship("Call", back_populates="metrics")
+    
+    def __repr__(self):
+        return f"<CallMetric {self.call_id}: {self.name}={self.value}>"
+
 class Ticket(Base):
     """Support ticket model"""
     __tablename__ = "tickets"
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+EAGI relay for streaming ASR
+
+Asterisk starts this script once per call via EAGI(). It loads nothing:
+it connects to the resident backend (EAGI_RELAY_PORT) and relays the AGI
+channel (stdin/stdout) and the caller's audio (fd 3) over that socket,
+so the call is served by the already-warm models of a running AGI worker.
+Standard library only, so it runs inside the Asterisk container.
+
+Usage (extensions.conf):
+    same => n,EAGI(eagi.py)                     ; backend:4574
+    same => n,EAGI(eagi.py,10.0.0.5:4574)       ; explicit host:port
+
+Upstream frames: kind (1 byte, A = AGI, U = audio), length (4 bytes,
+big-endian), payload. Downstream is the raw AGI channel.
+"""
+import os
+import socket
+import sys
+import threading
+
+EAGI_AUDIO_FD = 3
+CHUNK = 4096
+
+
+def relay_target():
+    """host, port from the EAGI() argument or EAGI_RELAY_HOST / EAGI_RELAY_PORT"""
+    target = sys.argv[1] if len(sys.argv) > 1 else ""
+    host, _, port = target.rpartition(":") if ":" in target else (target, "", "")
+    return host or os.getenv("EAGI_RELAY_HOST", "backend"), int(port or os.getenv("EAGI_RELAY_PORT", 4574))
+
+
+def pump(fd, kind, sock, lock):
+    """Forward everything readable on fd to the socket as frames of one kind"""
+    try:
+        while True:
+            data = os.read(fd, CHUNK)
+            if not data:
+                break
+            with lock:
+                sock.sendall(kind + len(data).to_bytes(4, "big") + data)
+    except OSError:
+        pass
+    finally:
+        if kind == b"A":
+            # Asterisk closed the AGI channel (hangup): tell the backend
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+
+def main():
+    host, port = relay_target()
+    try:
+        sock = socket.create_connection((host, port), timeout=5)
+    except OSError as e:
+        print(f"EAGI relay: cannot reach backend at {host}:{port}: {e}", file=sys.stderr)
+        return 1
+    sock.settimeout(None)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    lock = threading.Lock()
+    
+    threading.Thread(target=pump, args=(sys.stdin.fileno(), b"A", sock, lock), daemon=True).start()
+    threading.Thread(target=pump, args=(EAGI_AUDIO_FD, b"U", sock, lock), daemon=True).start()
+    
+    # Backend -> Asterisk until the backend ends the call
+    try:
+        while True:
+            data = sock.recv(CHUNK)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(sys.stdout.fileno(), view):]
+    except OSError:
+        pass
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
+import argparse
 import asyncio
 import uvicorn
 from loguru import logger
 from api.server import app
 from agi.agi_handler import AGIServer
+from agi.supervisor import AGISupervisor
+from runtime.worker_stats import use_worker_stats
 import config
 
 # Configure logging
@@ -43,9 +46,42 @@ async def main():
         start_api_server()
     )
 
+def run_api_process():
+    """API worker body for supervisor mode"""
+    # Calls run in the AGI workers: report their stats, not this process's
+    use_worker_stats()
+    asyncio.run(start_api_server())
+
+def run_supervisor(workers):
+    """Pre-fork mode: load models once and run N AGI worker processes plus the API"""
+    logger.info("=" * 50)
+    logger.info(f"Starting {config.COMPANY_NAME} System ({workers} AGI workers)")
+    logger.info("=" * 50)
+    
+    supervisor = AGISupervisor(
+        server_factory=lambda: AGIServer(host="0.0.0.0", port=config.ASTERISK_AGI_PORT),
+        host="0.0.0.0",
+        port=config.ASTERISK_AGI_PORT,
+        workers=workers,
+        api_target=run_api_process
+    )
+    supervisor.run()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"{config.COMPANY_NAME} backend")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.AGI_WORKERS,
+        help="Number of AGI worker processes (default: AGI_WORKERS, 1 = single process)"
+    )
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(main())
+        if args.workers > 1:
+            run_supervisor(args.workers)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Shutting down gracefully...")
     except Exception as e:
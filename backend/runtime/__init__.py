@@ -0,0 +1 @@
+"""Runtime execution module for offloading blocking work"""
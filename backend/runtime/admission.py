@@ -0,0 +1,184 @@
+"""Admission control and overload queueing for incoming calls"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from loguru import logger
+import config
+from runtime.executor import pool_stats
+
+ADMIT = "admit"
+QUEUE = "queue"
+REJECT = "reject"
+
+
+def pool_load():
+    """
+    Current load of the busiest worker pool
+    
+    Returns:
+        float: (active + queued) / workers for the most loaded pool, 0.0 if none
+    """
+    load = 0.0
+    for stats in pool_stats().values():
+        if stats["workers"]:
+            load = max(load, (stats["active"] + stats["queue_depth"]) / stats["workers"])
+    return load
+
+
+class AdmissionController:
+    """
+    Decides whether a new call is served now, held in a bounded queue, or
+    turned away, based on the number of live calls and worker pool load
+    
+    MAX_CONCURRENT_CALLS and CALL_QUEUE_SIZE are limits for the whole
+    backend. Under the pre-fork supervisor the call counts live in shared
+    memory (one slot per worker, see track_workers), so N workers still
+    admit at most max_calls calls between them. Pool load stays per
+    worker: each worker has its own pools.
+    """
+    
+    def __init__(self, max_calls=None, max_queue=None, queue_timeout=None, max_pool_load=None):
+        self.max_calls = max_calls if max_calls is not None else config.MAX_CONCURRENT_CALLS
+        self.max_queue = max_queue if max_queue is not None else config.CALL_QUEUE_SIZE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else config.CALL_QUEUE_TIMEOUT
+        self.max_pool_load = max_pool_load if max_pool_load is not None else config.ADMISSION_MAX_POOL_LOAD
+        # Per-worker call counts; shared arrays once track_workers is called
+        self._active = [0]
+        self._waiting = [0]
+        self._lock = threading.Lock()
+        self.worker_index = 0
+        self.counters = {
+            "admitted": 0,
+            "queued": 0,
+            "admitted_from_queue": 0,
+            "rejected": 0,
+            "queue_timeouts": 0,
+            "abandoned": 0,
+        }
+        self._queue_wait_ms = 0.0
+        self._last_load = 0.0
+    
+    def track_workers(self, count):
+        """
+        Share call counts across forked processes
+        
+        Called by the pre-fork supervisor before forking; each worker then
+        sets worker_index to its slot.
+        """
+        self._lock = multiprocessing.Lock()
+        self._active = multiprocessing.Array("i", count, lock=False)
+        self._waiting = multiprocessing.Array("i", count, lock=False)
+    
+    def reset_worker(self, index):
+        """Zero a worker slot (it is being (re)started, its calls are gone)"""
+        with self._lock:
+            self._active[index] = 0
+            self._waiting[index] = 0
+    
+    @property
+    def active(self):
+        """Admitted calls in progress, across all workers"""
+        return sum(self._active)
+    
+    @property
+    def waiting(self):
+        """Calls waiting in the queue, across all workers"""
+        return sum(self._waiting)
+    
+    def _has_capacity(self):
+        self._last_load = pool_load()
+        return self.active < self.max_calls and self._last_load < self.max_pool_load
+    
+    def _admit_if_capacity(self):
+        """Take a call slot if there is room; check and increment are atomic across workers"""
+        with self._lock:
+            if not self._has_capacity():
+                return False
+            self._active[self.worker_index] += 1
+            return True
+    
+    def try_admit(self):
+        """
+        Make the admission decision for a new call
+        
+        Returns:
+            str: ADMIT, QUEUE or REJECT
+        """
+        with self._lock:
+            if self.waiting == 0 and self._has_capacity():
+                self._active[self.worker_index] += 1
+                decision = ADMIT
+                self.counters["admitted"] += 1
+            elif self.waiting < self.max_queue:
+                self._waiting[self.worker_index] += 1
+                decision = QUEUE
+                self.counters["queued"] += 1
+            else:
+                decision = REJECT
+                self.counters["rejected"] += 1
+        
+        logger.info(
+            f"Admission: {decision} (active {self.active}/{self.max_calls}, "
+            f"waiting {self.waiting}/{self.max_queue}, pool load {self._last_load:.2f})"
+        )
+        return decision
+    
+    async def wait(self):
+        """
+        Wait in the queue for capacity (call after a QUEUE decision)
+        
+        Returns:
+            bool: True if the call was admitted, False on queue timeout
+        """
+        started = time.monotonic()
+        try:
+            while time.monotonic() - started < self.queue_timeout:
+                if self._admit_if_capacity():
+                    self.counters["admitted_from_queue"] += 1
+                    self._queue_wait_ms += (time.monotonic() - started) * 1000
+                    return True
+                await asyncio.sleep(config.ADMISSION_POLL_INTERVAL)
+            
+            self.counters["queue_timeouts"] += 1
+            return False
+        except asyncio.CancelledError:
+            self.counters["abandoned"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._waiting[self.worker_index] = max(0, self._waiting[self.worker_index] - 1)
+    
+    def release(self):
+        """Free the slot of a finished admitted call"""
+        with self._lock:
+            self._active[self.worker_index] = max(0, self._active[self.worker_index] - 1)
+    
+    def stats(self):
+        """Get live admission metrics"""
+        served_from_queue = self.counters["admitted_from_queue"]
+        return {
+            "max_concurrent_calls": self.max_calls,
+            "max_queue": self.max_queue,
+            "active_calls": self.active,
+            "waiting_calls": self.waiting,
+            "worker_active_calls": self._active[self.worker_index],
+            "worker_waiting_calls": self._waiting[self.worker_index],
+            "pool_load": round(pool_load(), 3),
+            "max_pool_load": self.max_pool_load,
+            "queue_wait_ms_avg": round(self._queue_wait_ms / served_from_queue, 2) if served_from_queue else 0.0,
+            **self.counters,
+        }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Get the process-wide admission controller"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
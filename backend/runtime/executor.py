@@ -0,0 +1,169 @@
+"""Bounded worker pools that keep blocking ASR, TTS and DB work off the event loop"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+import config
+
+
+class PoolFullError(RuntimeError):
+    """Raised when a pool's wait queue is already at its limit"""
+
+
+class WorkerPool:
+    """Thread pool with a bounded wait queue and queue/wait-time statistics"""
+    
+    def __init__(self, name, max_workers, max_queue=0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-pool"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_ms = deque(maxlen=1000)
+        self._run_ms = deque(maxlen=1000)
+        logger.info(f"Worker pool '{name}' started ({max_workers} workers, queue limit {max_queue or 'none'})")
+    
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the pool and await its result
+        
+        Args:
+            func: Blocking callable
+            *args, **kwargs: Arguments for the callable
+            
+        Returns:
+            The callable's return value
+        """
+        with self._lock:
+            idle_workers = max(0, self.max_workers - self._active)
+            if self.max_queue and self._queued - idle_workers >= self.max_queue:
+                self._rejected += 1
+                raise PoolFullError(f"{self.name} pool queue is full ({self._queued} waiting)")
+            self._queued += 1
+            self._submitted += 1
+        
+        submitted_at = time.perf_counter()
+        
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_ms.append((started_at - submitted_at) * 1000)
+            
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._run_ms.append((time.perf_counter() - started_at) * 1000)
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+        
+        # Carry context (e.g. the call trace) into the worker thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, context.run, task)
+    
+    @property
+    def queue_depth(self):
+        """Number of tasks waiting for a free worker"""
+        return self._queued
+    
+    @property
+    def utilization(self):
+        """Fraction of workers currently busy"""
+        return self._active / self.max_workers if self.max_workers else 0.0
+    
+    def stats(self):
+        """Get a snapshot of pool statistics"""
+        with self._lock:
+            wait_ms = sorted(self._wait_ms)
+            run_ms = list(self._run_ms)
+            snapshot = {
+                "name": self.name,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+        
+        snapshot["utilization"] = round(snapshot["active"] / self.max_workers, 3) if self.max_workers else 0.0
+        snapshot["wait_ms_avg"] = round(sum(wait_ms) / len(wait_ms), 2) if wait_ms else 0.0
+        snapshot["wait_ms_p95"] = round(wait_ms[min(len(wait_ms) - 1, int(len(wait_ms) * 0.95))], 2) if wait_ms else 0.0
+        snapshot["wait_ms_max"] = round(wait_ms[-1], 2) if wait_ms else 0.0
+        snapshot["run_ms_avg"] = round(sum(run_ms) / len(run_ms), 2) if run_ms else 0.0
+        return snapshot
+    
+    def shutdown(self, wait=True):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+        logger.info(f"Worker pool '{self.name}' stopped")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+_POOL_SIZES = {
+    "asr": lambda: config.ASR_WORKERS,
+    "tts": lambda: config.TTS_WORKERS,
+    "db": lambda: config.DB_WORKERS,
+}
+
+
+def get_pool(name):
+    """
+    Get (or lazily create) the shared pool for a workload
+    
+    Args:
+        name: One of 'asr', 'tts' or 'db'
+        
+    Returns:
+        WorkerPool: Process-wide pool for that workload
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            if name not in _POOL_SIZES:
+                raise ValueError(f"Unknown worker pool: {name}")
+            pool = WorkerPool(name, _POOL_SIZES[name](), config.POOL_MAX_QUEUE)
+            _pools[name] = pool
+        return pool
+
+
+def pool_stats():
+    """Get statistics for every pool created in this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def shutdown_pools(wait=True):
+    """Shut down all pools created in this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
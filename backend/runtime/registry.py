@@ -0,0 +1,240 @@
+"""Process-wide registry that loads and warms the ASR, TTS and agent models once"""
+import asyncio
+import multiprocessing
+import threading
+import time
+import numpy as np
+from loguru import logger
+import config
+
+PENDING = "pending"
+LOADING = "loading"
+LOADED = "loaded"  # weights in memory, warm-up not run yet
+READY = "ready"
+FAILED = "failed"
+
+COMPONENTS = ("asr", "tts", "agent")
+
+WARMUP_TEXT = "Hello, I would like to check my account."
+
+
+def _load_asr():
+    from asr.whisper_engine import WhisperASR
+    return WhisperASR()
+
+
+def _warm_asr(asr):
+    # Low-level noise so the decoder actually runs (prepare() would skip silence)
+    noise = np.random.default_rng(0).normal(0, 0.01, config.SAMPLE_RATE).astype(np.float32)
+    asr.backend.transcribe(noise, config.WHISPER_LANGUAGE)
+
+
+def _load_tts():
+    from tts.engines import create_tts
+    return create_tts()
+
+
+def _warm_tts(tts):
+    tts.warm(WARMUP_TEXT)
+
+
+def _load_agent():
+    from agent.agent import AIAgent
+    return AIAgent()
+
+
+def _warm_agent(agent):
+    agent.classify_intent(WARMUP_TEXT)
+    if agent.use_llm:
+        # Pulls the LLM into memory on the model server before the first caller
+        async def warm_llm():
+            await agent.get_smart_response(WARMUP_TEXT, [], call_id="warmup")
+            await agent.llm.aclose()  # this loop's connections die with it
+        asyncio.run(warm_llm())
+
+
+LOADERS = {
+    "asr": (_load_asr, _warm_asr),
+    "tts": (_load_tts, _warm_tts),
+    "agent": (_load_agent, _warm_agent),
+}
+
+
+class ModelRegistry:
+    """
+    Loads each model once per process and runs a warm-up inference on it
+    
+    Loading happens on a background thread so the event loop (and the API's
+    /health endpoint) stays responsive; callers either await readiness or
+    fall back to a blocking lazy load on first use.
+    """
+    
+    def __init__(self):
+        self._models = {}
+        self._status = {name: PENDING for name in COMPONENTS}
+        self._errors = {}
+        self._timings = {}
+        self._requested = set()
+        self._locks = {name: threading.Lock() for name in COMPONENTS}
+        self._task = None
+        self._worker_ready = None  # shared flags, pre-fork mode only
+        self.worker_index = None
+    
+    def _load_one(self, name, warm=True):
+        """Load (and optionally warm) a single component; blocking and idempotent"""
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None and (self._status[name] == READY or not warm):
+                return model
+            
+            if model is None:
+                load, _ = LOADERS[name]
+                self._status[name] = LOADING
+                try:
+                    started = time.perf_counter()
+                    model = load()
+                except Exception as e:
+                    self._status[name] = FAILED
+                    self._errors[name] = str(e)
+                    logger.error(f"Failed to load model '{name}': {e}")
+                    raise
+                self._timings[name] = {"load_seconds": round(time.perf_counter() - started, 3)}
+                self._models[name] = model
+                self._status[name] = LOADED
+                logger.info(f"Model '{name}' loaded in {self._timings[name]['load_seconds']:.2f}s")
+            
+            if warm:
+                _, warm_up = LOADERS[name]
+                started = time.perf_counter()
+                try:
+                    warm_up(model)
+                except Exception as e:
+                    # A cold model still works; the first caller just pays the warm-up
+                    logger.warning(f"Warm-up for '{name}' failed: {e}")
+                self._timings[name]["warmup_seconds"] = round(time.perf_counter() - started, 3)
+                self._status[name] = READY
+                logger.info(f"Model '{name}' ready (warm-up {self._timings[name]['warmup_seconds']:.2f}s)")
+            return model
+    
+    def load(self, components=COMPONENTS, warm=True):
+        """
+        Load and warm components in the calling thread
+        
+        Args:
+            components: Names to load (default: all)
+            warm: Run the warm-up inference; the pre-fork supervisor skips it so
+                inference thread pools are only created in the workers
+        
+        Returns:
+            bool: True if every requested component is loaded (and warm)
+        """
+        self._requested.update(components)
+        for name in components:
+            try:
+                self._load_one(name, warm)
+            except Exception:
+                pass
+        if not warm:
+            return all(name in self._models for name in components)
+        ready = self.is_ready(components)
+        if ready and self._worker_ready is not None and self.worker_index is not None:
+            self._worker_ready[self.worker_index] = 1
+        return ready
+    
+    def start(self, components=COMPONENTS):
+        """
+        Begin loading components on a background thread
+        
+        Args:
+            components: Names to load (default: all)
+        
+        Returns:
+            asyncio.Task that completes once loading has finished
+        """
+        self._requested.update(components)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                asyncio.to_thread(self.load, tuple(components))
+            )
+        return self._task
+    
+    async def wait_ready(self, components=COMPONENTS):
+        """
+        Start loading (if needed) and wait until components are ready
+        
+        Returns:
+            bool: True if every requested component loaded successfully
+        """
+        if self.is_ready(components):
+            return True
+        self._requested.update(components)
+        pending = tuple(name for name in components if self._status[name] != READY)
+        return await asyncio.to_thread(self.load, pending)
+    
+    async def get_async(self, name):
+        """Return a component, loading it off the event loop if necessary"""
+        if self._status[name] == READY:
+            return self._models[name]
+        self._requested.add(name)
+        return await asyncio.to_thread(self._load_one, name)
+    
+    def get(self, name):
+        """Return a component, loading it in this thread if necessary (lazy)"""
+        if self._status[name] == READY:
+            return self._models[name]
+        self._requested.add(name)
+        return self._load_one(name)
+    
+    def is_ready(self, components=None):
+        """True if all given (default: all requested) components are loaded and warm"""
+        components = components if components is not None else self._requested
+        return all(self._status[name] == READY for name in components)
+    
+    def track_workers(self, count):
+        """
+        Share per-worker readiness across forked processes
+        
+        Called by the pre-fork supervisor before forking, so the API process
+        can report whether any AGI worker has warm models.
+        """
+        self._worker_ready = multiprocessing.Array("b", count, lock=False)
+    
+    def reset_worker(self, index):
+        """Mark a worker slot cold (it is being (re)started)"""
+        if self._worker_ready is not None:
+            self._worker_ready[index] = 0
+    
+    def status(self):
+        """Readiness summary for /health"""
+        if self._worker_ready is not None:
+            warm_workers = sum(self._worker_ready)
+            return {
+                "ready": warm_workers > 0,
+                "workers": len(self._worker_ready),
+                "workers_ready": warm_workers,
+                "models": {name: {"status": self._status[name], **self._timings.get(name, {})} for name in COMPONENTS},
+            }
+        
+        return {
+            "ready": self.is_ready(),
+            "models": {
+                name: {
+                    "status": self._status[name],
+                    **self._timings.get(name, {}),
+                    **({"error": self._errors[name]} if name in self._errors else {}),
+                }
+                for name in COMPONENTS
+                if name in self._requested or self._status[name] != PENDING
+            },
+        }
+
+
+_registry = None
+
+
+def get_model_registry():
+    """Get the process-wide model registry"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,122 @@
+"""Span-style per-turn latency tracing for calls"""
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from loguru import logger
+import config
+
+_current_trace = contextvars.ContextVar("call_trace", default=None)
+
+
+class CallTrace:
+    """Collects timed spans for one call, grouped by conversation turn"""
+    
+    def __init__(self, call_id):
+        self.call_id = call_id
+        self.turn = 0
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.spans = []
+        self.metrics = {}
+    
+    def record(self, stage, start, end, turn=None):
+        """Record a finished span (perf_counter timestamps)"""
+        self.spans.append({
+            "turn": self.turn if turn is None else turn,
+            "stage": stage,
+            "offset_ms": round((start - self.started) * 1000, 2),
+            "duration_ms": round((end - start) * 1000, 2),
+        })
+
+
+def add_metric(name, value):
+    """Accumulate a per-call counter (e.g. audio seconds trimmed) on the current trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.metrics[name] = trace.metrics.get(name, 0.0) + value
+
+
+def start_trace(call_id):
+    """Begin tracing the call handled by the current task"""
+    if not config.ENABLE_TRACING:
+        return None
+    trace = CallTrace(call_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    """Get the trace for the current call, if any"""
+    return _current_trace.get()
+
+
+def set_turn(turn):
+    """Attribute subsequent spans to the given conversation turn"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.turn = turn
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a block of work as a stage of the current turn
+    
+    A no-op when the current call is not being traced.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    
+    turn = trace.turn
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(stage, start, time.perf_counter(), turn)
+
+
+def save_trace(trace):
+    """Persist a call's spans and metrics (blocking, run on the DB pool)"""
+    if trace is None or not (trace.spans or trace.metrics):
+        return 0
+    
+    from db.database import SessionLocal
+    from db.models import CallMetric, CallSpan
+    
+    db = SessionLocal()
+    try:
+        db.add_all([
+            CallSpan(
+                call_id=trace.call_id,
+                turn=s["turn"],
+                stage=s["stage"],
+                started_at=trace.started_at + timedelta(milliseconds=s["offset_ms"]),
+                offset_ms=s["offset_ms"],
+                duration_ms=s["duration_ms"],
+            )
+            for s in trace.spans
+        ])
+        db.add_all([
+            CallMetric(call_id=trace.call_id, name=name, value=round(value, 3))
+            for name, value in trace.metrics.items()
+        ])
+        db.commit()
+        if trace.metrics:
+            logger.info(f"[Call {trace.call_id}] Metrics: {', '.join(f'{k}={v:.2f}' for k, v in trace.metrics.items())}")
+        logger.debug(f"[Call {trace.call_id}] Saved {len(trace.spans)} trace spans")
+        return len(trace.spans)
+    finally:
+        db.close()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,127 @@
+"""Per-worker stats snapshots, so the API process can report on pre-forked AGI workers"""
+import asyncio
+import json
+import os
+import time
+from loguru import logger
+import config
+
+# Set in the API process when calls run in forked AGI workers
+_from_workers = False
+
+
+def _sections():
+    """Section name -> function returning this process's stats for it"""
+    from agent.intent_model import intent_model_stats
+    from agent.llm_client import get_llm_client
+    from agent.response_cache import get_response_cache
+    from agent.state_store import get_conversation_store
+    from asr.service import asr_service_stats
+    from asr.vad import vad_stats
+    from runtime.admission import get_admission_controller
+    from runtime.executor import pool_stats
+    from tts.cache import tts_cache_stats
+    from tts.engines import tts_engine_stats
+    
+    return {
+        "pools": pool_stats,
+        "admission": lambda: get_admission_controller().stats(),
+        "asr": lambda: {**asr_service_stats(), "vad": vad_stats()},
+        "llm": lambda: {**get_llm_client().stats(), "cache": get_response_cache().stats()},
+        "intent": intent_model_stats,
+        "sessions": lambda: get_conversation_store().stats(),
+        "tts": lambda: {"engines": tts_engine_stats(), "cache": tts_cache_stats()},
+    }
+
+
+def local_stats(section):
+    """Stats of one section for this process"""
+    return _sections()[section]()
+
+
+def snapshot():
+    """Every section for this process, plus who and when"""
+    stats = {name: stats_fn() for name, stats_fn in _sections().items()}
+    return {"pid": os.getpid(), "updated": time.time(), **stats}
+
+
+def reset():
+    """Drop snapshots left by a previous run (called by the supervisor before forking)"""
+    config.WORKER_STATS_DIR.mkdir(parents=True, exist_ok=True)
+    for path in config.WORKER_STATS_DIR.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def use_worker_stats():
+    """Report the AGI workers' published snapshots instead of this process's idle objects"""
+    global _from_workers
+    _from_workers = True
+
+
+def write_snapshot(slot):
+    """Write this process's snapshot as <slot>.json, atomically"""
+    path = config.WORKER_STATS_DIR / f"{slot}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot(), default=str))
+    tmp_path.replace(path)
+
+
+async def publish_forever(slot, interval=None):
+    """
+    Publish this worker's snapshot every WORKER_STATS_INTERVAL seconds
+    
+    Args:
+        slot: Supervisor slot name (e.g. "agi-0"), the snapshot's file name
+        interval: Seconds between snapshots
+    """
+    interval = interval or config.WORKER_STATS_INTERVAL
+    config.WORKER_STATS_DIR.mkdir(parents=True, exist_ok=True)
+    while True:
+        try:
+            write_snapshot(slot)
+        except Exception as e:
+            logger.debug(f"Could not publish stats for {slot}: {e}")
+        await asyncio.sleep(interval)
+
+
+def published():
+    """
+    Latest snapshot of every AGI worker
+    
+    Returns:
+        dict: slot -> snapshot, with its age in seconds
+    """
+    snapshots = {}
+    now = time.time()
+    for path in sorted(config.WORKER_STATS_DIR.glob("*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        data["age_s"] = round(now - data.get("updated", now), 1)
+        snapshots[path.stem] = data
+    return snapshots
+
+
+def system_stats(section):
+    """
+    Stats of one section for the /system endpoints
+    
+    In single-process mode this is the process's own state. Under the
+    supervisor the API process serves no calls, so it returns each AGI
+    worker's last published snapshot instead. Snapshots older than a few
+    intervals belong to a worker that died or hung.
+    
+    Args:
+        section: One of pools, admission, asr, llm, intent, sessions, tts
+    
+    Returns:
+        dict: The section's stats, or {"workers": {slot: stats}} under the supervisor
+    """
+    if not _from_workers:
+        return local_stats(section)
+    
+    workers = {}
+    for slot, data in published().items():
+        workers[slot] = {"pid": data.get("pid"), "age_s": data["age_s"], **data.get(section, {})}
+    return {"workers": workers}
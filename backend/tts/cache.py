@@ -0,0 +1,301 @@
+"""Bounded, indexed on-disk cache for synthesized speech"""
+import atexit
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from loguru import logger
+import config
+
+INDEX_FILE = "index.json"
+
+# Evict down to this fraction of the budget so eviction runs in batches
+LOW_WATER = 0.9
+
+
+class TTSCache:
+    """
+    Audio cache with a byte and entry budget and LRU or LFU eviction
+    
+    Files live in 256 shard directories (first two hex digits of the key) so
+    no single directory grows huge. An index of size, hit count and last
+    access per entry is kept in memory and persisted to index.json, so
+    startup never scans the tree.
+    
+    Several processes (pre-fork workers) may share one directory; files a
+    sibling wrote are adopted on first lookup and index flushes merge with
+    what is already on disk.
+    """
+    
+    def __init__(self, root, max_bytes=None, max_entries=None, policy=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else config.TTS_CACHE_MAX_MB * 1024 * 1024
+        self.max_entries = max_entries if max_entries is not None else config.TTS_CACHE_MAX_ENTRIES
+        self.policy = (policy or config.TTS_CACHE_POLICY).lower()
+        
+        # key -> {"file", "size", "hits", "last"}; ordered by recency for LRU
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0}
+        
+        self._lock = threading.Lock()
+        self._removed = set()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        
+        self._load_index()
+        atexit.register(self.flush)
+    
+    @staticmethod
+    def key(*parts):
+        """Cache key for the given synthesis parameters (text, voice, rate, ...)"""
+        return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    
+    def path(self, key, ext):
+        """Sharded location for a key; creates the shard directory"""
+        shard = self.root / key[:2]
+        shard.mkdir(exist_ok=True)
+        return shard / f"{key}.{ext}"
+    
+    def get(self, key, ext):
+        """
+        Look up a cached file
+        
+        Args:
+            key: Cache key from key()
+            ext: File extension ("wav", "mp3", ...)
+        
+        Returns:
+            str: Path to the cached file, or None on a miss
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["file"].endswith(f".{ext}"):
+                file_path = self.root / entry["file"]
+                if file_path.exists():
+                    entry["hits"] += 1
+                    entry["last"] = time.time()
+                    self.entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    self._dirty = True
+                    return str(file_path)
+                # Deleted behind our back (or evicted by a sibling worker)
+                self._drop(key)
+            
+            # Written by another process sharing the directory
+            file_path = self.root / key[:2] / f"{key}.{ext}"
+            if file_path.exists():
+                if key in self.entries:
+                    self._drop(key)
+                # Adopting the file is its first use here
+                self._insert(key, file_path, file_path.stat().st_size, hits=1)
+                self.counters["hits"] += 1
+                return str(file_path)
+            
+            self.counters["misses"] += 1
+            return None
+    
+    def add(self, key, file_path):
+        """
+        Record a newly written file and evict if over budget
+        
+        Args:
+            key: Cache key the file was written for
+            file_path: Path returned by path()
+        """
+        file_path = Path(file_path)
+        size = file_path.stat().st_size
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self._insert(key, file_path, size)
+            # The caller is about to play this file: never evict it in the same call
+            self._evict(keep=key)
+        self._maybe_flush()
+    
+    def _insert(self, key, file_path, size, hits=0):
+        self.entries[key] = {
+            "file": str(file_path.relative_to(self.root)),
+            "size": size,
+            "hits": hits,
+            "last": time.time(),
+        }
+        self.total_bytes += size
+        self._removed.discard(key)
+        self._dirty = True
+    
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["size"]
+        self._removed.add(key)
+        self._dirty = True
+        return entry
+    
+    def _over(self, fraction=1.0):
+        return (self.total_bytes > self.max_bytes * fraction or
+                len(self.entries) > self.max_entries * fraction)
+    
+    def _victims(self, keep=None):
+        """
+        Keys in eviction order, for one eviction run
+        
+        LRU takes the front of the recency order. LFU heapifies (hits, last
+        access) once per run and pops from it, instead of scanning every
+        entry for each victim.
+        
+        Args:
+            keep: Key that must not be evicted (the entry just added)
+        """
+        if self.policy == "lfu":
+            heap = [(entry["hits"], entry["last"], key) for key, entry in self.entries.items() if key != keep]
+            heapq.heapify(heap)
+            while heap:
+                yield heapq.heappop(heap)[2]
+        else:
+            for _ in range(len(self.entries)):
+                key = next(iter(self.entries))
+                if key == keep:
+                    self.entries.move_to_end(key)
+                    continue
+                yield key
+    
+    def _evict(self, keep=None):
+        if not self._over():
+            return
+        
+        evicted = 0
+        for key in self._victims(keep):
+            if not self._over(LOW_WATER):
+                break
+            entry = self._drop(key)
+            try:
+                (self.root / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            self.counters["evictions"] += 1
+            self.counters["evicted_bytes"] += entry["size"]
+            evicted += 1
+        
+        logger.debug(f"TTS cache evicted {evicted} entries ({self.policy}), {len(self.entries)} left")
+    
+    def _load_index(self):
+        index_path = self.root / INDEX_FILE
+        if index_path.exists():
+            try:
+                entries = json.loads(index_path.read_text())
+                for key, entry in sorted(entries.items(), key=lambda item: item[1]["last"]):
+                    self.entries[key] = entry
+                    self.total_bytes += entry["size"]
+                logger.info(f"TTS cache index loaded: {len(self.entries)} entries, {self.total_bytes / 1e6:.1f} MB")
+                return
+            except Exception as e:
+                logger.warning(f"TTS cache index unreadable ({e}), rebuilding")
+                self.entries.clear()
+                self.total_bytes = 0
+        
+        self._rebuild_index()
+    
+    def _rebuild_index(self):
+        """One-off scan when there is no index yet; also shards a legacy flat cache"""
+        for file_path in list(self.root.iterdir()):
+            if file_path.is_file() and file_path.suffix in (".wav", ".mp3", ".sln", ".ulaw") and len(file_path.stem) == 32:
+                target = self.path(file_path.stem, file_path.suffix[1:])
+                file_path.replace(target)
+        
+        for file_path in self.root.glob("??/*.*"):
+            if file_path.name.endswith(".tmp"):
+                continue
+            stat = file_path.stat()
+            self.entries[file_path.stem] = {
+                "file": str(file_path.relative_to(self.root)),
+                "size": stat.st_size,
+                "hits": 0,
+                "last": stat.st_mtime,
+            }
+            self.total_bytes += stat.st_size
+        
+        self.entries = OrderedDict(sorted(self.entries.items(), key=lambda item: item[1]["last"]))
+        self._dirty = True
+        logger.info(f"TTS cache index built: {len(self.entries)} entries, {self.total_bytes / 1e6:.1f} MB")
+        with self._lock:
+            self._evict()
+        self.flush()
+    
+    def _maybe_flush(self):
+        if self._dirty and time.monotonic() - self._last_flush >= config.TTS_CACHE_INDEX_FLUSH_SECONDS:
+            self.flush()
+    
+    def flush(self):
+        """Persist the index (merged with entries other processes added)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self.entries)
+            removed = set(self._removed)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        
+        index_path = self.root / INDEX_FILE
+        try:
+            if index_path.exists():
+                on_disk = json.loads(index_path.read_text())
+                for key, entry in on_disk.items():
+                    if key not in entries and key not in removed:
+                        entries[key] = entry
+            
+            tmp_path = index_path.with_name(f"{INDEX_FILE}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(entries))
+            tmp_path.replace(index_path)
+            with self._lock:
+                self._removed -= removed
+        except Exception as e:
+            logger.error(f"Failed to write TTS cache index: {e}")
+    
+    def clear(self):
+        """Delete every cached file"""
+        with self._lock:
+            for key in list(self.entries):
+                entry = self._drop(key)
+                try:
+                    (self.root / entry["file"]).unlink()
+                except FileNotFoundError:
+                    pass
+            self.total_bytes = 0
+        self.flush()
+    
+    def stats(self):
+        """Cache size, budget and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "policy": self.policy,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(root=None):
+    """Get the shared cache for a directory (default: DATA_DIR/tts_cache)"""
+    root = Path(root or config.DATA_DIR / "tts_cache").resolve()
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = TTSCache(root)
+        return _caches[root]
+
+
+def tts_cache_stats():
+    """Stats for every cache in this process"""
+    return {str(root): cache.stats() for root, cache in _caches.items()}
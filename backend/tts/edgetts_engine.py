@@ -1,9 +1,53 @@
 import edge_tts
+import edge_tts.communicate
 import asyncio
-import os
+import threading
 from pathlib import Path
-import hashlib
+import numpy as np
 from loguru import logger
+import config
+from runtime.tracing import span
+from tts.cache import get_tts_cache
+from tts.output import output_profile, write_output
+
+# Edge streams 24 kHz mono MP3 ("audio-24khz-48kbitrate-mono-mp3")
+EDGE_SAMPLE_RATE = 24000
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    """Event loop on a daemon thread, shared by all blocking synthesize() calls"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="edge-tts-loop", daemon=True).start()
+        return _loop
+
+
+async def decode_mp3(audio, sample_rate):
+    """
+    Decode MP3 bytes to int16 mono PCM with ffmpeg, off the event loop
+    
+    Args:
+        audio: MP3 bytes
+        sample_rate: Rate to decode at
+    
+    Returns:
+        numpy array: int16 PCM
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await process.communicate(audio)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode Edge audio: {err.decode(errors='replace').strip()[:200]}")
+    return np.frombuffer(out, dtype="<i2").astype(np.int16)
+
 
 class EdgeTTSEngine:
     """
@@ -12,10 +56,19 @@ class EdgeTTSEngine:
     """
     
     def __init__(self):
-        # Use absolute path to avoid issues
-        base_dir = Path(__file__).parent.parent
-        self.cache_dir = base_dir / "data" / "tts_cache"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = config.DATA_DIR / "tts_cache"
+        self.cache = get_tts_cache(self.cache_dir)
+        
+        # Same Asterisk-native output as Piper, so both engines' files play
+        # without transcoding and share one cache format
+        self.output_format = config.TTS_OUTPUT_FORMAT
+        self.extension, target_rate = output_profile(self.output_format)
+        self.sample_rate = target_rate or EDGE_SAMPLE_RATE
+        
+        # Point the client at another endpoint (e.g. the local mock for tests)
+        if config.EDGE_TTS_WSS_URL:
+            edge_tts.communicate.WSS_URL = config.EDGE_TTS_WSS_URL
+            logger.info(f"Edge-TTS endpoint: {config.EDGE_TTS_WSS_URL}")
         
         # Best voices for natural conversation
         self.voices = {
@@ -29,76 +82,77 @@ class EdgeTTSEngine:
         logger.info(f"Edge-TTS initialized with voice: {self.current_voice}")
         logger.info(f"TTS cache directory: {self.cache_dir}")
     
-    async def synthesize_async(self, text, voice=None, rate="+15%"):
+    async def synthesize_async(self, text, voice=None, rate=None):
         """
         Synthesize speech asynchronously
         
+        A single attempt: failures raise, so the engine router can count them
+        and fall back to the local voice instead of sleeping between retries.
+        
         Args:
             text: Text to synthesize
             voice: Voice to use (optional)
-            rate: Speech rate (default "+15%" for faster speech)
-                  Can be: "+X%" (faster), "-X%" (slower), or "X%" (absolute)
-            
+            rate: Speech rate (default EDGE_TTS_RATE, "+15%" for faster speech)
+                  Can be: "+X%" (faster) or "-X%" (slower)
+        
         Returns:
-            Path to audio file (absolute path)
+            Path to audio file in TTS_OUTPUT_FORMAT (absolute path)
         """
-        try:
-            if not text or len(text.strip()) == 0:
-                logger.warning("Empty text provided to TTS")
-                return None
-            
-            # Clean text (remove special characters that might cause issues)
-            text = text.strip()
-            
-            # Use cache with rate included
-            cache_key = hashlib.md5(f"{text}{voice or self.current_voice}{rate}".encode()).hexdigest()
-            audio_file = self.cache_dir / f"{cache_key}.mp3"
-            
-            if audio_file.exists() and audio_file.stat().st_size > 0:
-                logger.debug(f"Using cached TTS: {text[:50]}...")
-                return str(audio_file.absolute())
-            
-            # Generate speech with retry logic and rate control
-            voice_to_use = voice or self.current_voice
-            max_retries = 3
-            
-            for attempt in range(max_retries):
-                try:
-                    # Use SSML to control speech rate for faster speech
-                    ssml_text = f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US"><prosody rate="{rate}">{text}</prosody></speak>'
-                    communicate = edge_tts.Communicate(ssml_text, voice_to_use)
-                    await communicate.save(str(audio_file))
-                    
-                    # Verify file was created and has content
-                    if audio_file.exists() and audio_file.stat().st_size > 0:
-                        logger.info(f"Generated TTS: {text[:50]}... ({audio_file.stat().st_size} bytes)")
-                        return str(audio_file.absolute())
-                    else:
-                        logger.warning(f"TTS file created but empty, attempt {attempt + 1}/{max_retries}")
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(0.5)
-                            continue
-                        
-                except Exception as e:
-                    logger.warning(f"TTS generation attempt {attempt + 1} failed: {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1)
-                        continue
-                    else:
-                        raise
-            
-            logger.error("TTS generation failed after all retries")
-            return None
-            
-        except Exception as e:
-            logger.error(f"TTS error: {e}", exc_info=True)
-            return None
+        if not text or len(text.strip()) == 0:
+            raise ValueError("Empty text provided to TTS")
+        
+        text = text.strip()
+        voice_to_use = voice or self.current_voice
+        rate = rate or config.EDGE_TTS_RATE
+        
+        # Use cache with rate and output format included
+        cache_key = self.cache.key(voice_to_use, rate, self.output_format, text)
+        cached = self.cache.get(cache_key, self.extension)
+        if cached:
+            logger.debug(f"Using cached TTS: {text[:50]}...")
+            return str(Path(cached).absolute())
+        
+        audio_file = self.cache.path(cache_key, self.extension)
+        
+        # Collect the whole stream before writing, so a dropped connection
+        # never leaves a truncated file in the cache
+        communicate = edge_tts.Communicate(text, voice_to_use, rate=rate)
+        chunks = []
+        with span("tts"):
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    chunks.append(chunk["data"])
+        
+        audio = b"".join(chunks)
+        if not audio:
+            raise RuntimeError(f"Edge TTS returned no audio for: {text[:50]}")
+        
+        with span("tts_encode"):
+            pcm = await decode_mp3(audio, self.sample_rate)
+            if not len(pcm):
+                raise RuntimeError(f"Edge TTS audio decoded to nothing for: {text[:50]}")
+            await asyncio.to_thread(write_output, audio_file, pcm, self.sample_rate, self.output_format)
+        self.cache.add(cache_key, audio_file)
+        
+        logger.info(f"Generated TTS: {text[:50]}... ({len(pcm) / self.sample_rate:.1f}s {self.output_format})")
+        return str(audio_file.absolute())
     
-    def synthesize(self, text, voice=None, rate="+15%"):
+    def synthesize(self, text, voice=None, rate=None):
         """
-        Synchronous wrapper for synthesize_async
+        Blocking wrapper for synthesize_async, for code outside an event loop
+        
+        Runs on one long-lived background loop instead of creating a new loop
+        (and connection state) per call with asyncio.run.
         """
-        return asyncio.run(self.synthesize_async(text, voice, rate))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("EdgeTTSEngine.synthesize() called from a running event loop; await synthesize_async() instead")
+        
+        future = asyncio.run_coroutine_threadsafe(self.synthesize_async(text, voice, rate), _background_loop())
+        return future.result()
     
     def set_voice(self, voice_type='female'):
         """
@@ -116,9 +170,7 @@ class EdgeTTSEngine:
     def clear_cache(self):
         """Clear TTS cache"""
         try:
-            import shutil
-            shutil.rmtree(self.cache_dir)
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.cache.clear()
             logger.info("TTS cache cleared")
         except Exception as e:
             logger.error(f"Failed to clear cache: {e}")
@@ -0,0 +1,305 @@
+"""Async TTS engine interface with a fallback chain and per-engine circuit breakers"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from loguru import logger
+import config
+from runtime.executor import get_pool
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_router = None
+
+
+class TTSUnavailableError(RuntimeError):
+    """Raised when no engine in the chain could synthesize the text"""
+
+
+class CircuitBreaker:
+    """
+    Trips an engine out of rotation when it gets slow or starts failing
+    
+    Keeps a rolling window of (latency, ok) samples. Once the window holds
+    enough samples and either the error rate or the average latency crosses
+    its threshold, the breaker opens and the router skips the engine. After
+    the cooldown a single trial request is let through (half-open); it
+    closes the breaker again if it is fast and succeeds.
+    """
+    
+    def __init__(self, name, window=None, min_samples=None, max_error_rate=None, max_latency_ms=None, cooldown=None):
+        self.name = name
+        self.window = deque(maxlen=window or config.TTS_BREAKER_WINDOW)
+        self.min_samples = min_samples or config.TTS_BREAKER_MIN_SAMPLES
+        self.max_error_rate = max_error_rate if max_error_rate is not None else config.TTS_BREAKER_ERROR_RATE
+        self.max_latency_ms = max_latency_ms if max_latency_ms is not None else config.TTS_BREAKER_LATENCY_MS
+        self.cooldown = cooldown if cooldown is not None else config.TTS_BREAKER_COOLDOWN
+        
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a request may go to this engine now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+    
+    def record(self, latency_ms, ok):
+        """
+        Record the outcome of one request
+        
+        Args:
+            latency_ms: Time the engine took
+            ok: False if it raised or timed out
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+                if ok and latency_ms <= self.max_latency_ms:
+                    self.state = CLOSED
+                    self.window.clear()
+                    logger.info(f"TTS engine '{self.name}' recovered, circuit closed")
+                else:
+                    self._trip(f"trial failed ({latency_ms:.0f} ms, ok={ok})")
+                return
+            
+            self.window.append((latency_ms, ok))
+            if self.state == CLOSED and len(self.window) >= self.min_samples:
+                error_rate, latency = self._rates()
+                if error_rate > self.max_error_rate:
+                    self._trip(f"error rate {error_rate:.0%}")
+                elif latency > self.max_latency_ms:
+                    self._trip(f"avg latency {latency:.0f} ms")
+    
+    def _rates(self):
+        errors = sum(1 for _, ok in self.window if not ok)
+        latency = sum(latency for latency, _ in self.window) / len(self.window)
+        return errors / len(self.window), latency
+    
+    def _trip(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(f"TTS engine '{self.name}' circuit open: {reason}, retry in {self.cooldown:.0f}s")
+    
+    def stats(self):
+        """Breaker state and the current window's error rate and latency"""
+        with self._lock:
+            error_rate, latency = self._rates() if self.window else (0.0, 0.0)
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "samples": len(self.window),
+                "error_rate": round(error_rate, 3),
+                "latency_ms_avg": round(latency, 1),
+            }
+
+
+class TTSEngine(ABC):
+    """
+    Common async interface: synthesize_to_file(text) -> audio file path
+    
+    Subclasses implement _synthesize(). Failures raise instead of returning
+    a placeholder, so the router can count them and fall back.
+    """
+    
+    name = None
+    
+    def __init__(self, concurrency):
+        self.concurrency = max(1, concurrency)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.breaker = CircuitBreaker(self.name)
+        self.in_flight = 0
+        self.counters = {"requests": 0, "failures": 0, "timeouts": 0}
+    
+    @property
+    def saturated(self):
+        """True when all of this engine's slots are busy"""
+        return self.in_flight >= self.concurrency
+    
+    async def synthesize_to_file(self, text):
+        """
+        Synthesize text within this engine's concurrency limit
+        
+        Returns:
+            str: Path to the audio file
+        """
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                return await self._synthesize(text)
+        finally:
+            self.in_flight -= 1
+    
+    @abstractmethod
+    async def _synthesize(self, text):
+        """Render text to an audio file and return its path; raise on failure"""
+    
+    def warm(self, text):
+        """Blocking warm-up, run by the model registry"""
+    
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            **self.counters,
+            "breaker": self.breaker.stats(),
+        }
+
+
+class PiperEngine(TTSEngine):
+    """Local Piper voices, run on the TTS worker pool"""
+    
+    name = "piper"
+    
+    def __init__(self):
+        from tts.tts_engine import PiperTTS
+        super().__init__(config.TTS_PIPER_CONCURRENCY)
+        self.tts = PiperTTS()
+        self.pool = get_pool("tts")
+    
+    async def _synthesize(self, text):
+        # render_to_file raises instead of returning a silent file
+        return await self.pool.run(self.tts.render_to_file, text)
+    
+    def warm(self, text):
+        self.tts.synthesize(text)
+
+
+class EdgeEngine(TTSEngine):
+    """Microsoft Edge online voices, natively async"""
+    
+    name = "edge"
+    
+    def __init__(self):
+        from tts.edgetts_engine import EdgeTTSEngine
+        super().__init__(config.TTS_EDGE_CONCURRENCY)
+        self.tts = EdgeTTSEngine()
+    
+    async def _synthesize(self, text):
+        return await self.tts.synthesize_async(text)
+
+
+ENGINES = {
+    "piper": PiperEngine,
+    "edge": EdgeEngine,
+}
+
+
+class TTSRouter:
+    """
+    Sends each synthesis to the first healthy engine in the configured order
+    
+    An engine is skipped while its circuit is open, or while all its slots
+    are busy and a later engine could take the request. The last engine
+    (normally local Piper) is always tried, so a flaky or slow online
+    voice degrades to the local one instead of to silence.
+    """
+    
+    def __init__(self, engines):
+        self.engines = engines
+        self.counters = {"fallbacks": 0, "spilled": 0, "failed": 0}
+    
+    async def synthesize_to_file(self, text):
+        """
+        Synthesize text on the first engine that succeeds
+        
+        Returns:
+            str: Path to the audio file
+        
+        Raises:
+            TTSUnavailableError: Every engine failed
+        """
+        errors = []
+        for position, engine in enumerate(self.engines):
+            last = position == len(self.engines) - 1
+            if not last and engine.saturated:
+                self.counters["spilled"] += 1
+                continue
+            if not engine.breaker.allow() and not last:
+                continue
+            
+            engine.counters["requests"] += 1
+            started = time.perf_counter()
+            try:
+                audio_file = await asyncio.wait_for(engine.synthesize_to_file(text), config.TTS_ENGINE_TIMEOUT)
+                engine.breaker.record((time.perf_counter() - started) * 1000, True)
+                if position > 0:
+                    self.counters["fallbacks"] += 1
+                return audio_file
+            except Exception as e:
+                latency_ms = (time.perf_counter() - started) * 1000
+                engine.breaker.record(latency_ms, False)
+                if isinstance(e, asyncio.TimeoutError):
+                    engine.counters["timeouts"] += 1
+                    e = f"timed out after {latency_ms:.0f} ms"
+                engine.counters["failures"] += 1
+                errors.append(f"{engine.name}: {e}")
+                logger.warning(f"TTS engine '{engine.name}' failed for '{text[:40]}': {e}")
+        
+        self.counters["failed"] += 1
+        raise TTSUnavailableError("; ".join(errors) or "no TTS engine available")
+    
+    def warm(self, text):
+        """Warm every engine that has a local model"""
+        for engine in self.engines:
+            engine.warm(text)
+    
+    def stats(self):
+        """Router counters plus each engine's limits, counters and breaker"""
+        return {
+            "order": [engine.name for engine in self.engines],
+            **self.counters,
+            "engines": {engine.name: engine.stats() for engine in self.engines},
+        }
+
+
+def create_tts(order=None):
+    """
+    Build the engine chain
+    
+    Args:
+        order: Engine names, primary first (default TTS_ENGINES). Local
+            Piper is appended as the last resort if it is not listed.
+    
+    Returns:
+        TTSRouter
+    """
+    order = [name.strip().lower() for name in (order or config.TTS_ENGINES)]
+    unknown = [name for name in order if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown TTS engine(s): {', '.join(unknown)} (expected {', '.join(ENGINES)})")
+    if "piper" not in order:
+        order.append("piper")
+    
+    engines = []
+    for name in dict.fromkeys(order):
+        try:
+            engines.append(ENGINES[name]())
+        except Exception as e:
+            # A missing optional package (edge-tts) shouldn't take the local voice down
+            if name == "piper":
+                raise
+            logger.error(f"TTS engine '{name}' unavailable: {e}")
+    
+    logger.info(f"TTS engine order: {' -> '.join(engine.name for engine in engines)}")
+    global _router
+    _router = TTSRouter(engines)
+    return _router
+
+
+def tts_engine_stats():
+    """Get statistics of this process's engine chain, if one was created"""
+    return _router.stats() if _router is not None else {}
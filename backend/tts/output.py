@@ -0,0 +1,107 @@
+"""Asterisk-native output formats for synthesized speech"""
+import os
+import threading
+import wave
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from asr.audio_io import resample_poly
+
+# format -> (file extension, sample rate); None keeps the voice's own rate.
+# The extension is what STREAM FILE uses to pick the format, so Asterisk
+# streams these bytes as-is instead of transcoding on every playback.
+OUTPUT_FORMATS = {
+    "wav": ("wav", None),
+    "sln": ("sln", 8000),
+    "sln16": ("sln16", 16000),
+    "ulaw": ("ulaw", 8000),
+}
+
+ULAW_BIAS = 0x84
+ULAW_CLIP = 32635
+
+
+def output_profile(fmt):
+    """
+    Extension and sample rate for an output format
+    
+    Args:
+        fmt: One of OUTPUT_FORMATS
+    
+    Returns:
+        tuple: (extension, sample_rate or None)
+    """
+    try:
+        return OUTPUT_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown TTS output format: {fmt} (expected one of {', '.join(OUTPUT_FORMATS)})")
+
+
+@lru_cache(maxsize=1)
+def ulaw_table():
+    """
+    G.711 μ-law code for every int16 value, indexed by the sample's uint16 bits
+    
+    Built once with array ops, so encoding a buffer is a single gather.
+    """
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), ULAW_CLIP) + ULAW_BIAS
+    
+    # segment = position of the highest set bit above bit 7
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def ulaw_encode(pcm):
+    """
+    Encode int16 PCM to μ-law bytes
+    
+    Args:
+        pcm: int16 numpy array
+    
+    Returns:
+        bytes: One μ-law byte per sample
+    """
+    return ulaw_table()[pcm.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def convert_pcm(pcm, sample_rate, target_rate):
+    """Resample int16 PCM to target_rate (no-op if the rates already match)"""
+    if target_rate is None or target_rate == sample_rate:
+        return pcm
+    audio = resample_poly(pcm.astype(np.float32) / 32768.0, target_rate, sample_rate)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def write_output(path, pcm, sample_rate, fmt):
+    """
+    Write int16 mono PCM in an output format, atomically
+    
+    A concurrent reader (another worker, or Asterisk itself) never sees a
+    partial file.
+    
+    Args:
+        path: Destination file
+        pcm: int16 numpy array
+        sample_rate: Rate of pcm
+        fmt: One of OUTPUT_FORMATS
+    """
+    _, target_rate = output_profile(fmt)
+    pcm = convert_pcm(pcm, sample_rate, target_rate)
+    tmp_path = Path(f"{path}.{os.getpid()}.{threading.get_ident()}.tmp")
+    
+    if fmt == "wav":
+        with wave.open(str(tmp_path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(target_rate or sample_rate)
+            wav.writeframes(pcm.tobytes())
+    elif fmt == "ulaw":
+        tmp_path.write_bytes(ulaw_encode(pcm))
+    else:
+        # signed linear: headerless little-endian int16
+        tmp_path.write_bytes(pcm.astype("<i2", copy=False).tobytes())
+    
+    tmp_path.replace(path)
@@ -0,0 +1,100 @@
+"""
+Pre-render the agent's fixed responses into the TTS cache
+
+Templates (agent/templates.py) contribute their static segments; slot values
+are synthesized per call and played between them. Knowledge-base answers are
+rendered whole and sentence by sentence, matching both playback paths.
+
+Run offline with: python -m tts.prerender
+"""
+import asyncio
+import time
+from loguru import logger
+import config
+from agent.streaming import split_sentences
+from agent.templates import static_texts
+
+
+def knowledge_texts(knowledge_base):
+    """Fixed answers the knowledge base can return verbatim"""
+    knowledge = knowledge_base.knowledge
+    answers = list(knowledge.get("faq", {}).values())
+    answers += [intent.get("response", "") for intent in knowledge.get("intents", {}).values()]
+    return [answer for answer in answers if isinstance(answer, str) and answer.strip()]
+
+
+def prerender_texts(knowledge_base=None, extra=()):
+    """
+    Every fixed text worth having in the TTS cache
+    
+    Args:
+        knowledge_base: Optional KnowledgeBase whose answers are included
+        extra: Additional fixed texts (e.g. system prompts)
+    
+    Returns:
+        list: Unique texts
+    """
+    texts = dict.fromkeys(static_texts())
+    if knowledge_base is not None:
+        for answer in knowledge_texts(knowledge_base):
+            texts[answer] = None
+            texts.update(dict.fromkeys(split_sentences(answer)))
+    texts.update(dict.fromkeys(extra))
+    return [text for text in texts if text]
+
+
+async def prerender(tts, texts, concurrency=None):
+    """
+    Synthesize texts into the TTS cache
+    
+    Already cached texts return immediately, so this is cheap on restart.
+    Concurrency is kept low so live calls keep priority on the engines.
+    
+    Args:
+        tts: Engine chain from create_tts() (async synthesize_to_file(text))
+        texts: Texts to render
+        concurrency: Max syntheses in flight (default TTS_PRERENDER_CONCURRENCY)
+    
+    Returns:
+        dict: rendered / failed counts and elapsed seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency or config.TTS_PRERENDER_CONCURRENCY)
+    stats = {"texts": len(texts), "rendered": 0, "failed": 0}
+    started = time.perf_counter()
+    
+    async def render_one(text):
+        async with semaphore:
+            try:
+                await tts.synthesize_to_file(text)
+                stats["rendered"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Pre-render failed for '{text[:40]}': {e}")
+    
+    await asyncio.gather(*(render_one(text) for text in texts))
+    
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(
+        f"Pre-rendered {stats['rendered']}/{stats['texts']} fixed responses "
+        f"in {stats['seconds']}s ({stats['failed']} failed)"
+    )
+    return stats
+
+
+def main():
+    """Offline job: fill the TTS cache before the service starts"""
+    from agent.knowledge_base import KnowledgeBase
+    from agi.agi_handler import AGIServer
+    from runtime.executor import shutdown_pools
+    from tts.engines import create_tts
+    
+    tts = create_tts()
+    texts = prerender_texts(KnowledgeBase(), AGIServer.PROMPTS.values())
+    try:
+        asyncio.run(prerender(tts, texts, concurrency=config.TTS_WORKERS))
+    finally:
+        shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
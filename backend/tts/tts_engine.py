@@ -1,79 +1,161 @@
-import subprocess
 import os
+import subprocess
+import json
+import queue
+import threading
+import wave
 from loguru import logger
 import config
 from pathlib import Path
-import hashlib
 import numpy as np
+from runtime.tracing import span
+from tts.cache import get_tts_cache
+from tts.output import output_profile, write_output
+
+try:
+    import onnxruntime
+    from piper.config import PiperConfig
+    from piper.voice import PiperVoice
+    PIPER_AVAILABLE = True
+except ImportError:
+    PIPER_AVAILABLE = False
+    logger.warning("piper-tts not available, using espeak for TTS")
+
+ESPEAK_SAMPLE_RATE = 22050
 
 class PiperTTS:
     """Piper-based text-to-speech engine"""
     
     def __init__(self):
         self.cache_dir = config.DATA_DIR / "tts_cache"
-        self.cache_dir.mkdir(exist_ok=True)
-        logger.info("Piper TTS engine initialized")
+        self.cache = get_tts_cache(self.cache_dir)
+        
+        # voice name -> pool of resident ONNX sessions for that voice
+        self.voices = {}
+        self.sample_rates = {}
+        self._lock = threading.Lock()
+        
+        if PIPER_AVAILABLE:
+            for name in config.TTS_VOICES:
+                try:
+                    self.load_voice(name)
+                except Exception as e:
+                    logger.error(f"Failed to load Piper voice '{name}': {e}")
+        
+        self.current_voice = config.TTS_MODEL if config.TTS_MODEL in self.voices else next(iter(self.voices), None)
+        self.length_scale = 1.0 / config.TTS_SPEED
+        
+        # Files are written in the format Asterisk plays natively
+        self.output_format = config.TTS_OUTPUT_FORMAT
+        self.extension, _ = output_profile(self.output_format)
+        
+        if self.current_voice:
+            logger.info(f"Piper TTS engine initialized with voice: {self.current_voice} ({', '.join(self.voices)} loaded)")
+        else:
+            logger.info("Piper TTS engine initialized (espeak fallback)")
     
-    def synthesize(self, text):
+    def load_voice(self, name):
+        """
+        Load a Piper voice and keep it resident
+        
+        Args:
+            name: Voice name; expects <name>.onnx and <name>.onnx.json in TTS_VOICE_DIR
+        """
+        model_path = Path(config.TTS_VOICE_DIR) / f"{name}.onnx"
+        config_path = Path(f"{model_path}.json")
+        with open(config_path, "r", encoding="utf-8") as f:
+            voice_config = PiperConfig.from_dict(json.load(f))
+        
+        options = onnxruntime.SessionOptions()
+        if config.TTS_ONNX_THREADS:
+            options.intra_op_num_threads = config.TTS_ONNX_THREADS
+        providers = ["CUDAExecutionProvider"] if config.TTS_USE_CUDA else ["CPUExecutionProvider"]
+        
+        # One session per concurrent synthesis so calls don't serialize on a voice
+        sessions = queue.Queue()
+        for _ in range(max(1, config.TTS_SESSIONS)):
+            session = onnxruntime.InferenceSession(str(model_path), sess_options=options, providers=providers)
+            sessions.put(PiperVoice(session=session, config=voice_config))
+        
+        with self._lock:
+            self.voices[name] = sessions
+            self.sample_rates[name] = voice_config.sample_rate
+        logger.info(f"Loaded Piper voice: {name} ({voice_config.sample_rate} Hz, {sessions.qsize()} sessions)")
+    
+    @property
+    def sample_rate(self):
+        """Sample rate of the current voice"""
+        return self.sample_rates.get(self.current_voice, ESPEAK_SAMPLE_RATE)
+    
+    def synthesize_pcm(self, text, voice=None):
+        """
+        Synthesize speech into an int16 buffer without touching disk
+        
+        Args:
+            text: Text to synthesize
+            voice: Preloaded voice name (defaults to the current voice)
+        
+        Returns:
+            tuple: (int16 numpy array, sample_rate)
+        """
+        voice = voice or self.current_voice
+        sessions = self.voices.get(voice)
+        if sessions is None:
+            raise RuntimeError(f"Piper voice not loaded: {voice}")
+        
+        piper_voice = sessions.get()
+        try:
+            with span("tts"):
+                pcm = b"".join(piper_voice.synthesize_stream_raw(
+                    text,
+                    length_scale=self.length_scale,
+                    sentence_silence=0.0
+                ))
+        finally:
+            sessions.put(piper_voice)
+        
+        return np.frombuffer(pcm, dtype=np.int16), self.sample_rates[voice]
+    
+    def synthesize(self, text, voice=None):
         """
         Synthesize speech from text
         
         Args:
             text: Text to synthesize
-            
+            voice: Preloaded voice name (optional)
+        
         Returns:
-            numpy array: Audio data
+            numpy array: float32 audio at self.sample_rate
         """
         try:
-            # For now, use a simple implementation
-            # In production, integrate actual Piper TTS
-            audio_file = self.synthesize_to_file(text)
-            
-            # Load and return audio data
-            import soundfile as sf
-            audio_data, sample_rate = sf.read(audio_file)
-            
-            return audio_data
+            if self.current_voice:
+                pcm, _ = self.synthesize_pcm(text, voice)
+            else:
+                pcm, _ = self.synthesize_espeak(text)
             
+            return pcm.astype(np.float32) / 32768.0
+        
         except Exception as e:
             logger.error(f"TTS synthesis error: {e}")
             return None
     
-    def synthesize_to_file(self, text):
+    def synthesize_to_file(self, text, voice=None):
         """
-        Synthesize speech and save to file
+        Synthesize speech and save to file (for Asterisk playback)
+        
+        Never raises: on failure a silent file is returned so standalone
+        callers always have something to play. The engine chain uses
+        render_to_file() instead, so failures reach its circuit breaker.
         
         Args:
             text: Text to synthesize
-            
+            voice: Preloaded voice name (optional)
+        
         Returns:
             str: Path to audio file
         """
         try:
-            # Create cache key from text
-            cache_key = hashlib.md5(text.encode()).hexdigest()
-            audio_file = self.cache_dir / f"{cache_key}.wav"
-            
-            # Return cached file if exists
-            if audio_file.exists():
-                logger.debug(f"Using cached TTS: {text[:50]}...")
-                return str(audio_file)
-            
-            # Use espeak as fallback (available on most systems)
-            # In production, replace with actual Piper TTS
-            cmd = [
-                "espeak",
-                "-v", "en-us",
-                "-s", "150",  # Speed
-                "-w", str(audio_file),
-                text
-            ]
-            
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            logger.info(f"Generated TTS audio: {text[:50]}...")
-            return str(audio_file)
-            
+            return self.render_to_file(text, voice)
         except subprocess.CalledProcessError as e:
             logger.error(f"TTS command failed: {e}")
             # Create silent audio as fallback
@@ -82,32 +164,105 @@ class PiperTTS:
             logger.error(f"TTS error: {e}")
             return self.create_silent_audio()
     
+    def render_to_file(self, text, voice=None):
+        """
+        Synthesize speech to a cached file in the configured output format
+        
+        Args:
+            text: Text to synthesize
+            voice: Preloaded voice name (optional)
+        
+        Returns:
+            str: Path to audio file
+        
+        Raises:
+            Exception: Whatever synthesis or encoding failed with
+        """
+        voice = voice or self.current_voice
+        
+        # Create cache key from text, voice, speed and output format
+        cache_key = self.cache.key(voice or 'espeak', f"{self.length_scale:.3f}", self.output_format, text)
+        
+        # Return cached file if exists
+        cached = self.cache.get(cache_key, self.extension)
+        if cached:
+            logger.debug(f"Using cached TTS: {text[:50]}...")
+            return cached
+        
+        # Resample and encode once here, so playback is a plain byte stream
+        audio_file = self.cache.path(cache_key, self.extension)
+        if voice:
+            pcm, sample_rate = self.synthesize_pcm(text, voice)
+        else:
+            pcm, sample_rate = self.synthesize_espeak(text)
+        with span("tts_encode"):
+            write_output(audio_file, pcm, sample_rate, self.output_format)
+        self.cache.add(cache_key, audio_file)
+        
+        logger.info(f"Generated TTS audio: {text[:50]}...")
+        return str(audio_file)
+    
+    def synthesize_espeak(self, text):
+        """
+        Fallback when no Piper voice is available: one espeak process per utterance
+        
+        Returns:
+            tuple: (int16 numpy array, sample_rate)
+        """
+        tmp_path = self.cache_dir / f"espeak.{os.getpid()}.{threading.get_ident()}.tmp"
+        cmd = [
+            "espeak",
+            "-v", "en-us",
+            "-s", str(int(150 / self.length_scale)),  # Speed
+            "-w", str(tmp_path),
+            text
+        ]
+        
+        try:
+            with span("tts"):
+                subprocess.run(cmd, check=True, capture_output=True)
+            with wave.open(str(tmp_path), "rb") as wav:
+                return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16), wav.getframerate()
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    
     def create_silent_audio(self):
         """Create a silent audio file as fallback"""
         try:
-            import soundfile as sf
-            
-            silent_file = self.cache_dir / "silent.wav"
+            silent_file = self.cache_dir / f"silent.{self.extension}"
             
             if not silent_file.exists():
                 # Create 1 second of silence
-                silence = np.zeros(config.SAMPLE_RATE, dtype=np.float32)
-                sf.write(str(silent_file), silence, config.SAMPLE_RATE)
+                write_output(silent_file, np.zeros(config.SAMPLE_RATE, dtype=np.int16), config.SAMPLE_RATE, self.output_format)
             
             return str(silent_file)
-            
+        
         except Exception as e:
             logger.error(f"Error creating silent audio: {e}")
             return ""
     
     def set_voice(self, voice_name):
-        """Set TTS voice (for future Piper integration)"""
-        logger.info(f"Voice setting requested: {voice_name}")
-        # TODO: Implement when integrating actual Piper TTS
-        pass
+        """
+        Switch to another preloaded voice (no model reload)
+        
+        Args:
+            voice_name: Name of a voice listed in TTS_VOICES
+        """
+        if voice_name in self.voices:
+            self.current_voice = voice_name
+            logger.info(f"Voice changed to: {voice_name}")
+        else:
+            logger.warning(f"Voice not preloaded: {voice_name} (available: {', '.join(self.voices) or 'none'})")
     
     def set_speed(self, speed):
-        """Set TTS speed (for future Piper integration)"""
-        logger.info(f"Speed setting requested: {speed}")
-        # TODO: Implement when integrating actual Piper TTS
-        pass
+        """
+        Set speaking rate (1.0 = normal, 1.2 = 20% faster)
+        
+        Args:
+            speed: Rate multiplier, applied through Piper's length scale
+        """
+        if speed <= 0:
+            logger.warning(f"Invalid TTS speed: {speed}")
+            return
+        self.length_scale = 1.0 / speed
+        logger.info(f"Speed changed to: {speed}")
@@ -7,24 +7,30 @@ import asyncio
 from datetime import datetime
 import json
 import random
-sys.path.insert(0, os.path.dirname(file))
+sys.path.insert(0, os.path.dirname(__file__))
 
-from agent.agent import AIAgent
+from runtime.registry import get_model_registry
 from db.database import SessionLocal
 from db.models import Call
 
 app = FastAPI()
 
-app.addmiddleware(
+app.add_middleware(
     CORSMiddleware,
-    alloworigins=[""],
-    allowcredentials=True,
-    allowmethods=[""],
-    allowheaders=[""],
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
 )
 
-agent = AIAgent()
-activecalls = {}
+# Shared agent, loaded and warmed once per process in the background
+models = get_model_registry()
+
+@app.on_event("startup")
+async def warm_agent():
+    models.start(["agent"])
+
+active_calls = {}
 
 html = """
 <!DOCTYPE html>
@@ -33,7 +39,7 @@ html = """
     <title>AI Call Center - Enhanced</title>
     
     <style>
-         { margin: 0; padding: 0; box-sizing: border-box; }
+        * { margin: 0; padding: 0; box-sizing: border-box; }
         body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -491,31 +497,32 @@ async def get():
     return HTMLResponse(html)
 
 @app.websocket("/ws")
-async def websocketendpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    agent = await models.get_async("agent")
     
     # Create call record
     db = SessionLocal()
     call = Call(
-        callernumber="Web Call",
-        starttime=datetime.now(),
-        status='inprogress'
+        caller_number="Web Call",
+        start_time=datetime.now(),
+        status='in_progress'
     )
     db.add(call)
     db.commit()
-    callid = call.id
+    call_id = call.id
     db.close()
     
-    conversationhistory = []
-    activecalls[callid] = {
-        'history': conversationhistory,
-        'starttime': datetime.now()
+    conversation_history = []
+    active_calls[call_id] = {
+        'history': conversation_history,
+        'start_time': datetime.now()
     }
     
     try:
         while True:
-            datastr = await websocket.receivetext()
-            data = json.loads(datastr)
+            data_str = await websocket.receive_text()
+            data = json.loads(data_str)
             
             if data['type'] == 'start':
                 # ENHANCED GREETINGS - More natural and varied
@@ -527,22 +534,22 @@ async def websocketendpoint(websocket: WebSocket):
                     "Hi! Thanks for reaching out. What can I assist you with today?"
                 ]
                 greeting = random.choice(greetings)
-                conversationhistory.append({"role": "assistant", "content": greeting})
+                conversation_history.append({"role": "assistant", "content": greeting})
                 
-                await websocket.sendtext(json.dumps({
+                await websocket.send_text(json.dumps({
                     'type': 'greeting',
                     'text': greeting
                 }))
                 
             elif data['type'] == 'speech':
-                usertext = data['text']
-                conversationhistory.append({"role": "user", "content": usertext})
+                user_text = data['text']
+                conversation_history.append({"role": "user", "content": user_text})
                 
-                print(f"[Call {callid}] User: {usertext}")
+                print(f"[Call {call_id}] User: {user_text}")
                 
                 # Check for goodbye
-                goodbyephrases = ['goodbye', 'bye', 'thank you', 'thanks', "that's all", "that is all", "no thanks", "nothing else"]
-                if any(phrase in usertext.lower() for phrase in goodbyephrases):
+                goodbye_phrases = ['goodbye', 'bye', 'thank you', 'thanks', "that's all", "that is all", "no thanks", "nothing else"]
+                if any(phrase in user_text.lower() for phrase in goodbye_phrases):
                     farewells = [
                         "Thank you for calling! Have a wonderful day!",
                         "It was my pleasure helping you. Take care!",
@@ -551,70 +558,70 @@ async def websocketendpoint(websocket: WebSocket):
                         "Thank you! Don't hesitate to call back if you need anything. Bye!"
                     ]
                     farewell = random.choice(farewells)
-                    conversationhistory.append({"role": "assistant", "content": farewell})
+                    conversation_history.append({"role": "assistant", "content": farewell})
                     
-                    await websocket.sendtext(json.dumps({
+                    await websocket.send_text(json.dumps({
                         'type': 'response',
                         'text': farewell,
-                        'endcall': True
+                        'end_call': True
                     }))
                     
                     # Update database
-                    updatecallrecord(callid, conversationhistory, 'completed')
+                    update_call_record(call_id, conversation_history, 'completed')
                     break
                 
                 # Get AI response with ENHANCED agent
                 try:
-                    response = await agent.processinput(
-                        usertext,
-                        conversationhistory,
-                        callid=callid
+                    response = await agent.process_input(
+                        user_text,
+                        conversation_history,
+                        call_id=call_id
                     )
                     
                     # Make response more conversational
-                    response = enhanceresponse(response, conversationhistory)
+                    response = enhance_response(response, conversation_history)
                     
-                    print(f"[Call {callid}] AI: {response}")
+                    print(f"[Call {call_id}] AI: {response}")
                     
-                    conversationhistory.append({"role": "assistant", "content": response})
+                    conversation_history.append({"role": "assistant", "content": response})
                     
-                    await websocket.sendtext(json.dumps({
+                    await websocket.send_text(json.dumps({
                         'type': 'response',
                         'text': response,
-                        'endcall': False
+                        'end_call': False
                     }))
                     
                 except Exception as e:
-                    print(f"[Call {callid}] Error: {e}")
-                    errorresponses = [
+                    print(f"[Call {call_id}] Error: {e}")
+                    error_responses = [
                         "I apologize, could you please repeat that?",
                         "Sorry, I didn't quite catch that. Could you say it again?",
                         "Pardon me, could you rephrase that?",
                         "I'm having trouble understanding. Could you try again?"
                     ]
-                    errorresponse = random.choice(errorresponses)
+                    error_response = random.choice(error_responses)
                     
-                    await websocket.sendtext(json.dumps({
+                    await websocket.send_text(json.dumps({
                         'type': 'response',
-                        'text': errorresponse,
-                        'endcall': False
+                        'text': error_response,
+                        'end_call': False
                     }))
             
             elif data['type'] == 'end':
-                updatecallrecord(callid, conversationhistory, 'completed')
+                update_call_record(call_id, conversation_history, 'completed')
                 break
                 
     except WebSocketDisconnect:
-        print(f"[Call {callid}] Client disconnected")
-        updatecallrecord(callid, conversationhistory, 'disconnected')
+        print(f"[Call {call_id}] Client disconnected")
+        update_call_record(call_id, conversation_history, 'disconnected')
     except Exception as e:
-        print(f"[Call {callid}] Error: {e}")
-        updatecallrecord(callid, conversationhistory, 'failed')
+        print(f"[Call {call_id}] Error: {e}")
+        update_call_record(call_id, conversation_history, 'failed')
     finally:
-        if callid in activecalls:
-            del activecalls[callid]
+        active_calls.pop(call_id, None)
+        agent.end_call(call_id)
 
-def enhanceresponse(response, conversationhistory):
+def enhance_response(response, conversation_history):
     """
     Make AI responses more natural and conversational
     """
@@ -626,8 +633,8 @@ def enhanceresponse(response, conversationhistory):
     }
     
     # Add empathy for problem-related queries
-    problemkeywords = ['problem', 'issue', 'slow', 'not working', 'broken', 'trouble']
-    if any(keyword in response.lower() for keyword in problemkeywords):
+    problem_keywords = ['problem', 'issue', 'slow', 'not working', 'broken', 'trouble']
+    if any(keyword in response.lower() for keyword in problem_keywords):
         if random.random() < 0.3:  # 30% chance
             response = random.choice(fillers['empathy']) + response
     
@@ -669,39 +676,39 @@ def enhanceresponse(response, conversationhistory):
     
     return response
 
-def updatecallrecord(callid, conversationhistory, status):
+def update_call_record(call_id, conversation_history, status):
     """Update call record in database"""
     try:
         db = SessionLocal()
-        call = db.query(Call).filter(Call.id == callid).first()
+        call = db.query(Call).filter(Call.id == call_id).first()
         
         if call:
-            call.endtime = datetime.now()
-            call.duration = int((call.endtime - call.starttime).totalseconds())
+            call.end_time = datetime.now()
+            call.duration = int((call.end_time - call.start_time).total_seconds())
             call.status = status
             
             # Create transcript
             transcript = "\n".join([
                 f"{msg['role'].upper()}: {msg['content']}"
-                for msg in conversationhistory
+                for msg in conversation_history
             ])
             call.transcript = transcript
             
             # Detect intent
-            if len(conversationhistory) > 2:
-                usermessages = [msg['content'] for msg in conversationhistory if msg['role'] == 'user']
-                from agent.intentclassifier import IntentClassifier
+            if len(conversation_history) > 2:
+                user_messages = [msg['content'] for msg in conversation_history if msg['role'] == 'user']
+                from agent.intent_classifier import IntentClassifier
                 classifier = IntentClassifier()
-                call.intent = classifier.classify(" ".join(usermessages))
+                call.intent = classifier.classify(" ".join(user_messages))
             
             # Determine resolution
             if status == 'completed':
                 if any(word in transcript.lower() for word in ['ticket', 'created', 'technician']):
-                    call.resolutionstatus = 'pending'
+                    call.resolution_status = 'pending'
                 else:
-                    call.resolutionstatus = 'resolved'
+                    call.resolution_status = 'resolved'
             else:
-                call.resolutionstatus = 'unresolved'
+                call.resolution_status = 'unresolved'
             
             db.commit()
             print(f"[Call {call_id}] Saved: {call.duration}s, Intent: {call.intent}")
@@ -710,12 +717,12 @@ def updatecallrecord(callid, conversationhistory, status):
     except Exception as e:
         print(f"Error updating call: {e}")
 
-if name == "main":
+if __name__ == "__main__":
     import uvicorn
     
-    print("\n" + "="70)
+    print("\n" + "=" * 70)
     print("🎤 AI CALL CENTER - ENHANCED VOICE SYSTEM V2.0")
-    print("="70)
+    print("=" * 70)
     print("\n✨ NEW FEATURES:")
     print("   ✅ 20% faster speech (1.2x speed)")
     print("   ✅ Smarter, more conversational AI")
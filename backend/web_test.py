@@ -3,10 +3,11 @@ from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 import sys
 import os
+import uuid
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from agent.agent import AIAgent
+from runtime.registry import get_model_registry
 
 app = FastAPI()
 
@@ -18,7 +19,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-agent = AIAgent()
+# Shared agent, loaded and warmed once per process in the background
+models = get_model_registry()
+
+@app.on_event("startup")
+async def warm_agent():
+    models.start(["agent"])
+
 
 html = """
 <!DOCTYPE html>
@@ -260,7 +267,10 @@ async def get():
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    agent = await models.get_async("agent")
     conversation_history = []
+    # Each browser tab is its own call, so sessions don't share customer state
+    call_id = f"web-{uuid.uuid4().hex[:12]}"
     
     try:
         while True:
@@ -275,12 +285,14 @@ async def websocket_endpoint(websocket: WebSocket):
                 response = await agent.process_input(
                     data,
                     conversation_history,
-                    call_id=1000
+                    call_id=call_id
                 )
                 await websocket.send_text(response)
                 conversation_history.append({"role": "assistant", "content": response})
     except Exception as e:
         print(f"WebSocket error: {e}")
+    finally:
+        agent.end_call(call_id)
 
 if __name__ == "__main__":
     import uvicorn
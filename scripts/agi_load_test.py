@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Fake-Asterisk load generator for the AGI server
+
+Opens many concurrent FastAGI sessions against the backend the way Asterisk
+would: sends the agi_* environment, answers ANSWER / STREAM FILE / RECORD FILE
+(dropping a pre-recorded WAV where RECORD FILE asks for it) and measures how
+long the server takes to start answering each caller turn.
+
+Calls the server sheds under admission control (a "please call back"
+prompt and hangup, with or without hold audio first) never reach RECORD
+FILE; they are reported as rejected / queued_rejected rather than
+completed, and the run fails if more than --max-shed-rate of calls were
+shed.
+
+Usage:
+    python scripts/agi_load_test.py --calls 200 --ramp 60 --duration 300 \\
+        --wav-dir samples/ --json results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import shutil
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+
+class Stats:
+    """Collects latency and outcome counters across all synthetic calls"""
+
+    def __init__(self):
+        self.turn_latencies = []
+        self.setup_latencies = []
+        self.calls_started = 0
+        self.calls_completed = 0
+        self.calls_failed = 0
+        self.calls_rejected = 0  # callback prompt straight away
+        self.calls_queued_rejected = 0  # hold audio, then the callback prompt
+        self.errors = {}
+        self.active = 0
+        self.peak_active = 0
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_default_wav(path):
+    """Write a 1.5 s 8 kHz tone so runs work without a corpus"""
+    rate = 8000
+    frames = bytearray()
+    for i in range(int(rate * 1.5)):
+        sample = int(6000 * math.sin(2 * math.pi * 220 * i / rate))
+        frames += sample.to_bytes(2, "little", signed=True)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+
+
+class FakeChannel:
+    """One simulated Asterisk channel speaking FastAGI to the server"""
+
+    def __init__(self, args, call_no, wavs, stats):
+        self.args = args
+        self.call_no = call_no
+        self.wavs = wavs
+        self.stats = stats
+        self.turns = 0
+        self.turn_started = None
+        self.plays = 0
+        self.setup_latency = None
+
+    def agi_env(self):
+        unique = f"{time.time():.6f}.{self.call_no}"
+        env = {
+            "agi_network": "yes",
+            "agi_request": f"agi://{self.args.host}:{self.args.port}",
+            "agi_channel": f"PJSIP/load-{self.call_no:08d}",
+            "agi_language": "en",
+            "agi_type": "PJSIP",
+            "agi_uniqueid": unique,
+            "agi_version": "18.0.0",
+            "agi_callerid": f"+1555{self.call_no % 10000000:07d}",
+            "agi_calleridname": "Load Test",
+            "agi_context": "from-internal",
+            "agi_extension": "100",
+            "agi_priority": "1",
+            "agi_enhanced": "0.0",
+            "agi_accountcode": "",
+            "agi_threadid": str(self.call_no),
+        }
+        return "".join(f"{k}: {v}\n" for k, v in env.items()) + "\n"
+
+    async def run(self):
+        """
+        Play one call through
+
+        Returns:
+            str: completed, rejected, queued_rejected or no_audio
+        """
+        args = self.args
+        started = time.perf_counter()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(args.host, args.port), timeout=args.timeout
+        )
+        try:
+            writer.write(self.agi_env().encode())
+            await writer.drain()
+
+            first_audio = True
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=args.timeout)
+                if not line:
+                    # Server closed the session
+                    if self.turns > 0:
+                        return "completed"
+                    if self.plays:
+                        # Prompts but never a turn: shed by admission control
+                        return "rejected" if self.plays == 1 else "queued_rejected"
+                    return "no_audio"
+
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 2)
+                name = " ".join(verb[:2]).upper()
+
+                if name.startswith("STREAM FILE") or name.startswith("EXEC PLAYBACK"):
+                    now = time.perf_counter()
+                    self.plays += 1
+                    if first_audio:
+                        # Recorded by the caller loop only if the call is served
+                        self.setup_latency = now - started
+                        first_audio = False
+                    elif self.turn_started is not None:
+                        self.stats.turn_latencies.append(now - self.turn_started)
+                        self.turn_started = None
+                    if args.playback_delay:
+                        await asyncio.sleep(args.playback_delay)
+                    response = "200 result=0 endpos=8000"
+
+                elif name.startswith("RECORD FILE"):
+                    if self.turns >= args.turns:
+                        # Hang up after the configured number of caller turns
+                        return "completed"
+                    parts = command.split()
+                    target = Path(f"{parts[2]}.{parts[3]}")
+                    if args.speech_delay:
+                        await asyncio.sleep(args.speech_delay)
+                    await asyncio.to_thread(shutil.copyfile, next(self.wavs), target)
+                    self.turns += 1
+                    self.turn_started = time.perf_counter()
+                    response = "200 result=0 (timeout) endpos=12000"
+
+                elif name.startswith("GET DATA"):
+                    response = "200 result= (timeout)"
+
+                elif name.startswith("ANSWER"):
+                    response = "200 result=0"
+
+                else:
+                    response = "200 result=0"
+
+                writer.write(f"{response}\n".encode())
+                await writer.drain()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+async def caller_loop(args, slot_delay, counter, wavs, stats, deadline):
+    """A virtual caller that places calls back to back until the deadline"""
+    await asyncio.sleep(slot_delay)
+    while time.perf_counter() < deadline:
+        call_no = next(counter)
+        stats.calls_started += 1
+        stats.active += 1
+        stats.peak_active = max(stats.peak_active, stats.active)
+        try:
+            channel = FakeChannel(args, call_no, wavs, stats)
+            outcome = await channel.run()
+            if outcome == "completed":
+                stats.calls_completed += 1
+                if channel.setup_latency is not None:
+                    stats.setup_latencies.append(channel.setup_latency)
+            elif outcome == "rejected":
+                stats.calls_rejected += 1
+            elif outcome == "queued_rejected":
+                stats.calls_queued_rejected += 1
+            else:
+                stats.calls_failed += 1
+                stats.error(outcome)
+        except asyncio.TimeoutError:
+            stats.calls_failed += 1
+            stats.error("timeout")
+        except (ConnectionError, OSError) as e:
+            stats.calls_failed += 1
+            stats.error(type(e).__name__)
+        finally:
+            stats.active -= 1
+        if args.think_time:
+            await asyncio.sleep(random.uniform(0, args.think_time))
+
+
+async def progress(stats, started, interval):
+    while True:
+        await asyncio.sleep(interval)
+        elapsed = time.perf_counter() - started
+        p95 = percentile(stats.turn_latencies, 95)
+        print(
+            f"[{elapsed:6.1f}s] active={stats.active:4d} calls={stats.calls_completed}/{stats.calls_started} "
+            f"failed={stats.calls_failed} shed={stats.calls_rejected + stats.calls_queued_rejected} turns={len(stats.turn_latencies)} p95={p95 * 1000:.0f}ms"
+        )
+
+
+def build_report(args, stats, elapsed):
+    def summary(values):
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p90_ms": round(percentile(values, 90) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+        }
+
+    shed = stats.calls_rejected + stats.calls_queued_rejected
+    finished = stats.calls_completed + stats.calls_failed + shed
+    return {
+        "target": f"{args.host}:{args.port}",
+        "concurrency": args.calls,
+        "ramp_s": args.ramp,
+        "duration_s": round(elapsed, 1),
+        "peak_active_calls": stats.peak_active,
+        "calls_started": stats.calls_started,
+        "calls_completed": stats.calls_completed,
+        "calls_failed": stats.calls_failed,
+        "calls_rejected": stats.calls_rejected,
+        "calls_queued_rejected": stats.calls_queued_rejected,
+        "error_rate": round(stats.calls_failed / finished, 4) if finished else 0.0,
+        "shed_rate": round(shed / finished, 4) if finished else 0.0,
+        "errors": stats.errors,
+        "throughput": {
+            "calls_per_min": round(stats.calls_completed / elapsed * 60, 2) if elapsed else 0.0,
+            "turns_per_s": round(len(stats.turn_latencies) / elapsed, 2) if elapsed else 0.0,
+        },
+        "setup_latency": summary(stats.setup_latencies),
+        "turn_latency": summary(stats.turn_latencies),
+    }
+
+
+def print_report(report):
+    print()
+    print("=" * 50)
+    print("AGI Load Test Results")
+    print("=" * 50)
+    print(f"Target:             {report['target']}")
+    print(f"Concurrency:        {report['concurrency']} (peak {report['peak_active_calls']})")
+    print(f"Duration:           {report['duration_s']}s")
+    print(f"Calls:              {report['calls_completed']} completed, {report['calls_failed']} failed")
+    print(f"Shed:               {report['calls_rejected']} rejected, "
+          f"{report['calls_queued_rejected']} rejected after holding ({report['shed_rate'] * 100:.2f}%)")
+    print(f"Error rate:         {report['error_rate'] * 100:.2f}% {report['errors'] or ''}")
+    print(f"Throughput:         {report['throughput']['calls_per_min']} calls/min, "
+          f"{report['throughput']['turns_per_s']} turns/s")
+    for key, label in (("setup_latency", "Greeting latency"), ("turn_latency", "Turn latency")):
+        s = report[key]
+        print(f"{label + ':':20}n={s['count']} p50={s['p50_ms']}ms p90={s['p90_ms']}ms "
+              f"p95={s['p95_ms']}ms p99={s['p99_ms']}ms max={s['max_ms']}ms")
+
+
+async def main_async(args):
+    wav_files = sorted(Path(args.wav_dir).glob("*.wav")) if args.wav_dir else []
+    tmp_dir = None
+    if not wav_files:
+        tmp_dir = tempfile.mkdtemp(prefix="agi_load_")
+        default = Path(tmp_dir) / "utterance.wav"
+        make_default_wav(default)
+        wav_files = [default]
+        print(f"⚠️  No WAV corpus given, using a synthetic tone ({default})")
+
+    stats = Stats()
+    counter = itertools.count(1)
+    wavs = itertools.cycle(wav_files)
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    print(f"📞 Ramping to {args.calls} concurrent calls over {args.ramp}s against {args.host}:{args.port}")
+    reporter = asyncio.create_task(progress(stats, started, args.report_interval))
+    callers = [
+        caller_loop(args, args.ramp * i / max(1, args.calls), counter, wavs, stats, deadline)
+        for i in range(args.calls)
+    ]
+    try:
+        await asyncio.gather(*callers)
+    finally:
+        reporter.cancel()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = build_report(args, stats, time.perf_counter() - started)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report written to {args.json}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAGI load generator (fake Asterisk)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=4573)
+    parser.add_argument("--calls", type=int, default=10, help="Target number of concurrent calls")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconds to ramp up to full concurrency")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to keep placing calls")
+    parser.add_argument("--turns", type=int, default=3, help="Caller utterances per call")
+    parser.add_argument("--wav-dir", help="Directory of pre-recorded caller WAVs (8 kHz mono)")
+    parser.add_argument("--playback-delay", type=float, default=0.0, help="Simulated seconds per STREAM FILE")
+    parser.add_argument("--speech-delay", type=float, default=0.0, help="Simulated seconds per RECORD FILE")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Max random pause between calls per caller")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-command timeout in seconds")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--max-shed-rate", type=float, default=0.05,
+                        help="Fail the run if more than this fraction of calls got the call-back prompt")
+    parser.add_argument("--json", help="Write the final report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    passed = (report["calls_completed"] and report["error_rate"] < 0.05
+              and report["shed_rate"] <= args.max_shed_rate)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+ASR benchmark: word error rate and real-time factor per Whisper model/backend
+
+Runs a corpus of telephony WAVs (utt.wav + utt.txt reference transcript pairs)
+through WhisperASR.transcribe_file for every requested model size and backend.
+Each combination runs in a fresh subprocess so cold-load time and peak RSS are
+measured in isolation.
+
+A synthetic corpus can be generated offline with PiperTTS (downsampled to
+8 kHz like Asterisk recordings) when no real recordings are at hand.
+
+Usage:
+    python scripts/asr_benchmark.py --synthesize --corpus bench_corpus/
+    python scripts/asr_benchmark.py --corpus bench_corpus/ \\
+        --models tiny base small --backends openai ctranslate2 --json asr_bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Call-center style utterances for the synthetic corpus
+SYNTHETIC_SENTENCES = [
+    "I want to check my bill",
+    "My customer ID is one two three four five",
+    "My internet is not working since this morning",
+    "Can I speak to a human agent please",
+    "I would like to upgrade my plan",
+    "How much do I owe this month",
+    "The router keeps restarting every few minutes",
+    "Please update the email address on my account",
+    "Why was I charged twice for the same service",
+    "I want to cancel my subscription",
+    "What are your opening hours on the weekend",
+    "Thank you, that is all for today",
+]
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace for WER scoring"""
+    text = text.lower().replace("'", "")
+    return re.sub(r"[^a-z0-9]+", " ", text).split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Word-level Levenshtein distance
+
+    Returns:
+        tuple: (edits, reference word count)
+    """
+    ref = normalize(reference)
+    hyp = normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1], len(ref)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def wav_duration(path):
+    with wave.open(str(path), "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def load_corpus(corpus_dir, limit=None):
+    """Pair every *.wav in the corpus with its *.txt reference"""
+    items = []
+    for wav_path in sorted(Path(corpus_dir).glob("*.wav")):
+        ref_path = wav_path.with_suffix(".txt")
+        if not ref_path.exists():
+            print(f"⚠️  Skipping {wav_path.name}: no reference transcript")
+            continue
+        items.append((wav_path, ref_path.read_text().strip()))
+    return items[:limit] if limit else items
+
+
+def synthesize_corpus(corpus_dir, sentences, sample_rate):
+    """
+    Render reference sentences with PiperTTS into an 8 kHz telephony corpus
+
+    Args:
+        corpus_dir: Output directory for utt_NNN.wav / utt_NNN.txt pairs
+        sentences: Reference texts
+        sample_rate: Output rate (Asterisk records at 8000)
+    """
+    sys.path.insert(0, str(BACKEND_DIR))
+    import numpy as np
+    from asr.audio_io import resample_poly
+    from tts.tts_engine import PiperTTS
+
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    tts = PiperTTS()
+
+    for i, sentence in enumerate(sentences):
+        # in-memory synthesis: cached files are in the Asterisk output format
+        audio = tts.synthesize(sentence)
+        audio = resample_poly(audio, sample_rate, tts.sample_rate)
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+
+        stem = corpus_dir / f"utt_{i:03d}"
+        with wave.open(str(stem.with_suffix(".wav")), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        stem.with_suffix(".txt").write_text(sentence + "\n")
+
+    print(f"🗣️  Synthesized {len(sentences)} utterances into {corpus_dir}")
+
+
+def run_worker(args):
+    """Benchmark one model/backend in this process and print a JSON result"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    import config
+    config.WHISPER_MODEL = args.model
+    config.WHISPER_BACKEND = args.backend
+    if args.compute_type:
+        config.WHISPER_COMPUTE_TYPE = args.compute_type
+    from asr.whisper_engine import WhisperASR
+
+    corpus = load_corpus(args.corpus, args.limit)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    asr = WhisperASR()
+    load_seconds = time.perf_counter() - started
+    rss_loaded = peak_rss_mb()
+
+    if args.warmup and corpus:
+        asr.transcribe_file(str(corpus[0][0]))
+
+    edits = words = 0
+    audio_seconds = decode_seconds = 0.0
+    latencies = []
+    utterances = []
+    for wav_path, reference in corpus:
+        duration = wav_duration(wav_path)
+        started = time.perf_counter()
+        hypothesis = asr.transcribe_file(str(wav_path))
+        elapsed = time.perf_counter() - started
+
+        errors, count = word_errors(reference, hypothesis)
+        edits += errors
+        words += count
+        audio_seconds += duration
+        decode_seconds += elapsed
+        latencies.append(elapsed)
+        utterances.append({
+            "file": wav_path.name,
+            "reference": reference,
+            "hypothesis": hypothesis,
+            "wer": round(errors / count, 4) if count else 0.0,
+            "seconds": round(elapsed, 3),
+        })
+
+    result = {
+        "model": args.model,
+        "backend": getattr(asr.backend, "name", args.backend),
+        "requested_backend": args.backend,
+        "device": config.WHISPER_DEVICE,
+        "compute_type": config.WHISPER_COMPUTE_TYPE if args.backend == "ctranslate2" else None,
+        "utterances": len(corpus),
+        "audio_seconds": round(audio_seconds, 2),
+        "wer": round(edits / words, 4) if words else None,
+        "rtf": round(decode_seconds / audio_seconds, 4) if audio_seconds else None,
+        "cold_load_seconds": round(load_seconds, 3),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "model_rss_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if args.per_utterance:
+        result["per_utterance"] = utterances
+    print(json.dumps(result))
+    return 0
+
+
+def run_combination(args, model, backend):
+    """Run one model/backend in a fresh interpreter so load time and RSS are cold"""
+    cmd = [
+        sys.executable, __file__, "--worker",
+        "--corpus", str(args.corpus),
+        "--model", model,
+        "--backend", backend,
+    ]
+    if args.compute_type:
+        cmd += ["--compute-type", args.compute_type]
+    if args.limit:
+        cmd += ["--limit", str(args.limit)]
+    if args.warmup:
+        cmd.append("--warmup")
+    if args.per_utterance:
+        cmd.append("--per-utterance")
+
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=args.timeout)
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["worker failed"])[-1]
+        return {"model": model, "requested_backend": backend, "error": error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_report(results):
+    print()
+    print("=" * 86)
+    print("ASR Benchmark Results")
+    print("=" * 86)
+    print(f"{'model':10} {'backend':12} {'WER':>7} {'RTF':>7} {'p95 ms':>8} {'load s':>7} {'peak MB':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['model']:10} {r['requested_backend']:12} ERROR: {r['error']}")
+            continue
+        wer = f"{r['wer'] * 100:.1f}%" if r["wer"] is not None else "-"
+        rtf = f"{r['rtf']:.3f}" if r["rtf"] is not None else "-"
+        print(f"{r['model']:10} {r['backend']:12} {wer:>7} {rtf:>7} {r['latency_p95_ms']:>8} "
+              f"{r['cold_load_seconds']:>7} {r['peak_rss_mb']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper WER / real-time factor benchmark")
+    parser.add_argument("--corpus", required=True, help="Directory of utt.wav + utt.txt pairs")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--backends", nargs="+", default=["openai", "ctranslate2"])
+    parser.add_argument("--compute-type", help="CTranslate2 compute type (defaults to WHISPER_COMPUTE_TYPE)")
+    parser.add_argument("--limit", type=int, help="Only use the first N utterances")
+    parser.add_argument("--warmup", action="store_true", help="Decode one utterance before timing")
+    parser.add_argument("--per-utterance", action="store_true", help="Include hypotheses per file")
+    parser.add_argument("--synthesize", action="store_true", help="Generate the corpus with PiperTTS first")
+    parser.add_argument("--sentences", help="Text file with one reference sentence per line")
+    parser.add_argument("--sample-rate", type=int, default=8000, help="Synthetic corpus sample rate")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="Seconds per model/backend run")
+    parser.add_argument("--json", default="asr_benchmark.json", help="Machine-readable report path")
+    # internal: a single model/backend run in a subprocess
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+
+    if args.synthesize:
+        sentences = SYNTHETIC_SENTENCES
+        if args.sentences:
+            sentences = [s.strip() for s in Path(args.sentences).read_text().splitlines() if s.strip()]
+        synthesize_corpus(args.corpus, sentences, args.sample_rate)
+
+    corpus = load_corpus(args.corpus, args.limit)
+    if not corpus:
+        print(f"❌ No utterances with reference transcripts in {args.corpus}")
+        return 1
+    print(f"🎧 {len(corpus)} utterances, {len(args.models)} models x {len(args.backends)} backends")
+
+    results = []
+    for model in args.models:
+        for backend in args.backends:
+            print(f"⏱️  {model} / {backend} ...", flush=True)
+            results.append(run_combination(args, model, backend))
+
+    print_report(results)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": str(args.corpus),
+        "utterances": len(corpus),
+        "results": results,
+    }
+    Path(args.json).write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Report written to {args.json}")
+    return 0 if all("error" not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
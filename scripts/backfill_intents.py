@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Re-classify Call.intent from stored transcripts
+
+Walks the calls table in id order, a batch at a time, runs the caller's
+side of each transcript through IntentClassifier.classify_batch and writes
+back only the rows whose intent changed. Use after changing the keyword
+table, or to fill intents for calls recorded before they were saved.
+
+Usage:
+    python scripts/backfill_intents.py --dry-run
+    python scripts/backfill_intents.py --missing-only --batch-size 2000
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from agent.intent_classifier import IntentClassifier  # noqa: E402
+from agent.intent_model import transcript_user_text  # noqa: E402
+from db.database import SessionLocal  # noqa: E402
+from db.models import Call  # noqa: E402
+
+
+def backfill(batch_size, missing_only, dry_run):
+    classifier = IntentClassifier()
+    totals = Counter()
+    changes = Counter()
+    last_id = 0
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(Call.id, Call.intent, Call.transcript).filter(
+                Call.id > last_id, Call.transcript.isnot(None)
+            )
+            if missing_only:
+                query = query.filter(Call.intent.is_(None))
+            rows = query.order_by(Call.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            intents = classifier.classify_batch(transcript_user_text(row.transcript) for row in rows)
+            updates = []
+            for row, intent in zip(rows, intents):
+                totals[intent] += 1
+                if intent != row.intent:
+                    changes[(row.intent, intent)] += 1
+                    updates.append({"id": row.id, "intent": intent})
+
+            if updates and not dry_run:
+                db.bulk_update_mappings(Call, updates)
+                db.commit()
+            print(f"  up to call {last_id}: {len(rows)} classified, {len(updates)} changed")
+    finally:
+        db.close()
+
+    classified = sum(totals.values())
+    elapsed = time.perf_counter() - started
+    print(f"\n{classified} calls in {elapsed:.1f}s, {sum(changes.values())} intents changed"
+          f"{' (dry run, nothing written)' if dry_run else ''}")
+    for intent, count in totals.most_common():
+        print(f"  {intent:18} {count}")
+    if changes:
+        print("\nChanges (old -> new):")
+        for (old, new), count in changes.most_common(20):
+            print(f"  {old or '-':18} -> {new:18} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Call.intent from transcripts")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Calls read and written per batch")
+    parser.add_argument("--missing-only", action="store_true", help="Only calls without an intent")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+
+    backfill(args.batch_size, args.missing_only, args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Edge TTS WebSocket endpoint
+
+Speaks enough of the readaloud protocol for edge-tts: takes the
+speech.config and ssml messages, answers turn.start, a few binary audio
+frames (silent MP3 frames) and turn.end. Latency and failures can be
+injected to exercise the TTS engine chain's fallback and circuit breaker
+without touching the real service.
+
+Usage:
+    # serve, then run the backend with
+    #   EDGE_TTS_WSS_URL="ws://localhost:8765/edge/v1?TrustedClientToken=mock"
+    #   TTS_ENGINES=edge,piper
+    python scripts/mock_edge_tts.py --port 8765 --delay-ms 200 --fail-rate 0.1
+
+    # self-check: drive the real engine chain against the mock
+    python scripts/mock_edge_tts.py --check
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from aiohttp import WSMsgType, web
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz frame header followed by silence
+SILENT_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+
+class MockEdge:
+    """Fault-injectable Edge readaloud endpoint"""
+
+    def __init__(self, delay_ms=0.0, fail_rate=0.0, frames=4, audio=None):
+        self.delay_ms = delay_ms
+        self.fail_rate = fail_rate
+        self.frames = frames
+        self.audio = audio
+        self.requests = 0
+        self.failures = 0
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT or "Path:ssml" not in message.data:
+                continue  # speech.config
+
+            self.requests += 1
+            request_id = headers(message.data).get("X-RequestId", "mock")
+            if self.delay_ms:
+                await asyncio.sleep(self.delay_ms / 1000)
+
+            if random.random() < self.fail_rate:
+                # Hang up without audio: edge-tts raises NoAudioReceived
+                self.failures += 1
+                break
+
+            await ws.send_str(frame(request_id, "turn.start", '{"context":{"serviceTag":"mock"}}'))
+            for chunk in self.chunks():
+                header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+                await ws.send_bytes(len(header).to_bytes(2, "big") + header + chunk)
+            await ws.send_str(frame(request_id, "turn.end", "{}"))
+
+        await ws.close()
+        return ws
+
+    def chunks(self):
+        if self.audio:
+            data = self.audio
+            return [data[i:i + 4096] for i in range(0, len(data), 4096)]
+        return [SILENT_MP3_FRAME] * self.frames
+
+
+def headers(message):
+    """Header lines of a text message"""
+    head = message.split("\r\n\r\n", 1)[0]
+    return dict(line.split(":", 1) for line in head.split("\r\n") if ":" in line)
+
+
+def frame(request_id, path, body):
+    """Text message in the service's header + body framing"""
+    return f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\nPath:{path}\r\n\r\n{body}"
+
+
+async def serve(mock, host, port):
+    app = web.Application()
+    app.router.add_get("/edge/v1", mock.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+async def run_check(args):
+    """Healthy -> slow -> recovered -> failing, checking where requests land"""
+    mock = MockEdge()
+    runner = await serve(mock, "127.0.0.1", args.port)
+    url = f"ws://127.0.0.1:{args.port}/edge/v1?TrustedClientToken=mock"
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import config
+    config.EDGE_TTS_WSS_URL = url
+    config.TTS_ENGINE_TIMEOUT = 2.0
+    config.TTS_BREAKER_MIN_SAMPLES = 3
+    config.TTS_BREAKER_WINDOW = 5
+    config.TTS_BREAKER_LATENCY_MS = 300
+    config.TTS_BREAKER_COOLDOWN = 1.0
+    cache_dir = tempfile.mkdtemp(prefix="mock_edge_")
+    config.DATA_DIR = Path(cache_dir)
+
+    from tts.engines import create_tts
+    tts = create_tts(["edge", "piper"])
+    edge = tts.engines[0]
+    counter = iter(range(1_000_000))
+    failures = []
+
+    async def phase(name, requests, expect_engine, expect_state):
+        served = {}
+        for _ in range(requests):
+            fallbacks = tts.counters["fallbacks"]
+            await tts.synthesize_to_file(f"Mock phrase number {next(counter)}.")
+            engine = "edge" if tts.counters["fallbacks"] == fallbacks else "piper"
+            served[engine] = served.get(engine, 0) + 1
+        state = edge.breaker.stats()["state"]
+        ok = state == expect_state and expect_engine in served
+        print(f"{'✅' if ok else '❌'} {name:10} served={served} breaker={state}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        await phase("healthy", 5, "edge", "closed")
+        mock.delay_ms = 600
+        await phase("slow", 6, "piper", "open")
+        mock.delay_ms = 0
+        await asyncio.sleep(config.TTS_BREAKER_COOLDOWN + 0.1)
+        await phase("recovered", 3, "edge", "closed")
+        mock.fail_rate = 1.0
+        await phase("failing", 6, "piper", "open")
+    finally:
+        await runner.cleanup()
+        edge.tts.cache.flush()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\nMock served {mock.requests} requests ({mock.failures} injected failures)")
+    print(f"Router: {tts.stats()}")
+    return 1 if failures else 0
+
+
+async def main_async(args):
+    mock = MockEdge(args.delay_ms, args.fail_rate, args.frames, Path(args.audio).read_bytes() if args.audio else None)
+    runner = await serve(mock, args.host, args.port)
+    print(f"🎙️  Mock Edge TTS on ws://{args.host}:{args.port}/edge/v1?TrustedClientToken=mock")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Edge TTS WebSocket endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Added latency per synthesis")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered without audio")
+    parser.add_argument("--frames", type=int, default=4, help="Silent MP3 frames per response")
+    parser.add_argument("--audio", help="Serve this MP3 file instead of silence")
+    parser.add_argument("--check", action="store_true", help="Run the engine chain against the mock and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        return asyncio.run(run_check(args))
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the LLM server (Ollama /api/chat)
+
+Streams a canned reply as NDJSON chunks with configurable time to first
+token and per-token delay, so the agent's streaming, timeouts and hangup
+cancellation can be exercised without a GPU or a model download. Counts
+TCP connections (to confirm keep-alive reuse) and streams the client
+abandoned mid-generation.
+
+Usage:
+    # serve, then run the backend with LLM_API_URL=http://localhost:11435
+    python scripts/mock_llm_server.py --port 11435 --first-token-ms 300 --token-ms 40
+
+    # self-check: drive the backend's LLM client and agent against the mock
+    python scripts/mock_llm_server.py --check
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+DEFAULT_REPLY = (
+    "Thanks for your patience. I can help you with that today. "
+    "Could you tell me a little more about what you need?"
+)
+
+
+class MockLLM:
+    """Ollama-compatible chat endpoint with injectable latency and failures"""
+
+    def __init__(self, reply=DEFAULT_REPLY, first_token_ms=0.0, token_ms=0.0, fail_rate=0.0):
+        self.reply = reply
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.completed = 0
+        self.abandoned = 0
+        self.connections = set()
+
+    def tokens(self):
+        words = self.reply.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    async def chat(self, request):
+        self.requests += 1
+        self.connections.add(id(request.transport))
+        body = await request.json()
+        model = body.get("model", "mock")
+
+        if random.random() < self.fail_rate:
+            return web.json_response({"error": "mock failure"}, status=500)
+
+        if not body.get("stream", True):
+            await asyncio.sleep((self.first_token_ms + self.token_ms * len(self.tokens())) / 1000)
+            self.completed += 1
+            return web.json_response(self.chunk(model, self.reply, True))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        try:
+            await asyncio.sleep(self.first_token_ms / 1000)
+            for token in self.tokens():
+                await response.write(json.dumps(self.chunk(model, token, False)).encode() + b"\n")
+                await asyncio.sleep(self.token_ms / 1000)
+            await response.write(json.dumps(self.chunk(model, "", True)).encode() + b"\n")
+            await response.write_eof()
+            self.completed += 1
+        except (ConnectionResetError, asyncio.CancelledError):
+            # Client went away (caller hung up): stop generating
+            self.abandoned += 1
+        return response
+
+    @staticmethod
+    def chunk(model, content, done):
+        return {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    async def tags(self, request):
+        return web.json_response({"models": [{"name": "mock"}]})
+
+
+async def serve(mock, host, port):
+    app = web.Application()
+    app.router.add_post("/api/chat", mock.chat)
+    app.router.add_get("/api/tags", mock.tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+async def run_check(args):
+    """Streaming, keep-alive reuse, timeouts, hangup cancellation and the agent path"""
+    mock = MockLLM(token_ms=20)
+    runner = await serve(mock, "127.0.0.1", args.port)
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import config
+    config.LLM_API_URL = f"http://127.0.0.1:{args.port}"
+    config.LLM_READ_TIMEOUT = 0.5
+    from agent.llm_client import LLMClient, LLMError
+
+    client = LLMClient()
+    messages = [{"role": "user", "content": "Hello"}]
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'✅' if ok else '❌'} {name:14} {detail}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        # Tokens arrive incrementally
+        started = time.perf_counter()
+        arrivals = []
+        async for _ in client.stream_chat(messages):
+            arrivals.append(time.perf_counter() - started)
+        check("streaming", len(arrivals) > 1 and arrivals[0] < arrivals[-1] / 2,
+              f"{len(arrivals)} tokens, first at {arrivals[0] * 1000:.0f} ms, last at {arrivals[-1] * 1000:.0f} ms")
+
+        # Sequential requests share one pooled connection
+        mock.connections.clear()
+        for _ in range(5):
+            await client.chat(messages)
+        check("keep-alive", len(mock.connections) == 1, f"5 requests over {len(mock.connections)} connection(s)")
+
+        # A stalled first token hits the read timeout instead of hanging the call
+        mock.first_token_ms = 3000
+        started = time.perf_counter()
+        try:
+            await client.chat(messages)
+            check("timeout", False, "no error raised")
+        except LLMError as e:
+            elapsed = time.perf_counter() - started
+            check("timeout", elapsed < 1.5, f"{e} ({elapsed:.2f}s)")
+        mock.first_token_ms = 0
+
+        # Hanging up mid-reply closes the stream and the server stops generating
+        mock.token_ms = 200
+        abandoned = mock.abandoned
+        received = []
+
+        async def consume():
+            async for token in client.stream_chat(messages):
+                received.append(token)
+
+        task = asyncio.create_task(consume())
+        while len(received) < 2:
+            await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.5)
+        check("cancellation", mock.abandoned == abandoned + 1 and len(received) < len(mock.tokens()),
+              f"stopped after {len(received)}/{len(mock.tokens())} tokens, server abandoned={mock.abandoned - abandoned}")
+        mock.token_ms = 20
+
+        # The agent turns the token stream into sentences
+        from agent.agent import AIAgent
+        agent = AIAgent()
+        agent.llm = client
+        sentences = [s async for s in agent.stream_smart_response("I have a question", [], "check")]
+        check("agent", len(sentences) >= 2, f"{len(sentences)} sentences: {sentences[0]!r} ...")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    print(f"\nMock: {mock.requests} requests, {mock.completed} completed, {mock.abandoned} abandoned")
+    print(f"Client: {client.stats()}")
+    return 1 if failures else 0
+
+
+async def main_async(args):
+    mock = MockLLM(args.reply, args.first_token_ms, args.token_ms, args.fail_rate)
+    runner = await serve(mock, args.host, args.port)
+    print(f"🤖 Mock LLM server on http://{args.host}:{args.port} (POST /api/chat)")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Text every request is answered with")
+    parser.add_argument("--first-token-ms", type=float, default=0.0, help="Delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--check", action="store_true", help="Run the LLM client against the mock and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        return asyncio.run(run_check(args))
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
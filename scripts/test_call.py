@@ -33,6 +33,9 @@ def test_api_connection():
         if response.status_code == 200:
             print("✅ API server is healthy")
             return True
+        elif response.status_code == 503:
+            print("⏳ API server is up, models still loading/warming up")
+            return False
         else:
             print(f"❌ API server returned status {response.status_code}")
             return False
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Train the statistical intent model from call history
+
+Reads labeled calls (Call.intent plus the caller's lines of
+Call.transcript), fits a TF-IDF + softmax regression model, calibrates its
+confidence on a held-out split and writes it as a NumPy .npz file to
+INTENT_MODEL_PATH, where the backend picks it up at startup. Inputs the
+model is not confident about still go through the keyword table and, if
+that finds nothing, to the LLM.
+
+Labels are only as good as Call.intent: review or correct them (or
+backfill with scripts/backfill_intents.py) before training.
+
+Usage:
+    python scripts/train_intent_model.py
+    python scripts/train_intent_model.py --min-examples 20 --threshold 0.7 --output /tmp/intent_model.npz
+
+    # self-check on synthetic calls: accuracy, calibration, save/load, latency
+    python scripts/train_intent_model.py --check
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import config  # noqa: E402
+from agent.intent_model import IntentModel, train, transcript_user_text  # noqa: E402
+
+# Synthetic caller phrasings for --check, mostly ones the keyword table misses
+SYNTHETIC = {
+    "billing": [
+        "why was I charged twice this month", "I think there is a mistake on my bill",
+        "how much do I owe", "when is my payment due", "can I pay with a different card",
+        "the amount taken from my bank looks wrong", "I want a refund for last month",
+    ],
+    "technical_support": [
+        "I can't get online since yesterday", "the router lights are blinking red",
+        "my connection keeps dropping", "pages take forever to load", "no signal on my phone",
+        "the wifi is not working in the bedroom", "calls keep cutting out",
+    ],
+    "account_info": [
+        "what plan am I on", "can you tell me my account details", "which package do I have",
+        "when does my contract end", "what is the status of my account", "update my email address",
+    ],
+    "cancellation": [
+        "I want to cancel my contract", "please end my subscription", "I'm switching to another provider",
+        "how do I close my account", "I don't want this service anymore", "stop my plan at the end of the month",
+    ],
+    "general": [
+        "what are your opening hours", "do you have a store near me", "can I speak to a person",
+        "where is your head office", "is there a discount for students", "what's the weather like",
+    ],
+}
+FILLERS = ["", "um ", "hi ", "yeah so ", "okay ", "hello there "]
+SUFFIXES = ["", " please", " thanks", " right now", " today", " if you can"]
+
+
+def load_calls(drop_intents, min_examples):
+    from db.database import SessionLocal
+    from db.models import Call
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Call.intent, Call.transcript).filter(
+            Call.intent.isnot(None), Call.transcript.isnot(None)
+        ).all()
+    finally:
+        db.close()
+
+    texts, labels = [], []
+    for intent, transcript in rows:
+        text = transcript_user_text(transcript)
+        if text and intent not in drop_intents:
+            texts.append(text)
+            labels.append(intent)
+
+    counts = Counter(labels)
+    rare = {intent for intent, count in counts.items() if count < min_examples}
+    if rare:
+        print(f"Skipping intents with fewer than {min_examples} calls: {', '.join(sorted(rare))}")
+    keep = [i for i, label in enumerate(labels) if label not in rare]
+    return [texts[i] for i in keep], [labels[i] for i in keep]
+
+
+def synthetic_calls(n, label_noise=0.05, seed=0):
+    """Random phrasings with a share of wrong labels, like hand-labeled history"""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    intents = list(SYNTHETIC)
+    for _ in range(n):
+        intent = rng.choice(intents)
+        texts.append(rng.choice(FILLERS) + rng.choice(SYNTHETIC[intent]) + rng.choice(SUFFIXES))
+        labels.append(rng.choice(intents) if rng.random() < label_noise else intent)
+    return texts, labels
+
+
+def report(metrics):
+    print(json.dumps(metrics, indent=2))
+
+
+def run_check(args):
+    """Train on synthetic calls and check accuracy, calibration, persistence and latency"""
+    from agent.intent_classifier import IntentClassifier
+
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'✅' if ok else '❌'} {name:12} {detail}")
+        if not ok:
+            failures.append(name)
+
+    texts, labels = synthetic_calls(3000)
+    started = time.perf_counter()
+    model, metrics = train(texts, labels, min_df=2, threshold=args.threshold)
+    check("training", metrics["val_accuracy"] >= 0.9,
+          f"{metrics['train']} calls in {time.perf_counter() - started:.1f}s, "
+          f"val accuracy {metrics['val_accuracy']:.1%}, {metrics['vocabulary']} n-grams")
+    check("calibration", metrics["ece_after"] <= max(metrics["ece_before"], 0.05),
+          f"T={metrics['temperature']}, ECE {metrics['ece_before']:.3f} -> {metrics['ece_after']:.3f}, "
+          f"{metrics['coverage']:.0%} above {args.threshold}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "intent_model.npz"
+        model.save(path)
+        loaded = IntentModel.load(path)
+        size = path.stat().st_size
+    probe, _ = synthetic_calls(200, seed=1)
+    same = model.predict_batch(probe) == loaded.predict_batch(probe)
+    check("save/load", same, f"{size / 1024:.1f} KB, identical predictions: {same}")
+
+    single = []
+    for text in probe:
+        started = time.perf_counter()
+        loaded.predict(text)
+        single.append((time.perf_counter() - started) * 1000)
+    single.sort()
+    p50, p99 = single[len(single) // 2], single[int(len(single) * 0.99)]
+    check("latency", p50 < 1.0, f"single text p50 {p50 * 1000:.0f} us, p99 {p99 * 1000:.0f} us")
+
+    batch = probe * 5
+    started = time.perf_counter()
+    loaded.predict_batch(batch)
+    per_text = (time.perf_counter() - started) / len(batch) * 1e6
+    check("batch", per_text < 1000, f"{len(batch)} texts at {per_text:.0f} us each")
+
+    classifier = IntentClassifier(model=loaded)
+    keywords_only = IntentClassifier()
+    keywords_only.model = None
+    phrase = "I can't get online since yesterday"
+    check("routing", classifier.classify(phrase) == "technical_support" and classifier.classify("12345") == "general",
+          f"{phrase!r}: keywords -> {keywords_only.classify(phrase)}, model -> {classifier.classify(phrase)}; "
+          f"'12345' -> {classifier.classify('12345')}")
+    # Keywords win unless the model disagrees with near certainty
+    keyworded = "I want a new sim card"
+    model_intent, confidence = loaded.predict(keyworded)
+    check("precedence", classifier.classify(keyworded) == keywords_only.classify(keyworded) == "new_service",
+          f"{keyworded!r}: keywords -> {keywords_only.classify(keyworded)}, "
+          f"model alone -> {model_intent} ({confidence:.2f}), combined -> {classifier.classify(keyworded)}")
+
+    print(f"\nModel counters: {loaded.stats()}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the TF-IDF intent model from labeled calls")
+    parser.add_argument("--output", default=str(config.INTENT_MODEL_PATH), help="Where to write the .npz model")
+    parser.add_argument("--min-examples", type=int, default=10, help="Drop intents with fewer labeled calls")
+    parser.add_argument("--drop-intent", action="append", default=[], help="Intent to leave out (repeatable)")
+    parser.add_argument("--min-df", type=int, default=2, help="Drop n-grams seen in fewer calls")
+    parser.add_argument("--max-features", type=int, default=20000, help="Vocabulary size cap")
+    parser.add_argument("--l2", type=float, default=1e-4, help="Weight decay")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=config.INTENT_MODEL_THRESHOLD,
+                        help="Confidence threshold to report coverage and accuracy for")
+    parser.add_argument("--check", action="store_true", help="Train on synthetic calls and run self-checks")
+    args = parser.parse_args()
+
+    if args.check:
+        return run_check(args)
+
+    texts, labels = load_calls(set(args.drop_intent), args.min_examples)
+    if not texts:
+        print("No labeled calls with transcripts to train on")
+        return 1
+    print(f"Training on {len(texts)} calls: {dict(Counter(labels).most_common())}")
+
+    model, metrics = train(
+        texts, labels,
+        min_df=args.min_df, max_features=args.max_features, l2=args.l2, epochs=args.epochs,
+        validation_split=args.validation_split, threshold=args.threshold,
+    )
+    report(metrics)
+    model.save(args.output)
+    print(f"\nSaved {args.output} ({Path(args.output).stat().st_size / 1024:.1f} KB); restart the backend to load it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())